@@ -82,6 +82,7 @@ async def main():
             print(f'   {i:2d}. {entity}')
         
         await database.close()
+        await d365_client.close()
         print(f'\n🎯 Database populated successfully!')
         print(f'   Your D365FO MCP server can now search and query these entities.')
         
@@ -95,4 +96,9 @@ async def main():
         sys.exit(1)
 
 if __name__ == "__main__":
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
     asyncio.run(main())
\ No newline at end of file
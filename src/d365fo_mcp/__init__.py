@@ -5,10 +5,12 @@ A simplified Model Context Protocol server for Microsoft Dynamics 365 Finance &
 with intelligent entity instructions that learn and improve over time.
 """
 
+from ._lazy import lazy_getattr
+
 __version__ = "0.1.0"
 __author__ = "Your Name"
 __email__ = "your.email@example.com"
 
-from .main import main
-
 __all__ = ["main"]
+
+__getattr__ = lazy_getattr(__name__, {"main": ".main"})
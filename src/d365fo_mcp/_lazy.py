@@ -0,0 +1,26 @@
+"""
+Lazy package exports
+
+Implementations are imported on first attribute access so that importing a
+package (e.g. for its interfaces) does not pull in their dependencies.
+"""
+
+import importlib
+from collections.abc import Callable, Mapping
+from typing import Any
+
+
+def lazy_getattr(module_name: str, exports: Mapping[str, str]) -> Callable[[str], Any]:
+    """
+    Build a module-level __getattr__ serving exports on first access.
+
+    Args:
+        module_name: __name__ of the package defining __getattr__
+        exports: Exported name -> relative module that defines it
+    """
+    def _getattr(name: str) -> Any:
+        if name in exports:
+            return getattr(importlib.import_module(exports[name], module_name), name)
+        raise AttributeError(f"module {module_name!r} has no attribute {name!r}")
+
+    return _getattr
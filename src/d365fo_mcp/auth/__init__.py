@@ -4,11 +4,13 @@ Authentication module for D365FO MCP Server
 Handles Azure AD authentication for D365 Finance & Operations access.
 """
 
+from .._lazy import lazy_getattr
 from .interface import IAuthProvider, AuthenticationError
-from .d365_auth import D365AuthManager
 
 __all__ = [
     "IAuthProvider", 
     "AuthenticationError",
     "D365AuthManager"
 ]
+
+__getattr__ = lazy_getattr(__name__, {"D365AuthManager": ".d365_auth"})
@@ -4,9 +4,12 @@ D365 Authentication Manager
 Azure AD implementation of IAuthProvider for D365 Finance & Operations.
 """
 
+import asyncio
+import os
 import time
-from typing import Dict, Any, Optional
-from azure.identity import DefaultAzureCredential, ClientSecretCredential
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+import msal
 import structlog
 
 from ..config import get_settings
@@ -20,22 +23,65 @@ class D365AuthManager(IAuthProvider):
 
     def __init__(self) -> None:
         self.settings = get_settings()
-        self.token_cache: Dict[str, Dict[str, Any]] = {}
+        self.token_cache: Dict[str, Tuple[str, float]] = {}  # key -> (token, expires_at)
 
-        # Use client secret credential for service principal authentication
-        self.credential = ClientSecretCredential(
-            tenant_id=self.settings.azure_tenant_id,
-            client_id=self.settings.azure_client_id,
-            client_secret=self.settings.azure_client_secret,
+        # MSAL token cache persisted to disk so short-lived processes
+        # (e.g. manual_sync.py) reuse a token instead of hitting Azure AD
+        self.cache_path: Optional[Path] = (
+            Path(self.settings.token_cache_path).expanduser()
+            if self.settings.token_cache_path else None
         )
+        self.msal_cache = msal.SerializableTokenCache()
+        self._load_persistent_cache()
+
+        # Created lazily: constructing the app performs authority discovery
+        self._app: Optional[msal.ConfidentialClientApplication] = None
 
         logger.info(
             "D365 Auth Manager initialized",
             tenant_id=self.settings.azure_tenant_id,
             client_id=self.settings.azure_client_id,
             d365_base_url=self.settings.d365_base_url,
+            token_cache_path=str(self.cache_path) if self.cache_path else None,
         )
 
+    @property
+    def app(self) -> msal.ConfidentialClientApplication:
+        """MSAL confidential client for the service principal"""
+        if self._app is None:
+            self._app = msal.ConfidentialClientApplication(
+                client_id=self.settings.azure_client_id,
+                client_credential=self.settings.azure_client_secret,
+                authority=f"https://login.microsoftonline.com/{self.settings.azure_tenant_id}",
+                token_cache=self.msal_cache,
+            )
+        return self._app
+
+    def _load_persistent_cache(self) -> None:
+        """Load the serialized MSAL cache from disk if present"""
+        if self.cache_path is None or not self.cache_path.exists():
+            return
+        try:
+            self.msal_cache.deserialize(self.cache_path.read_text(encoding="utf-8"))
+            logger.debug("Loaded persisted token cache", path=str(self.cache_path))
+        except Exception as e:
+            # A corrupt cache only costs one token acquisition
+            logger.warning("Ignoring unreadable token cache", path=str(self.cache_path), error=str(e))
+
+    def _save_persistent_cache(self) -> None:
+        """Write the MSAL cache to disk (mode 0600) when it has changed"""
+        if self.cache_path is None or not self.msal_cache.has_state_changed:
+            return
+        try:
+            self.cache_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            fd = os.open(self.cache_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(self.msal_cache.serialize())
+            os.chmod(self.cache_path, 0o600)
+            self.msal_cache.has_state_changed = False
+        except OSError as e:
+            logger.warning("Failed to persist token cache", path=str(self.cache_path), error=str(e))
+
     async def get_d365_token(self, user_context: Dict[str, str]) -> str:
         """
         Get D365 access token using client credentials flow
@@ -49,27 +95,33 @@ class D365AuthManager(IAuthProvider):
         cache_key = f"d365_{user_context.get('user_id', 'system')}"
 
         # Check cache first
-        if cache_key in self.token_cache:
-            token_data = self.token_cache[cache_key]
-            if token_data["expires_at"] > time.time() + 60:  # 60 second buffer
-                logger.debug("Using cached D365 token", cache_key=cache_key)
-                return str(token_data["token"])
+        entry = self.token_cache.get(cache_key)
+        if entry is not None and entry[1] > time.time() + 60:  # 60 second buffer
+            return entry[0]
 
         try:
             # Get token for D365 Finance & Operations
             scope = f"{self.settings.d365_resource_url}/.default"
 
-            logger.debug("Requesting new D365 token", scope=scope)
-            token = self.credential.get_token(scope)
+            logger.debug("Requesting D365 token", scope=scope)
+            # MSAL is synchronous (HTTP + cache file I/O); keep it off the event loop
+            result = await asyncio.to_thread(self._acquire_token, scope)
+
+            if "access_token" not in result:
+                raise AuthenticationError(
+                    f"{result.get('error')}: {result.get('error_description')}"
+                )
 
             # Cache the token
-            self.token_cache[cache_key] = {"token": token.token, "expires_at": token.expires_on}
+            expires_at = time.time() + int(result.get("expires_in", 0))
+            token: str = result["access_token"]
+            self.token_cache[cache_key] = (token, expires_at)
 
             logger.info(
-                "D365 token acquired successfully", cache_key=cache_key, expires_at=token.expires_on
+                "D365 token acquired successfully", cache_key=cache_key, expires_at=expires_at
             )
 
-            return str(token.token)
+            return token
 
         except Exception as e:
             logger.error(
@@ -80,9 +132,24 @@ class D365AuthManager(IAuthProvider):
             )
             raise AuthenticationError(f"Failed to acquire D365 token: {e}") from e
 
+    def _acquire_token(self, scope: str) -> Dict[str, Any]:
+        """Blocking MSAL acquisition; run via asyncio.to_thread"""
+        result = (
+            self.app.acquire_token_silent([scope], account=None)
+            or self.app.acquire_token_for_client(scopes=[scope])
+        )
+        self._save_persistent_cache()
+        if not isinstance(result, dict):
+            raise AuthenticationError(f"Unexpected MSAL token response: {type(result).__name__}")
+        return result
+
     def clear_token_cache(self) -> None:
         """Clear the token cache (useful for testing or token refresh issues)"""
         self.token_cache.clear()
+        self.msal_cache = msal.SerializableTokenCache()
+        self._app = None
+        if self.cache_path is not None:
+            self.cache_path.unlink(missing_ok=True)
         logger.info("Token cache cleared")
 
     async def validate_credentials(self) -> bool:
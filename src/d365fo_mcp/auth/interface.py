@@ -5,7 +5,7 @@ Defines contract for authentication providers (Azure AD, Service Principal, etc.
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Mapping, Optional
 
 
 class IAuthProvider(ABC):
@@ -51,7 +51,7 @@ class IAuthProvider(ABC):
         pass
     
     @abstractmethod
-    def get_provider_info(self) -> Dict[str, Any]:
+    def get_provider_info(self) -> Mapping[str, Any]:
         """
         Get information about the auth provider.
         
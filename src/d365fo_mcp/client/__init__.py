@@ -4,11 +4,13 @@ D365 Client module
 HTTP client for interacting with D365 Finance & Operations OData APIs.
 """
 
+from .._lazy import lazy_getattr
 from .interface import ID365Client, CompanyMode
-from .d365_client import D365Client
 
 __all__ = [
     "ID365Client", 
     "CompanyMode", 
     "D365Client"
 ]
+
+__getattr__ = lazy_getattr(__name__, {"D365Client": ".d365_client"})
@@ -5,8 +5,17 @@ Extracted and simplified from FinOpsAgent for the d365fo-mcp server.
 Handles OData operations with proper company context management.
 """
 
+import asyncio
+import json
+import random
 import re
-from typing import Optional, Literal, Dict, Any
+import uuid
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import (
+    Optional, Dict, Any, List, Tuple, Awaitable, Iterable, TypeVar, AsyncIterator
+)
 import httpx
 import structlog
 
@@ -16,31 +25,253 @@ from .interface import ID365Client, CompanyMode
 
 logger = structlog.get_logger(__name__)
 
+T = TypeVar("T")
+
+# Company-filter patterns used by determine_company_mode / build_query_url
+_DATAAREA_MATCH_RE = re.compile(r"dataAreaId\s+eq\s+'([^']+)'", re.IGNORECASE)
+_DATAAREA_CLAUSE_RE = re.compile(r"\(?\s*dataAreaId\s+eq\s+'[^']+'\s*\)?", re.IGNORECASE)
+# Quoted literals ('' escapes a quote), parentheses and "and" separators of a $filter
+_FILTER_TOKEN_RE = re.compile(r"'(?:[^']|'')*'|[()]|\s+and\s+", re.IGNORECASE)
+
+# Sub-requests per $batch POST; larger batches are split and sent concurrently
+BATCH_CHUNK_SIZE = 50
+
+# Throttling (429) and unavailable (503) responses are safe to retry for any
+# method; other gateway errors only for reads, which cannot double-apply
+RETRY_STATUS_CODES = frozenset({429, 503})
+IDEMPOTENT_RETRY_STATUS_CODES = frozenset({500, 502, 504})
+MAX_BACKOFF_RETRIES = 5
+MAX_RETRY_DELAY_SECONDS = 60.0
+
+try:
+    import h2  # noqa: F401
+
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
+
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
+
+async def _gather_bounded(coros: Iterable[Awaitable[T]], limit: int = 16) -> List[T]:
+    """Run awaitables concurrently with at most ``limit`` in flight, preserving order"""
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(coro: Awaitable[T]) -> T:
+        async with semaphore:
+            return await coro
+
+    return await asyncio.gather(*(run(c) for c in coros))
+
+
+def _retry_delay(response: httpx.Response, attempt: int) -> float:
+    """Seconds to wait before retrying: Retry-After if given, else exponential backoff with jitter"""
+    retry_after = response.headers.get("Retry-After")
+    if retry_after:
+        try:
+            delay = float(retry_after)
+        except ValueError:
+            try:
+                delay = (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds()
+            except (TypeError, ValueError):
+                delay = None
+        if delay is not None:
+            return min(max(delay, 0.0), MAX_RETRY_DELAY_SECONDS)
+    return min(2 ** attempt + random.random(), 30.0)
+
+
+def _remove_dataareaid_clause(filter_expr: str) -> str:
+    """
+    Drop top-level ``dataAreaId eq '...'`` clauses from an $filter expression.
+
+    Only the matched clauses and their "and" separators are cut; the rest of
+    the expression, including quoted literals, is kept byte for byte.
+    """
+    if not _DATAAREA_CLAUSE_RE.search(filter_expr):
+        return filter_expr
+
+    # Spans of the "and" separators outside literals and parentheses
+    separators: List[Tuple[int, int]] = []
+    depth = 0
+    for token in _FILTER_TOKEN_RE.finditer(filter_expr):
+        text = token.group()
+        if text == "(":
+            depth += 1
+        elif text == ")":
+            depth -= 1
+        elif depth == 0 and not text.startswith("'"):
+            separators.append(token.span())
+
+    starts = [0] + [end for _, end in separators]
+    ends = [start for start, _ in separators] + [len(filter_expr)]
+    pieces: List[str] = []
+    for i, (start, end) in enumerate(zip(starts, ends, strict=True)):
+        if _DATAAREA_CLAUSE_RE.fullmatch(filter_expr[start:end].strip()):
+            continue
+        if pieces:
+            # Keep the separator that preceded this clause in the original
+            pieces.append(filter_expr[separators[i - 1][0]:separators[i - 1][1]])
+        pieces.append(filter_expr[start:end])
+    return "".join(pieces)
+
+
+@lru_cache(maxsize=4096)
+def _build_query_url_cached(base_url: str, query: str, company_mode: str) -> str:
+    """
+    Apply the company rules to a query string (see D365Client.build_query_url).
+
+    Memoised because sync and batch fetches rebuild the same entity/query/mode
+    combinations many times. The instance URL is part of ``base_url``, so
+    entries never go stale when a client points at a different resource.
+    """
+    if company_mode not in ("default", "specific", "all"):
+        raise ValueError(f"Unknown company mode: {company_mode}")
+
+    # Single pass over the raw query parameters. Values are kept verbatim
+    # (no percent/plus decoding) so OData literals round-trip unchanged.
+    strip_company = company_mode != "specific"
+    has_cross_company = False
+    params = []
+    for part in query.lstrip("?").split("&"):
+        if not part:
+            continue
+        key, sep, value = part.partition("=")
+        if key == "cross-company":
+            has_cross_company = True
+        elif strip_company:
+            if key == "$filter":
+                value = _remove_dataareaid_clause(value)
+                if not value:
+                    continue
+            elif _DATAAREA_CLAUSE_RE.fullmatch(part.strip()):
+                continue
+        params.append(f"{key}{sep}{value}")
+
+    # Specific and all-company queries both require cross-company=true
+    if company_mode != "default" and not has_cross_company:
+        params.append("cross-company=true")
+
+    return f"{base_url}?{'&'.join(params)}" if params else base_url
+
+
+def _build_batch_body(boundary: str, urls: List[str]) -> str:
+    """Build an OData $batch multipart/mixed body with one GET part per URL"""
+    parts = []
+    for url in urls:
+        parts.append(
+            f"--{boundary}\r\n"
+            "Content-Type: application/http\r\n"
+            "Content-Transfer-Encoding: binary\r\n"
+            "\r\n"
+            f"GET {url} HTTP/1.1\r\n"
+            "Accept: application/json\r\n"
+            "\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n")
+    return "".join(parts)
+
+
+def _parse_batch_response(content_type: str, body: str) -> List[Dict[str, Any]]:
+    """
+    Parse an OData $batch multipart/mixed response into the embedded JSON bodies.
+
+    Each part wraps a full HTTP response (status line, headers, blank line, body).
+    Parts are returned in order; sub-requests that failed carry D365's own
+    ``{"error": {...}}`` payload.
+    """
+    match = re.search(r'boundary="?([^";]+)"?', content_type)
+    if not match:
+        raise ValueError(f"Missing boundary in $batch response content type: {content_type}")
+    delimiter = f"--{match.group(1)}"
+
+    results: List[Dict[str, Any]] = []
+    for part in body.split(delimiter)[1:]:
+        if part.startswith("--"):
+            break  # closing delimiter
+
+        # Skip the MIME part headers, then the embedded HTTP status line + headers
+        _, _, http_message = part.partition("\r\n\r\n")
+        status_line, _, rest = http_message.partition("\r\n")
+        _, _, payload = rest.partition("\r\n\r\n")
+        payload = payload.strip()
+
+        status_code = int(status_line.split(" ")[1]) if status_line.startswith("HTTP/") else 0
+        if status_code >= 400:
+            logger.warning("D365 batch sub-request failed", status_code=status_code)
+
+        results.append(_json_loads(payload) if payload else {})
+
+    return results
+
 
 class D365Client(ID365Client):
     """HTTP client for D365 Finance & Operations OData APIs with automatic token refresh"""
 
-    def __init__(self, token: str, auth_provider: Optional[IAuthProvider] = None):
-        self.token = token
+    def __init__(self, token: Optional[str] = None, auth_provider: Optional[IAuthProvider] = None):
         self.auth_provider = auth_provider
+        self._set_token(token)
+        # Without an initial token the first request fetches one from auth_provider
+        self._token_lock = asyncio.Lock()
         self.settings = get_settings()
         self.resource = self.settings.d365_resource_url
-        self._user_default_company: Optional[str] = None
+        # Static for the client's lifetime, so resolve once instead of per call
+        self.user_default_company = self.settings.dataareaid.lower()
+
+        # Long-lived client so every OData call reuses pooled keep-alive connections
+        # instead of paying a fresh TCP+TLS handshake per request
+        self._client = httpx.AsyncClient(
+            timeout=30.0,
+            http2=_HTTP2_AVAILABLE,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=50),
+        )
+
+    def _set_token(self, token: Optional[str]) -> None:
+        """Store the access token and rebuild the cached request headers"""
+        self.token = token
+        self._headers: Dict[str, str] = {
+            "Accept": "application/json",
+            "Content-Type": "application/json",
+            "OData-MaxVersion": "4.0",
+            "OData-Version": "4.0",
+        }
+        if token is not None:
+            self._headers["Authorization"] = f"Bearer {token}"
+
+    async def _ensure_token(self) -> None:
+        """Fetch the initial access token on first use"""
+        if self.token is not None or self.auth_provider is None:
+            return
+        async with self._token_lock:
+            # Concurrent first requests wait here for a single fetch
+            if self.token is None:
+                self._set_token(await self.auth_provider.get_token({"user_id": "system"}))
+
+    async def close(self) -> None:
+        """Close the underlying HTTP connection pool"""
+        await self._client.aclose()
+        logger.debug("D365 client connection pool closed")
+
+    async def __aenter__(self) -> "D365Client":
+        return self
+
+    async def __aexit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
+        await self.close()
 
     async def get_user_default_company(self) -> str:
         """
         Get the user's default company from configuration.
-        Caches the result to avoid repeated lookups.
+        Resolved once in __init__; prefer the user_default_company attribute internally.
         """
-        if self._user_default_company is not None:
-            return self._user_default_company
-
-        # Use configured default company
-        default_company = self.settings.dataareaid.lower()
-        self._user_default_company = default_company
-
-        logger.info("User default company set", company=default_company)
-        return default_company
+        return self.user_default_company
 
     async def refresh_token_if_needed(self) -> bool:
         """
@@ -56,7 +287,7 @@ class D365Client(ID365Client):
         try:
             new_token = await self.auth_provider.refresh_token_if_needed({"user_id": "system"})
             if new_token:
-                self.token = new_token
+                self._set_token(new_token)
                 logger.info("Token refreshed successfully")
                 return True
             return False
@@ -70,6 +301,10 @@ class D365Client(ID365Client):
         """
         Make an HTTP request with automatic token refresh on 401 errors.
         
+        Throttled (429) and unavailable (503) responses, plus 500/502/504 for
+        GET/HEAD, are retried up to MAX_BACKOFF_RETRIES times, honouring
+        Retry-After when D365 sends it.
+        
         Args:
             method: HTTP method (GET, POST, etc.)
             url: Request URL
@@ -79,41 +314,60 @@ class D365Client(ID365Client):
             HTTP response
             
         Raises:
-            httpx.HTTPStatusError: If request fails after token refresh attempt
+            httpx.HTTPStatusError: If request fails after token refresh and backoff retries
         """
-        # Extract timeout for client creation
-        timeout = kwargs.pop('timeout', 30.0)
+        # Per-request timeout override (the shared client defaults to 30s)
+        if 'timeout' in kwargs:
+            kwargs['timeout'] = httpx.Timeout(kwargs['timeout'])
         
-        # Ensure headers are set
-        if 'headers' not in kwargs:
-            kwargs['headers'] = {}
-        kwargs['headers']['Authorization'] = f"Bearer {self.token}"
+        # Caller headers override the cached defaults; without overrides the
+        # cached dict is sent as-is
+        extra_headers = kwargs.pop('headers', None)
         
-        max_retries = 2
-        for attempt in range(max_retries):
+        await self._ensure_token()
+        
+        token_refreshed = False
+        backoff_attempt = 0
+        request: Optional[httpx.Request] = None
+        while True:
+            # Build the request once and re-send it on backoff retries; only a
+            # token refresh (which resets it below) needs new headers
+            if request is None:
+                headers = {**self._headers, **extra_headers} if extra_headers else self._headers
+                request = self._client.build_request(method, url, headers=headers, **kwargs)
             try:
-                async with httpx.AsyncClient(timeout=timeout) as client:
-                    response = await client.request(method, url, **kwargs)
-                    response.raise_for_status()
-                    return response
+                response = await self._client.send(request)
+                response.raise_for_status()
+                return response
                     
             except httpx.HTTPStatusError as e:
-                if e.response.status_code == 401 and attempt < max_retries - 1:
-                    logger.warning("Received 401 Unauthorized, attempting token refresh", 
-                                 attempt=attempt + 1, max_retries=max_retries)
+                status_code = e.response.status_code
+                
+                if status_code == 401 and not token_refreshed:
+                    token_refreshed = True
+                    logger.warning("Received 401 Unauthorized, attempting token refresh")
                     
                     # Try to refresh token
                     if await self.refresh_token_if_needed():
-                        # Update authorization header with new token
-                        kwargs['headers']['Authorization'] = f"Bearer {self.token}"
+                        # Headers are rebuilt from the refreshed token on the next attempt
                         logger.info("Retrying request with refreshed token")
+                        request = None
                         continue
                     else:
                         logger.error("Token refresh failed, cannot retry request")
+                
+                elif self._is_retryable(method, status_code) and backoff_attempt < MAX_BACKOFF_RETRIES:
+                    delay = _retry_delay(e.response, backoff_attempt)
+                    backoff_attempt += 1
+                    logger.warning("D365 request throttled or unavailable, backing off",
+                                 method=method, url=url, status_code=status_code,
+                                 attempt=backoff_attempt, delay_seconds=round(delay, 2))
+                    await asyncio.sleep(delay)
+                    continue
                         
-                # Either not 401, max retries reached, or token refresh failed
+                # Not retryable, retries exhausted, or token refresh failed
                 logger.error("HTTP request failed", 
-                           method=method, url=url, status_code=e.response.status_code,
+                           method=method, url=url, status_code=status_code,
                            response_text=e.response.text)
                 raise
                 
@@ -121,6 +375,13 @@ class D365Client(ID365Client):
                 logger.error("Request error", method=method, url=url, error=str(e))
                 raise
 
+    @staticmethod
+    def _is_retryable(method: str, status_code: int) -> bool:
+        """Whether a failed response may be retried after backing off"""
+        if status_code in RETRY_STATUS_CODES:
+            return True
+        return status_code in IDEMPOTENT_RETRY_STATUS_CODES and method.upper() in ("GET", "HEAD")
+
     def determine_company_mode(self, query: str, user_default_company: str) -> CompanyMode:
         """
         Determine the company query mode based on the query parameters.
@@ -133,7 +394,7 @@ class D365Client(ID365Client):
             CompanyMode indicating how to handle company parameters
         """
         # Check if dataAreaId filter is present in the query
-        dataareaid_match = re.search(r"dataAreaId\s+eq\s+'([^']+)'", query, re.IGNORECASE)
+        dataareaid_match = _DATAAREA_MATCH_RE.search(query)
 
         if not dataareaid_match:
             # No dataAreaId filter = query all companies
@@ -159,56 +420,18 @@ class D365Client(ID365Client):
         """
         base_url = f"{self.resource}/data/{entity_name}"
 
-        # Ensure query starts with '?' if it has content
-        if query and not query.startswith("?"):
-            query = f"?{query}"
-        elif not query:
-            query = ""
-
-        if company_mode == "default":
-            # Default company: No cross-company, remove any existing dataAreaId filter
-            clean_query = re.sub(
-                r"[&?]?dataAreaId\s+eq\s+'[^']+'\s*[&]?", "", query, flags=re.IGNORECASE
-            )
-            clean_query = re.sub(r"[&]{2,}", "&", clean_query)
-            clean_query = re.sub(r"[?]&", "?", clean_query)
-            clean_query = clean_query.rstrip("&")
-            return f"{base_url}{clean_query}"
-
-        elif company_mode == "specific":
-            # Specific non-default company: Both cross-company=true AND dataAreaId filter
-            if "cross-company" not in query:
-                separator = "&" if "?" in query else "?"
-                query += f"{separator}cross-company=true"
-            return f"{base_url}{query}"
-
-        elif company_mode == "all":
-            # All companies: Only cross-company=true, remove any dataAreaId filter
-            clean_query = re.sub(
-                r"[&?]?dataAreaId\s+eq\s+'[^']+'\s*[&]?", "", query, flags=re.IGNORECASE
-            )
-            clean_query = re.sub(r"[&]{2,}", "&", clean_query)
-            clean_query = re.sub(r"[?]&", "?", clean_query)
-            clean_query = clean_query.rstrip("&")
-
-            # Ensure cross-company parameter is added
-            if "cross-company" not in clean_query:
-                separator = "&" if "?" in clean_query else "?"
-                clean_query += f"{separator}cross-company=true"
-            return f"{base_url}{clean_query}"
+        # Fast path for plain enumeration (no query to rewrite)
+        if not query:
+            if company_mode == "default":
+                return base_url
+            if company_mode in ("specific", "all"):
+                return f"{base_url}?cross-company=true"
 
-        else:
-            raise ValueError(f"Unknown company mode: {company_mode}")
+        return _build_query_url_cached(base_url, query, company_mode)
 
     def get_headers(self) -> Dict[str, str]:
-        """Get standard HTTP headers for D365 OData requests"""
-        return {
-            "Authorization": f"Bearer {self.token}",
-            "Accept": "application/json",
-            "Content-Type": "application/json",
-            "OData-MaxVersion": "4.0",
-            "OData-Version": "4.0",
-        }
+        """Get standard HTTP headers for D365 OData requests (shared dict, do not mutate)"""
+        return self._headers
 
     async def get_odata_entity(
         self, entity_name: str, query: str = "", company_mode: str = "auto"
@@ -224,7 +447,7 @@ class D365Client(ID365Client):
         Returns:
             JSON response from D365 OData API
         """
-        user_default_company = await self.get_user_default_company()
+        user_default_company = self.user_default_company
 
         # Determine company mode automatically if requested
         if company_mode == "auto":
@@ -244,7 +467,7 @@ class D365Client(ID365Client):
 
         try:
             response = await self.make_authenticated_request("GET", url)
-            result: Dict[str, Any] = response.json()
+            result: Dict[str, Any] = _json_loads(response.content)
 
             logger.info(
                 "D365 query successful",
@@ -266,6 +489,71 @@ class D365Client(ID365Client):
             logger.error("D365 query error", entity_name=entity_name, error=str(e))
             raise
 
+    async def batch_get(self, requests: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """
+        Execute several OData GET queries via $batch round-trips.
+
+        Requests are packed BATCH_CHUNK_SIZE per $batch POST, and the POSTs run
+        concurrently (bounded by the sync_concurrency setting).
+
+        Args:
+            requests: (entity_name, query) pairs, resolved with the same company
+                rules as get_odata_entity
+
+        Returns:
+            JSON responses in the same order as the requests
+        """
+        if not requests:
+            return []
+
+        user_default_company = self.user_default_company
+        urls = []
+        for entity_name, query in requests:
+            company_mode = self.determine_company_mode(query, user_default_company)
+            urls.append(self.build_query_url(entity_name, query, user_default_company, company_mode))
+
+        chunks = [urls[i:i + BATCH_CHUNK_SIZE] for i in range(0, len(urls), BATCH_CHUNK_SIZE)]
+
+        logger.info("Executing D365 batch query", request_count=len(urls), batch_count=len(chunks))
+
+        # Independent $batch POSTs overlap on the shared connection pool
+        chunk_results = await _gather_bounded(
+            (self._post_batch(chunk) for chunk in chunks),
+            limit=self.settings.sync_concurrency,
+        )
+        results = [result for chunk in chunk_results for result in chunk]
+
+        logger.info("D365 batch query successful", request_count=len(urls), response_count=len(results))
+
+        return results
+
+    async def _post_batch(self, urls: List[str]) -> List[Dict[str, Any]]:
+        """POST a single $batch request and parse its sub-responses"""
+        boundary = f"batch_{uuid.uuid4()}"
+        url = f"{self.resource}/data/$batch"
+
+        try:
+            response = await self.make_authenticated_request(
+                "POST", url,
+                content=_build_batch_body(boundary, urls),
+                headers={
+                    "Content-Type": f"multipart/mixed; boundary={boundary}",
+                    "Accept": "multipart/mixed",
+                },
+            )
+            return _parse_batch_response(response.headers.get("content-type", ""), response.text)
+
+        except httpx.HTTPStatusError as e:
+            logger.error(
+                "D365 batch query failed",
+                status_code=e.response.status_code,
+                response_text=e.response.text,
+            )
+            raise
+        except Exception as e:
+            logger.error("D365 batch query error", error=str(e))
+            raise
+
     async def create_odata_entity(
         self, entity_name: str, data: Dict[str, Any], company: Optional[str] = None
     ) -> Dict[str, Any]:
@@ -293,8 +581,10 @@ class D365Client(ID365Client):
         )
 
         try:
-            response = await self.make_authenticated_request("POST", url, json=data)
-            result: Dict[str, Any] = response.json()
+            response = await self.make_authenticated_request(
+                "POST", url, content=_json_dumps(data)
+            )
+            result: Dict[str, Any] = _json_loads(response.content)
 
             logger.info(
                 "D365 create successful",
@@ -316,12 +606,13 @@ class D365Client(ID365Client):
             logger.error("D365 create error", entity_name=entity_name, error=str(e))
             raise
 
-    async def list_odata_entities(self) -> str:
+    async def list_odata_entities(self) -> bytes:
         """
         Get D365 OData metadata XML.
 
         Returns:
-            Raw XML metadata from D365 OData service
+            Raw XML metadata bytes from D365 OData service (undecoded; XML
+            parsers read the encoding from the declaration)
         """
         url = f"{self.resource}/data/$metadata"
 
@@ -333,7 +624,7 @@ class D365Client(ID365Client):
                 headers={"Accept": "application/xml"},
                 timeout=60.0
             )
-            metadata_xml = response.text
+            metadata_xml = response.content
 
             logger.info("D365 metadata retrieved", size_bytes=len(metadata_xml))
 
@@ -350,6 +641,48 @@ class D365Client(ID365Client):
             logger.error("D365 metadata fetch error", error=str(e))
             raise
     
+    async def stream_metadata(self, chunk_size: int = 65536) -> AsyncIterator[bytes]:
+        """
+        Stream D365 OData metadata XML as raw bytes.
+
+        Lets the consumer feed an incremental XML parser while the download is
+        still in flight, without buffering or decoding the multi-MB document.
+
+        Yields:
+            Chunks of the metadata XML document
+        """
+        url = f"{self.resource}/data/$metadata"
+
+        logger.info("Streaming D365 metadata")
+        await self._ensure_token()
+
+        for attempt in range(2):
+            headers = {**self._headers, "Accept": "application/xml"}
+            async with self._client.stream(
+                "GET", url, headers=headers, timeout=httpx.Timeout(60.0)
+            ) as response:
+                if response.status_code == 401 and attempt == 0:
+                    logger.warning("Received 401 Unauthorized while streaming metadata, attempting token refresh")
+                    if await self.refresh_token_if_needed():
+                        continue
+
+                if response.is_error:
+                    await response.aread()
+                    logger.error(
+                        "D365 metadata stream failed",
+                        status_code=response.status_code,
+                        response_text=response.text,
+                    )
+                response.raise_for_status()
+
+                size_bytes = 0
+                async for chunk in response.aiter_bytes(chunk_size):
+                    size_bytes += len(chunk)
+                    yield chunk
+
+                logger.info("D365 metadata streamed", size_bytes=size_bytes)
+                return
+
     # Missing interface methods
     async def update_odata_entity(
         self,
@@ -407,6 +740,6 @@ class D365Client(ID365Client):
             "version": "1.0.0",
             "resource_url": self.resource,
             "default_company": self.settings.dataareaid,
-            "capabilities": ["get", "create", "list_metadata"],
+            "capabilities": ["get", "batch_get", "create", "list_metadata"],
             "planned_capabilities": ["update", "delete"]
         }
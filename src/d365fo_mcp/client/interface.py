@@ -5,7 +5,7 @@ Defines contract for D365 Finance & Operations clients
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional, Literal
+from typing import Dict, Any, Mapping, Optional, Literal, AsyncIterator
 
 
 CompanyMode = Literal["default", "specific", "all", "auto"]
@@ -117,17 +117,35 @@ class ID365Client(ABC):
         pass
     
     @abstractmethod
-    async def list_odata_entities(self) -> str:
+    async def list_odata_entities(self) -> bytes:
         """
         Get raw OData metadata XML.
         
         Returns:
-            Complete OData metadata document
+            Complete OData metadata document as raw bytes
         """
         pass
     
     @abstractmethod
-    def get_client_info(self) -> Dict[str, Any]:
+    def stream_metadata(self, chunk_size: int = 65536) -> AsyncIterator[bytes]:
+        """
+        Stream raw OData metadata XML without buffering the whole document.
+        
+        Args:
+            chunk_size: Preferred chunk size in bytes
+            
+        Returns:
+            Async iterator over XML byte chunks
+        """
+        pass
+    
+    @abstractmethod
+    async def close(self) -> None:
+        """Close client connections and cleanup"""
+        pass
+    
+    @abstractmethod
+    def get_client_info(self) -> Mapping[str, Any]:
         """
         Get client implementation information.
         
@@ -3,10 +3,32 @@ Configuration management for D365FO MCP Server
 """
 
 import os
+from collections.abc import Mapping
+from functools import cached_property, lru_cache
 from pathlib import Path
-from typing import Optional, Literal
+from typing import Any, Dict, Literal, Optional
+import structlog
+from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+logger = structlog.get_logger(__name__)
+
+# Values read by load_dotenv_if_exists(); None until the first call
+_dotenv_values: Optional[Dict[str, Optional[str]]] = None
+# Set once the .env file is loaded; child processes inherit both the values and
+# this marker, so they skip the directory search entirely
+DOTENV_LOADED_ENV = "D365FO_MCP_DOTENV_LOADED"
+
+
+def _default_database_path() -> str:
+    """<repo root>/data/d365fo-mcp.db, used when DATABASE_PATH is not set"""
+    return str(Path(__file__).resolve().parents[2] / 'data' / 'd365fo-mcp.db')
+
+
+def _default_token_cache_path() -> str:
+    """~/.d365fo-mcp/token_cache.json, resolved when Settings is instantiated"""
+    return str(Path.home() / '.d365fo-mcp' / 'token_cache.json')
+
 
 class Settings(BaseSettings):
     """Application settings loaded from environment variables"""
@@ -19,8 +41,12 @@ class Settings(BaseSettings):
 
     # Optional Configuration
     dataareaid: str = "usmf"
-    database_path: str = os.getenv('DATABASE_PATH', str(Path(__file__).parent.parent.parent / 'data' / 'd365fo-mcp.db'))
+    database_path: str = Field(default_factory=_default_database_path)
     metadata_cache_hours: int = 24
+    sync_concurrency: int = 16
+    sqlite_read_connections: int = 2
+    sqlite_checkpoint_every: int = 500  # 0 leaves WAL checkpoints to SQLite
+    token_cache_path: str = Field(default_factory=_default_token_cache_path)  # empty disables
     log_level: str = "info"
 
     # Development Settings
@@ -37,63 +63,86 @@ class Settings(BaseSettings):
     supabase_url: Optional[str] = None
     supabase_key: Optional[str] = None
 
+    # Frozen: the settings singleton is shared process-wide and never mutated.
+    # cached_property still works because it writes straight to the instance
+    # __dict__; model_copy() drops those cached values from the copy.
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
-        case_sensitive=False
+        case_sensitive=False,
+        frozen=True,
+        extra="ignore",
+        validate_assignment=False,
     )
 
-    @property
+    def model_copy(self, *, update: Mapping[str, Any] | None = None, deep: bool = False) -> "Settings":
+        """Copy the settings; derived values are recomputed from the copy's fields"""
+        copied = super().model_copy(update=update, deep=deep)
+        for name in _DERIVED_PROPERTIES:
+            copied.__dict__.pop(name, None)
+        return copied
+
+    @cached_property
     def database_path_resolved(self) -> Path:
-        """Get resolved database path"""
+        """Get resolved database path (resolved once per Settings instance)"""
         return Path(self.database_path).resolve()
 
-    @property
+    @cached_property
     def d365_resource_url(self) -> str:
         """Get D365 resource URL"""
         return self.d365_base_url.rstrip('/')
 
 
-# Global settings instance
-_settings: Optional[Settings] = None
+# Settings cached_properties, whose values model_copy() must not carry over
+_DERIVED_PROPERTIES = ("database_path_resolved", "d365_resource_url")
 
 
+@lru_cache(maxsize=1)
 def get_settings() -> Settings:
-    """Get application settings singleton"""
-    global _settings
-    if _settings is None:
-        # Ensure .env is loaded before creating settings
-        load_dotenv_if_exists()
-        
-        # Debug environment variables
-        import structlog
-        logger = structlog.get_logger(__name__)
-        logger.info("Environment variables", 
-                   database_path=os.getenv('DATABASE_PATH'),
-                   d365_base_url=os.getenv('D365_BASE_URL'),
-                   cwd=os.getcwd())
-        
-        try:
-            _settings = Settings()  # type: ignore[call-arg]
-            logger.info("Settings loaded", database_path=_settings.database_path)
-        except Exception:
-            # Re-raise with more context
-            raise ValueError("Required environment variables missing. Check your .env file.")
-    return _settings
-
-
-def load_dotenv_if_exists() -> None:
-    """Load .env file if it exists"""
-    from dotenv import load_dotenv
-
-    env_path = Path(".env")
-    if env_path.exists():
-        load_dotenv(env_path)
-    else:
-        # Try to load from parent directories
-        current = Path.cwd()
-        for parent in [current] + list(current.parents):
-            env_path = parent / ".env"
-            if env_path.exists():
-                load_dotenv(env_path)
-                break
+    """Get application settings singleton (built on first call; see get_settings.cache_clear())"""
+    # Ensure .env is loaded before creating settings
+    load_dotenv_if_exists()
+    
+    # Debug environment variables
+    logger.info("Environment variables", 
+               database_path=os.getenv('DATABASE_PATH'),
+               d365_base_url=os.getenv('D365_BASE_URL'),
+               cwd=os.getcwd())
+    
+    try:
+        settings = Settings()  # type: ignore[call-arg]
+        logger.info("Settings loaded", database_path=settings.database_path)
+    except Exception:
+        # Re-raise with more context
+        raise ValueError("Required environment variables missing. Check your .env file.")
+    return settings
+
+
+def load_dotenv_if_exists() -> Dict[str, Optional[str]]:
+    """
+    Load the nearest .env file (searching upwards from the cwd) into os.environ.
+    
+    Existing environment variables win. The file is only located and read once
+    per process; later calls return the values loaded by the first call, and
+    child processes that inherited the loaded environment skip the search.
+    """
+    global _dotenv_values
+    if _dotenv_values is not None:
+        return _dotenv_values
+    
+    if os.environ.get(DOTENV_LOADED_ENV):
+        _dotenv_values = {}
+        return _dotenv_values
+    
+    from dotenv import dotenv_values, find_dotenv
+    
+    # find_dotenv walks str paths with os.path.isfile: one stat per directory
+    # up to the first hit, no Path objects
+    path = find_dotenv(usecwd=True)
+    _dotenv_values = dotenv_values(path) if path else {}
+    for key, value in _dotenv_values.items():
+        if value is not None:
+            os.environ.setdefault(key, value)
+    if path:
+        os.environ[DOTENV_LOADED_ENV] = path
+    return _dotenv_values
@@ -4,22 +4,40 @@ Dependency Injection Container
 Centralized dependency resolution for clean separation of concerns.
 """
 
-from typing import Dict, Any, Optional
+import asyncio
+from dataclasses import dataclass, fields
+from types import MappingProxyType
+from typing import Dict, Any, Awaitable, Callable, List, Mapping, Optional, TYPE_CHECKING
 import structlog
 
 from .config import Settings, get_settings
 from .factories import AuthProviderFactory, ClientFactory, RepositoryFactory, ServiceFactory
-from .services.metadata import IMetadataService
-from .services.instructions import IInstructionsService
-from .auth.interface import IAuthProvider
-from .client.interface import ID365Client
-from .repositories.metadata import IMetadataRepository
-from .repositories.instructions import IInstructionsRepository
-from .repositories.sqlite.database import Database
+
+if TYPE_CHECKING:
+    from .services.metadata import IMetadataService
+    from .services.instructions import IInstructionsService
+    from .auth.interface import IAuthProvider
+    from .client.interface import ID365Client
+    from .repositories.metadata import IMetadataRepository
+    from .repositories.instructions import IInstructionsRepository
+    from .repositories.sqlite.database import Database
 
 logger = structlog.get_logger(__name__)
 
 
+@dataclass(slots=True)
+class _ServiceCache:
+    """Slot per managed dependency, in construction order (None until created)"""
+    
+    database: Optional["Database"] = None
+    auth_provider: Optional["IAuthProvider"] = None
+    d365_client: Optional["ID365Client"] = None
+    metadata_repository: Optional["IMetadataRepository"] = None
+    instructions_repository: Optional["IInstructionsRepository"] = None
+    metadata_service: Optional["IMetadataService"] = None
+    instructions_service: Optional["IInstructionsService"] = None
+
+
 class DIContainer:
     """
     Dependency Injection Container for managing service dependencies.
@@ -30,8 +48,18 @@ class DIContainer:
     
     def __init__(self, settings: Optional[Settings] = None):
         self.settings = settings or get_settings()
-        self._services: Dict[str, Any] = {}
+        self._cache = _ServiceCache()
+        # close() callables of created dependencies, in creation order
+        self._closers: List[Callable[[], Awaitable[None]]] = []
         self._initialized = False
+        # Settings are frozen, so this part of get_container_info() never changes
+        self._settings_info: Mapping[str, Any] = MappingProxyType({
+            "auth_provider": self.settings.auth_provider,
+            "d365_client": self.settings.d365_client,
+            "metadata_repository": self.settings.metadata_repository,
+            "instructions_repository": self.settings.instructions_repository,
+            "database_path": str(self.settings.database_path_resolved)
+        })
         
         logger.info("DI Container initialized", 
                    auth_provider=self.settings.auth_provider,
@@ -39,84 +67,105 @@ class DIContainer:
                    metadata_repo=self.settings.metadata_repository,
                    instructions_repo=self.settings.instructions_repository)
     
-    async def initialize(self) -> None:
-        """Initialize all async dependencies"""
+    async def initialize(self, warm: bool = True) -> None:
+        """
+        Initialize all async dependencies.
+        
+        Args:
+            warm: Also build the auth provider and D365 client, overlapping
+                their setup with the repository schema bootstrap
+        """
         if self._initialized:
             return
         
-        # Initialize repositories first (they create database schemas)
-        await self.get_metadata_repository()
-        await self.get_instructions_repository()
+        # Both repositories share one Database; create it up front
+        self.get_database()
+        
+        # Repositories create the database schemas; the bootstraps are
+        # independent and idempotent, so run them together
+        pending = [self.get_metadata_repository(), self.get_instructions_repository()]
+        if warm:
+            pending.append(self.get_d365_client())
+        # (asyncio.TaskGroup would need Python 3.11; the package supports 3.10)
+        await asyncio.gather(*pending)
         
         self._initialized = True
-        logger.info("DI Container fully initialized")
+        logger.info("DI Container fully initialized", warmed_client=warm)
     
     async def close(self) -> None:
         """Clean up all dependencies"""
-        # Close services
-        if 'metadata_service' in self._services:
-            await self._services['metadata_service'].close()
-        if 'instructions_service' in self._services:
-            await self._services['instructions_service'].close()
-        
-        # Close repositories
-        if 'metadata_repository' in self._services:
-            await self._services['metadata_repository'].close()
-        if 'instructions_repository' in self._services:
-            await self._services['instructions_repository'].close()
-        
-        # Close database
-        if 'database' in self._services:
-            await self._services['database'].close()
+        # LIFO: dependents are closed before what they were built on
+        while self._closers:
+            closer = self._closers.pop()
+            try:
+                await closer()
+            except Exception:
+                logger.exception("Failed to close dependency",
+                                 dependency=type(getattr(closer, '__self__', closer)).__name__)
         
         logger.info("DI Container closed")
     
+    def _register(self, obj: Any) -> None:
+        """Track obj.close() so close() releases it"""
+        closer = getattr(obj, 'close', None)
+        if closer is not None:
+            self._closers.append(closer)
+    
     # Core Dependencies
-    def get_database(self) -> Database:
+    def get_database(self) -> "Database":
         """Get database instance (lazy initialization)"""
-        if 'database' not in self._services:
-            self._services['database'] = Database(self.settings.database_path_resolved)
+        if self._cache.database is None:
+            self._cache.database = RepositoryFactory.create_database(self.settings)
+            self._register(self._cache.database)
             logger.debug("Database instance created")
-        return self._services['database']
+        return self._cache.database
     
-    def get_auth_provider(self) -> IAuthProvider:
+    def get_auth_provider(self) -> "IAuthProvider":
         """Get auth provider instance (lazy initialization)"""
-        if 'auth_provider' not in self._services:
-            self._services['auth_provider'] = AuthProviderFactory.create(self.settings)
+        if self._cache.auth_provider is None:
+            self._cache.auth_provider = AuthProviderFactory.create(self.settings)
+            self._register(self._cache.auth_provider)
             logger.debug("Auth provider created", type=self.settings.auth_provider)
-        return self._services['auth_provider']
+        return self._cache.auth_provider
     
-    async def get_d365_client(self) -> ID365Client:
+    async def get_d365_client(self) -> "ID365Client":
         """Get D365 client instance (lazy initialization)"""
-        if 'd365_client' not in self._services:
+        if self._cache.d365_client is None:
             auth_provider = self.get_auth_provider()
-            self._services['d365_client'] = await ClientFactory.create(self.settings, auth_provider)
+            self._cache.d365_client = await ClientFactory.create(self.settings, auth_provider)
+            self._register(self._cache.d365_client)
             logger.debug("D365 client created", type=self.settings.d365_client)
-        return self._services['d365_client']
+        return self._cache.d365_client
     
     # Repositories
-    async def get_metadata_repository(self) -> IMetadataRepository:
+    async def get_metadata_repository(self) -> "IMetadataRepository":
         """Get metadata repository instance (lazy initialization)"""
-        if 'metadata_repository' not in self._services:
-            repository = RepositoryFactory.create_metadata_repository(self.settings)
+        if self._cache.metadata_repository is None:
+            repository = RepositoryFactory.create_metadata_repository(
+                self.settings, self.get_database()
+            )
             await repository.initialize()
-            self._services['metadata_repository'] = repository
+            self._cache.metadata_repository = repository
+            self._register(repository)
             logger.debug("Metadata repository created and initialized")
-        return self._services['metadata_repository']
+        return self._cache.metadata_repository
     
-    async def get_instructions_repository(self) -> IInstructionsRepository:
+    async def get_instructions_repository(self) -> "IInstructionsRepository":
         """Get instructions repository instance (lazy initialization)"""
-        if 'instructions_repository' not in self._services:
-            repository = RepositoryFactory.create_instructions_repository(self.settings)
+        if self._cache.instructions_repository is None:
+            repository = RepositoryFactory.create_instructions_repository(
+                self.settings, self.get_database()
+            )
             await repository.initialize()
-            self._services['instructions_repository'] = repository
+            self._cache.instructions_repository = repository
+            self._register(repository)
             logger.debug("Instructions repository created and initialized")
-        return self._services['instructions_repository']
+        return self._cache.instructions_repository
     
     # Services
-    async def get_metadata_service(self, enable_background_sync: bool = False) -> IMetadataService:
+    async def get_metadata_service(self, enable_background_sync: bool = False) -> "IMetadataService":
         """Get metadata service instance (lazy initialization)"""
-        if 'metadata_service' not in self._services:
+        if self._cache.metadata_service is None:
             metadata_repository = await self.get_metadata_repository()
             d365_client = await self.get_d365_client()
             
@@ -130,32 +179,30 @@ class DIContainer:
                 database=database
             )
             await service.initialize()
-            self._services['metadata_service'] = service
+            self._cache.metadata_service = service
+            self._register(service)
             logger.debug("Metadata service created and initialized", 
                         background_sync=enable_background_sync)
-        return self._services['metadata_service']
+        return self._cache.metadata_service
     
-    async def get_instructions_service(self) -> IInstructionsService:
+    async def get_instructions_service(self) -> "IInstructionsService":
         """Get instructions service instance (lazy initialization)"""
-        if 'instructions_service' not in self._services:
+        if self._cache.instructions_service is None:
             instructions_repository = await self.get_instructions_repository()
             service = ServiceFactory.create_instructions_service(instructions_repository)
             await service.initialize()
-            self._services['instructions_service'] = service
+            self._cache.instructions_service = service
+            self._register(service)
             logger.debug("Instructions service created and initialized")
-        return self._services['instructions_service']
+        return self._cache.instructions_service
     
     # Service Info
     def get_container_info(self) -> Dict[str, Any]:
         """Get container status and dependency information"""
         return {
             "initialized": self._initialized,
-            "cached_services": list(self._services.keys()),
-            "settings": {
-                "auth_provider": self.settings.auth_provider,
-                "d365_client": self.settings.d365_client,
-                "metadata_repository": self.settings.metadata_repository,
-                "instructions_repository": self.settings.instructions_repository,
-                "database_path": str(self.settings.database_path_resolved)
-            }
+            "cached_services": [
+                field.name for field in fields(self._cache) if getattr(self._cache, field.name) is not None
+            ],
+            "settings": self._settings_info
         }
@@ -4,11 +4,12 @@ Authentication Provider Factory
 Creates auth provider instances based on configuration.
 """
 
-from typing import Dict, Any
+from types import MappingProxyType
+from typing import Dict, Any, Callable, ClassVar, Mapping
 import structlog
 
 from ..config import Settings
-from ..auth import IAuthProvider, D365AuthManager
+from ..auth import IAuthProvider
 
 logger = structlog.get_logger(__name__)
 
@@ -16,8 +17,15 @@ logger = structlog.get_logger(__name__)
 class MockAuthProvider(IAuthProvider):
     """Mock auth provider for testing"""
     
+    MOCK_TOKEN: ClassVar[str] = "mock_bearer_token_12345"
+    _INFO: ClassVar[Mapping[str, Any]] = MappingProxyType({
+        "type": "mock",
+        "mock_token": MOCK_TOKEN[:20] + "...",
+        "status": "active"
+    })
+    
     def __init__(self):
-        self.mock_token = "mock_bearer_token_12345"
+        self.mock_token = self.MOCK_TOKEN
     
     async def validate_credentials(self) -> bool:
         """Always returns True for mock"""
@@ -31,13 +39,26 @@ class MockAuthProvider(IAuthProvider):
         """Returns same mock token"""
         return self.mock_token
     
-    def get_provider_info(self) -> Dict[str, Any]:
-        """Returns mock provider info"""
-        return {
-            "type": "mock",
-            "mock_token": self.mock_token[:20] + "...",
-            "status": "active"
-        }
+    def get_provider_info(self) -> Mapping[str, Any]:
+        """Returns mock provider info (shared read-only view)"""
+        return self._INFO
+
+
+def _create_azure_ad_provider(settings: Settings) -> IAuthProvider:
+    from ..auth.d365_auth import D365AuthManager
+
+    return D365AuthManager()
+
+
+def _create_mock_provider(settings: Settings) -> IAuthProvider:
+    return MockAuthProvider()
+
+
+# Provider type -> constructor
+_AUTH_PROVIDERS: Dict[str, Callable[[Settings], IAuthProvider]] = {
+    "azure_ad": _create_azure_ad_provider,
+    "mock": _create_mock_provider,
+}
 
 
 class AuthProviderFactory:
@@ -61,14 +82,12 @@ class AuthProviderFactory:
         
         logger.info("Creating auth provider", provider_type=provider_type)
         
-        if provider_type == "azure_ad":
-            return D365AuthManager()
-        elif provider_type == "mock":
-            return MockAuthProvider()
-        else:
+        factory = _AUTH_PROVIDERS.get(provider_type)
+        if factory is None:
             raise ValueError(f"Unsupported auth provider: {provider_type}")
+        return factory(settings)
     
     @staticmethod
     def get_available_providers() -> list[str]:
         """Get list of available auth provider types"""
-        return ["azure_ad", "mock"]
\ No newline at end of file
+        return list(_AUTH_PROVIDERS)
\ No newline at end of file
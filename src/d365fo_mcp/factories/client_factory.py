@@ -4,22 +4,52 @@ D365 Client Factory
 Creates client instances based on configuration.
 """
 
-from typing import Dict, Any, Optional
+from types import MappingProxyType
+from typing import Dict, Any, Mapping, Optional, AsyncIterator, Awaitable, Callable, ClassVar
 import structlog
 
 from ..config import Settings
 from ..auth import IAuthProvider
-from ..client import ID365Client, D365Client
+from ..client import ID365Client
 
 logger = structlog.get_logger(__name__)
 
+_MOCK_METADATA_XML = b'''<?xml version="1.0" encoding="utf-8"?>
+<edmx:Edmx Version="4.0" xmlns:edmx="http://docs.oasis-open.org/odata/ns/edmx">
+  <edmx:DataServices>
+    <Schema Namespace="MockService" xmlns="http://docs.oasis-open.org/odata/ns/edm">
+      <EntityContainer Name="Container">
+        <EntitySet Name="MockEntities" EntityType="MockService.MockEntity"/>
+      </EntityContainer>
+      <EntityType Name="MockEntity">
+        <Key>
+          <PropertyRef Name="id"/>
+        </Key>
+        <Property Name="id" Type="Edm.String" Nullable="false"/>
+        <Property Name="Name" Type="Edm.String"/>
+      </EntityType>
+    </Schema>
+  </edmx:DataServices>
+</edmx:Edmx>'''
+
+# Record ids returned by MockD365Client.get_odata_entity
+_MOCK_RECORD_IDS = ("1", "2")
+
 
 class MockD365Client(ID365Client):
     """Mock D365 client for testing"""
     
+    DEFAULT_COMPANY: ClassVar[str] = "MOCK"
+    _CLIENT_INFO: ClassVar[Mapping[str, Any]] = MappingProxyType({
+        "type": "mock_client",
+        "version": "1.0.0",
+        "capabilities": ("get", "create", "update", "delete", "list_metadata"),
+        "default_company": DEFAULT_COMPANY
+    })
+    
     def __init__(self, auth_provider: IAuthProvider):
         self.auth_provider = auth_provider
-        self.default_company = "MOCK"
+        self.default_company = self.DEFAULT_COMPANY
     
     async def get_user_default_company(self) -> str:
         """Returns mock company"""
@@ -37,14 +67,13 @@ class MockD365Client(ID365Client):
         dataareaid: Optional[str] = None,
     ) -> Dict[str, Any]:
         """Returns mock entity data"""
+        company = dataareaid or self.default_company
+        # Apply simple top filtering
+        record_ids = _MOCK_RECORD_IDS[:top] if top else _MOCK_RECORD_IDS
         mock_records = [
-            {"id": "1", "Name": f"Mock {entity_name} 1", "dataAreaId": dataareaid or self.default_company},
-            {"id": "2", "Name": f"Mock {entity_name} 2", "dataAreaId": dataareaid or self.default_company},
+            {"id": record_id, "Name": f"Mock {entity_name} {record_id}", "dataAreaId": company}
+            for record_id in record_ids
         ]
-        
-        # Apply simple top filtering
-        if top:
-            mock_records = mock_records[:top]
             
         result = {
             "value": mock_records,
@@ -93,34 +122,42 @@ class MockD365Client(ID365Client):
         """Returns True for mock deletion"""
         return True
     
-    async def list_odata_entities(self) -> str:
+    async def list_odata_entities(self) -> bytes:
         """Returns mock metadata XML"""
-        return f'''<?xml version="1.0" encoding="utf-8"?>
-<edmx:Edmx Version="4.0" xmlns:edmx="http://docs.oasis-open.org/odata/ns/edmx">
-  <edmx:DataServices>
-    <Schema Namespace="MockService" xmlns="http://docs.oasis-open.org/odata/ns/edm">
-      <EntityContainer Name="Container">
-        <EntitySet Name="MockEntities" EntityType="MockService.MockEntity"/>
-      </EntityContainer>
-      <EntityType Name="MockEntity">
-        <Key>
-          <PropertyRef Name="id"/>
-        </Key>
-        <Property Name="id" Type="Edm.String" Nullable="false"/>
-        <Property Name="Name" Type="Edm.String"/>
-      </EntityType>
-    </Schema>
-  </edmx:DataServices>
-</edmx:Edmx>'''
+        return _MOCK_METADATA_XML
     
-    def get_client_info(self) -> Dict[str, Any]:
-        """Returns mock client info"""
-        return {
-            "type": "mock_client",
-            "version": "1.0.0",
-            "capabilities": ["get", "create", "update", "delete", "list_metadata"],
-            "default_company": self.default_company
-        }
+    async def stream_metadata(self, chunk_size: int = 65536) -> AsyncIterator[bytes]:
+        """Streams mock metadata XML"""
+        metadata = await self.list_odata_entities()
+        for start in range(0, len(metadata), chunk_size):
+            yield metadata[start:start + chunk_size]
+    
+    async def close(self) -> None:
+        """Nothing to release for mock"""
+        pass
+    
+    def get_client_info(self) -> Mapping[str, Any]:
+        """Returns mock client info (shared read-only view)"""
+        return self._CLIENT_INFO
+
+
+async def _create_odata_client(settings: Settings, auth_provider: IAuthProvider) -> ID365Client:
+    from ..client.d365_client import D365Client
+
+    # The client fetches its token on the first request, keeping the Azure AD
+    # round-trip off server startup
+    return D365Client(auth_provider=auth_provider)
+
+
+async def _create_mock_client(settings: Settings, auth_provider: IAuthProvider) -> ID365Client:
+    return MockD365Client(auth_provider)
+
+
+# Client type -> async constructor
+_CLIENTS: Dict[str, Callable[[Settings, IAuthProvider], Awaitable[ID365Client]]] = {
+    "odata": _create_odata_client,
+    "mock": _create_mock_client,
+}
 
 
 class ClientFactory:
@@ -131,6 +168,9 @@ class ClientFactory:
         """
         Create D365 client based on configuration.
         
+        The caller owns the returned client and must ``await client.close()``
+        to release its HTTP connection pool.
+        
         Args:
             settings: Application settings
             auth_provider: Configured auth provider
@@ -145,16 +185,12 @@ class ClientFactory:
         
         logger.info("Creating D365 client", client_type=client_type)
         
-        if client_type == "odata":
-            # Get token for the OData client
-            token = await auth_provider.get_token({"user_id": "system"})
-            return D365Client(token, auth_provider)
-        elif client_type == "mock":
-            return MockD365Client(auth_provider)
-        else:
+        factory = _CLIENTS.get(client_type)
+        if factory is None:
             raise ValueError(f"Unsupported D365 client: {client_type}")
+        return await factory(settings, auth_provider)
     
     @staticmethod
     def get_available_clients() -> list[str]:
         """Get list of available client types"""
-        return ["odata", "mock"]
\ No newline at end of file
+        return list(_CLIENTS)
\ No newline at end of file
@@ -4,28 +4,74 @@ Repository Factory
 Creates repository instances based on configuration.
 """
 
-from typing import Union
+from typing import Callable, Dict, Optional, Union, TYPE_CHECKING
 from pathlib import Path
 import structlog
 
 from ..config import Settings
 from ..repositories.metadata import IMetadataRepository
 from ..repositories.instructions import IInstructionsRepository
-from ..repositories.sqlite import SQLiteMetadataRepository, SQLiteInstructionsRepository
+
+if TYPE_CHECKING:
+    from ..repositories.sqlite.database import Database
 
 logger = structlog.get_logger(__name__)
 
 
+def _create_sqlite_metadata_repository(settings: Settings, database: Optional["Database"]) -> IMetadataRepository:
+    from ..repositories.sqlite.metadata_repository import SQLiteMetadataRepository
+
+    return SQLiteMetadataRepository(database if database is not None else settings.database_path_resolved)
+
+
+def _create_supabase_metadata_repository(settings: Settings, database: Optional["Database"]) -> IMetadataRepository:
+    # TODO: Implement SupabaseMetadataRepository
+    # if not settings.supabase_url or not settings.supabase_key:
+    #     raise ValueError("Supabase configuration missing (supabase_url, supabase_key)")
+    # return SupabaseMetadataRepository(settings.supabase_url, settings.supabase_key)
+    raise NotImplementedError("Supabase metadata repository not yet implemented")
+
+
+def _create_sqlite_instructions_repository(settings: Settings, database: Optional["Database"]) -> IInstructionsRepository:
+    from ..repositories.sqlite.instructions_repository import SQLiteInstructionsRepository
+
+    return SQLiteInstructionsRepository(database if database is not None else settings.database_path_resolved)
+
+
+def _create_supabase_instructions_repository(settings: Settings, database: Optional["Database"]) -> IInstructionsRepository:
+    # TODO: Implement SupabaseInstructionsRepository
+    # if not settings.supabase_url or not settings.supabase_key:
+    #     raise ValueError("Supabase configuration missing (supabase_url, supabase_key)")
+    # return SupabaseInstructionsRepository(settings.supabase_url, settings.supabase_key)
+    raise NotImplementedError("Supabase instructions repository not yet implemented")
+
+
+# Repository type -> constructor
+_METADATA_REPOSITORIES: Dict[str, Callable[[Settings, Optional["Database"]], IMetadataRepository]] = {
+    "sqlite": _create_sqlite_metadata_repository,
+    "supabase": _create_supabase_metadata_repository,
+}
+
+_INSTRUCTIONS_REPOSITORIES: Dict[str, Callable[[Settings, Optional["Database"]], IInstructionsRepository]] = {
+    "sqlite": _create_sqlite_instructions_repository,
+    "supabase": _create_supabase_instructions_repository,
+}
+
+
 class RepositoryFactory:
     """Factory for creating repository instances"""
     
     @staticmethod
-    def create_metadata_repository(settings: Settings) -> IMetadataRepository:
+    def create_metadata_repository(
+        settings: Settings, database: Optional["Database"] = None
+    ) -> IMetadataRepository:
         """
         Create metadata repository based on configuration.
         
         Args:
             settings: Application settings
+            database: Shared SQLite database; when omitted a SQLite repository
+                opens its own connection to settings.database_path_resolved
             
         Returns:
             Configured metadata repository instance
@@ -37,24 +83,22 @@ class RepositoryFactory:
         
         logger.info("Creating metadata repository", repository_type=repo_type)
         
-        if repo_type == "sqlite":
-            return SQLiteMetadataRepository(settings.database_path_resolved)
-        elif repo_type == "supabase":
-            # TODO: Implement SupabaseMetadataRepository
-            # if not settings.supabase_url or not settings.supabase_key:
-            #     raise ValueError("Supabase configuration missing (supabase_url, supabase_key)")
-            # return SupabaseMetadataRepository(settings.supabase_url, settings.supabase_key)
-            raise NotImplementedError("Supabase metadata repository not yet implemented")
-        else:
+        factory = _METADATA_REPOSITORIES.get(repo_type)
+        if factory is None:
             raise ValueError(f"Unsupported metadata repository: {repo_type}")
+        return factory(settings, database)
     
     @staticmethod
-    def create_instructions_repository(settings: Settings) -> IInstructionsRepository:
+    def create_instructions_repository(
+        settings: Settings, database: Optional["Database"] = None
+    ) -> IInstructionsRepository:
         """
         Create instructions repository based on configuration.
         
         Args:
             settings: Application settings
+            database: Shared SQLite database; when omitted a SQLite repository
+                opens its own connection to settings.database_path_resolved
             
         Returns:
             Configured instructions repository instance
@@ -66,21 +110,26 @@ class RepositoryFactory:
         
         logger.info("Creating instructions repository", repository_type=repo_type)
         
-        if repo_type == "sqlite":
-            return SQLiteInstructionsRepository(settings.database_path_resolved)
-        elif repo_type == "supabase":
-            # TODO: Implement SupabaseInstructionsRepository
-            # if not settings.supabase_url or not settings.supabase_key:
-            #     raise ValueError("Supabase configuration missing (supabase_url, supabase_key)")
-            # return SupabaseInstructionsRepository(settings.supabase_url, settings.supabase_key)
-            raise NotImplementedError("Supabase instructions repository not yet implemented")
-        else:
+        factory = _INSTRUCTIONS_REPOSITORIES.get(repo_type)
+        if factory is None:
             raise ValueError(f"Unsupported instructions repository: {repo_type}")
+        return factory(settings, database)
+    
+    @staticmethod
+    def create_database(settings: Settings) -> "Database":
+        """Create the SQLite database shared by the SQLite repositories"""
+        from ..repositories.sqlite.database import DatabasePool
+
+        return DatabasePool(
+            settings.database_path_resolved,
+            readers=settings.sqlite_read_connections,
+            checkpoint_every=settings.sqlite_checkpoint_every,
+        )
     
     @staticmethod
     def get_available_repositories() -> dict[str, list[str]]:
         """Get list of available repository types"""
         return {
-            "metadata": ["sqlite", "supabase"],
-            "instructions": ["sqlite", "supabase"]
+            "metadata": list(_METADATA_REPOSITORIES),
+            "instructions": list(_INSTRUCTIONS_REPOSITORIES)
         }
\ No newline at end of file
@@ -5,14 +5,15 @@ Creates service instances using repository dependencies.
 """
 
 import structlog
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
 
-from ..services.metadata import IMetadataService, MetadataService, BackgroundMetadataSync
-from ..services.instructions import IInstructionsService, InstructionsService
-from ..repositories.metadata import IMetadataRepository
-from ..repositories.instructions import IInstructionsRepository
-from ..client import ID365Client
-from ..repositories.sqlite.database import Database
+if TYPE_CHECKING:
+    from ..services.metadata import IMetadataService
+    from ..services.instructions import IInstructionsService
+    from ..repositories.metadata import IMetadataRepository
+    from ..repositories.instructions import IInstructionsRepository
+    from ..client import ID365Client
+    from ..repositories.sqlite.database import Database
 
 logger = structlog.get_logger(__name__)
 
@@ -22,11 +23,11 @@ class ServiceFactory:
     
     @staticmethod
     def create_metadata_service(
-        metadata_repository: IMetadataRepository,
-        d365_client: ID365Client,
+        metadata_repository: "IMetadataRepository",
+        d365_client: "ID365Client",
         enable_background_sync: bool = False,
-        database: Optional[Database] = None
-    ) -> IMetadataService:
+        database: Optional["Database"] = None
+    ) -> "IMetadataService":
         """
         Create metadata service with repository dependency.
         
@@ -39,10 +40,14 @@ class ServiceFactory:
         Returns:
             Configured metadata service instance
         """
+        from ..services.metadata.service import MetadataService
+        
         logger.info("Creating metadata service", background_sync=enable_background_sync)
         
         background_sync = None
         if enable_background_sync and database:
+            from ..services.metadata.background_sync import BackgroundMetadataSync
+            
             logger.info("Enabling background metadata sync")
             background_sync = BackgroundMetadataSync(database, d365_client)
         
@@ -50,8 +55,8 @@ class ServiceFactory:
     
     @staticmethod
     def create_instructions_service(
-        instructions_repository: IInstructionsRepository
-    ) -> IInstructionsService:
+        instructions_repository: "IInstructionsRepository"
+    ) -> "IInstructionsService":
         """
         Create instructions service with repository dependency.
         
@@ -61,5 +66,7 @@ class ServiceFactory:
         Returns:
             Configured instructions service instance
         """
+        from ..services.instructions.service import InstructionsService
+        
         logger.info("Creating instructions service")
         return InstructionsService(instructions_repository)
\ No newline at end of file
@@ -4,10 +4,10 @@ D365FO MCP Server
 Main entry point for the simplified D365 Finance & Operations MCP server.
 """
 
-import argparse
 import asyncio
+import sys
 from pathlib import Path
-from typing import Optional
+from typing import List, NamedTuple, Optional
 import structlog
 from fastmcp import FastMCP
 
@@ -15,64 +15,89 @@ from .config import load_dotenv_if_exists
 from .server_factory import ServerFactory, ServerValidator
 
 
-# Configure structured logging
-structlog.configure(
-    processors=[
-        structlog.stdlib.filter_by_level,
-        structlog.stdlib.add_log_level,
-        structlog.stdlib.add_logger_name,
-        structlog.dev.ConsoleRenderer(),
-    ],
-    wrapper_class=structlog.stdlib.BoundLogger,
-    context_class=dict,
-    logger_factory=structlog.stdlib.LoggerFactory(),
-    cache_logger_on_first_use=True,
-)
-
 logger = structlog.get_logger(__name__)
 
+# Numeric values match the stdlib logging levels
+LOG_LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+TRANSPORTS = ("stdio",)
 
+USAGE = """usage: d365fo-mcp [--transport {stdio}] [--log-level {debug,info,warning,error}]
+                  [--validate-config] [--init-db]
 
+D365FO MCP Server
 
+options:
+  --transport {stdio}   Transport mode (currently only stdio supported)
+  --log-level LEVEL     Log level: debug, info, warning, error (default: info)
+  --validate-config     Validate configuration and exit
+  --init-db             Initialize database and exit
+"""
 
 
-def main() -> Optional[int]:
-    """Main entry point with command line argument parsing"""
-    # Load environment variables
-    load_dotenv_if_exists()
-
-    parser = argparse.ArgumentParser(description="D365FO MCP Server")
-    parser.add_argument(
-        "--transport",
-        choices=["stdio"],
-        default="stdio",
-        help="Transport mode (currently only stdio supported)",
-    )
-    parser.add_argument(
-        "--log-level",
-        default="info",
-        choices=["debug", "info", "warning", "error"],
-        help="Log level (default: info)",
+class CliArgs(NamedTuple):
+    """Parsed command line options"""
+    transport: str = "stdio"
+    log_level: str = "info"
+    validate_config: bool = False
+    init_db: bool = False
+
+
+def _usage_error(message: str) -> None:
+    sys.stderr.write(USAGE)
+    sys.stderr.write(f"d365fo-mcp: error: {message}\n")
+    raise SystemExit(2)
+
+
+def parse_args(argv: List[str]) -> CliArgs:
+    """Parse the four supported flags without pulling in argparse"""
+    values = {"--transport": "stdio", "--log-level": "info"}
+    flags = {"--validate-config": False, "--init-db": False}
+    
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        name, sep, value = arg.partition("=")
+        if arg in ("-h", "--help"):
+            sys.stdout.write(USAGE)
+            raise SystemExit(0)
+        elif arg in flags:
+            flags[arg] = True
+        elif name in values:
+            if not sep:
+                i += 1
+                if i >= len(argv):
+                    _usage_error(f"argument {name}: expected one argument")
+                value = argv[i]
+            values[name] = value
+        else:
+            _usage_error(f"unrecognized arguments: {arg}")
+        i += 1
+    
+    transport, log_level = values["--transport"], values["--log-level"]
+    if transport not in TRANSPORTS:
+        _usage_error(f"argument --transport: invalid choice: {transport!r}")
+    if log_level not in LOG_LEVELS:
+        _usage_error(f"argument --log-level: invalid choice: {log_level!r}")
+    
+    return CliArgs(
+        transport=transport,
+        log_level=log_level,
+        validate_config=flags["--validate-config"],
+        init_db=flags["--init-db"],
     )
-    parser.add_argument(
-        "--validate-config", action="store_true", help="Validate configuration and exit"
-    )
-    parser.add_argument("--init-db", action="store_true", help="Initialize database and exit")
 
-    args = parser.parse_args()
 
-    # Configure logging level
+def _configure_logging(level: str) -> None:
+    """Configure structlog once, after the command line has been parsed"""
     import logging
 
-    log_level = getattr(logging, args.log_level.upper())
+    logging.getLogger().setLevel(LOG_LEVELS[level])
     structlog.configure(
         processors=[
             structlog.stdlib.filter_by_level,
             structlog.stdlib.add_log_level,
             structlog.stdlib.add_logger_name,
-            structlog.dev.ConsoleRenderer()
-            if args.transport == "stdio"
-            else structlog.dev.ConsoleRenderer(),
+            structlog.dev.ConsoleRenderer(),
         ],
         wrapper_class=structlog.stdlib.BoundLogger,
         context_class=dict,
@@ -80,6 +105,27 @@ def main() -> Optional[int]:
         cache_logger_on_first_use=True,
     )
 
+
+def install_uvloop() -> bool:
+    """Use uvloop for asyncio when installed (optional "speedups" extra)"""
+    try:
+        import uvloop
+    except ImportError:
+        return False
+    uvloop.install()
+    return True
+
+
+def main() -> Optional[int]:
+    """Main entry point with command line argument parsing"""
+    # Load environment variables
+    load_dotenv_if_exists()
+    install_uvloop()
+
+    args = parse_args(sys.argv[1:])
+
+    _configure_logging(args.log_level)
+
     # Handle special commands
     if args.validate_config:
         asyncio.run(ServerValidator.validate_configuration())
@@ -1,6 +1,6 @@
 """Instructions repository implementations"""
 
-from .interface import IInstructionsRepository
+from .interface import INSTRUCTION_FIELDS, INSTRUCTION_SUMMARY_FIELDS, IInstructionsRepository
 
 # Note: Concrete implementations should be imported from their specific packages
 # to avoid circular imports. Use:
@@ -8,5 +8,7 @@ from .interface import IInstructionsRepository
 # from ..supabase import SupabaseInstructionsRepository
 
 __all__ = [
+    "INSTRUCTION_FIELDS",
+    "INSTRUCTION_SUMMARY_FIELDS",
     "IInstructionsRepository",
 ]
\ No newline at end of file
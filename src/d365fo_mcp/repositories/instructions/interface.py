@@ -5,7 +5,17 @@ Defines contract for instructions storage providers (SQLite, Supabase, etc.)
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, AsyncIterator, List, Literal, Optional, Sequence, Tuple, Union
+
+# Stored instruction fields, in the order full instruction dicts are built
+INSTRUCTION_FIELDS = (
+    "id", "entity_name", "operation_type", "title", "description", "example_query",
+    "example_data", "tags", "success_count", "failure_count",
+    "created_at", "updated_at", "created_by",
+)
+
+# Enough to list or pick instructions without their bodies
+INSTRUCTION_SUMMARY_FIELDS = ("id", "entity_name", "operation_type", "title")
 
 
 class IInstructionsRepository(ABC):
@@ -21,6 +31,17 @@ class IInstructionsRepository(ABC):
         """Close repository connections and cleanup"""
         pass
     
+    @abstractmethod
+    async def maintenance(self, level: Literal["light", "full"] = "light") -> None:
+        """
+        Run storage maintenance for long-running servers.
+        
+        Args:
+            level: "light" refreshes planner statistics and trims the write-ahead
+                log; "full" also compacts the storage (may take a while)
+        """
+        pass
+    
     # Instruction operations
     @abstractmethod
     async def save_instruction(
@@ -42,6 +63,22 @@ class IInstructionsRepository(ABC):
         """
         pass
     
+    @abstractmethod
+    async def save_instructions_bulk(
+        self,
+        items: List[Tuple[str, str, Dict[str, Any]]]
+    ) -> List[str]:
+        """
+        Save several new instructions in one transaction.
+        
+        Args:
+            items: (entity_name, operation_type, instruction) tuples
+            
+        Returns:
+            Instruction IDs, parallel to items
+        """
+        pass
+    
     @abstractmethod
     async def update_instruction(
         self,
@@ -70,6 +107,21 @@ class IInstructionsRepository(ABC):
         """
         pass
     
+    @abstractmethod
+    async def get_instructions_many(
+        self, instruction_ids: List[str]
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Get several instructions by ID at once.
+        
+        Args:
+            instruction_ids: Instruction IDs
+            
+        Returns:
+            Mapping of each requested ID to its instruction, or None if not found
+        """
+        pass
+    
     @abstractmethod
     async def get_entity_instructions(
         self,
@@ -93,21 +145,58 @@ class IInstructionsRepository(ABC):
         self,
         query: str,
         limit: int = 20,
-        skip: int = 0
+        skip: int = 0,
+        fields: Optional[Sequence[str]] = None
     ) -> List[Dict[str, Any]]:
         """
         Search instructions by content.
         
+        Must be served from an inverted (full-text) index over entity name,
+        title and description rather than a scan, ranked by relevance
+        (FTS5 for SQLite). Implementations keep the index current on every
+        write; rebuild_search_index() re-creates it from the stored rows.
+        
         Args:
             query: Search query
             limit: Maximum results
             skip: Results to skip
+            fields: Subset of INSTRUCTION_FIELDS to return (e.g.
+                INSTRUCTION_SUMMARY_FIELDS); None returns whole instructions
             
         Returns:
             Matching instructions
+            
+        Raises:
+            ValueError: If fields names an unknown field (checked before
+                searching, so it is never swallowed as a search failure)
         """
         pass
     
+    @abstractmethod
+    def iter_search_instructions(
+        self,
+        query: str,
+        limit: int = 20,
+        skip: int = 0
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream instructions matching a search as they are read (async generator).
+        
+        Args:
+            query: Search query
+            limit: Maximum results
+            skip: Results to skip
+            
+        Yields:
+            Matching instructions, as returned by search_instructions()
+        """
+        pass
+    
+    @abstractmethod
+    async def rebuild_search_index(self) -> None:
+        """Re-create the search index used by search_instructions() from stored instructions"""
+        pass
+    
     @abstractmethod
     async def delete_instruction(self, instruction_id: str) -> bool:
         """
@@ -128,7 +217,8 @@ class IInstructionsRepository(ABC):
         instruction_id: str,
         success: bool = True,
         feedback_score: Optional[int] = None,
-        metadata: Optional[Dict[str, Any]] = None
+        metadata: Optional[Dict[str, Any]] = None,
+        metadata_json: Optional[bytes] = None
     ) -> None:
         """
         Record instruction usage statistics.
@@ -138,6 +228,23 @@ class IInstructionsRepository(ABC):
             success: Whether instruction led to success
             feedback_score: User feedback score (1-5)
             metadata: Additional usage metadata
+            metadata_json: Additional usage metadata already serialized as
+                UTF-8 JSON; at most one of metadata and metadata_json may be set
+        """
+        pass
+    
+    @abstractmethod
+    async def record_instruction_usage_bulk(
+        self,
+        rows: List[Tuple[str, bool, Optional[int], Union[Dict[str, Any], bytes, None]]]
+    ) -> None:
+        """
+        Record several instruction usages in one transaction.
+        
+        Args:
+            rows: (instruction_id, success, feedback_score, metadata) tuples,
+                as for record_instruction_usage; metadata is a dict or
+                pre-serialized JSON bytes
         """
         pass
     
@@ -1,6 +1,6 @@
 """Metadata repository implementations"""
 
-from .interface import IMetadataRepository
+from .interface import EntitySummary, IMetadataRepository
 
 # Note: Concrete implementations should be imported from their specific packages
 # to avoid circular imports. Use:
@@ -8,5 +8,6 @@ from .interface import IMetadataRepository
 # from ..supabase import SupabaseMetadataRepository
 
 __all__ = [
+    "EntitySummary",
     "IMetadataRepository",
 ]
\ No newline at end of file
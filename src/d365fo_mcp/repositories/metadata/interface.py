@@ -4,13 +4,39 @@ Metadata Repository Interface
 Defines contract for metadata storage providers (SQLite, Supabase, etc.)
 """
 
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional
+from dataclasses import dataclass
+from typing import Dict, Any, AsyncIterator, Awaitable, Callable, List, Literal, Mapping, Optional, Tuple, Union
+
+
+@dataclass(slots=True, frozen=True)
+class EntitySummary:
+    """Entity search match (field order matches the search query's columns)"""
+    
+    entity_set: str
+    entity_name: str
+    use_for_queries: str
+    description: str
+    relevance: int
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-ready dict, same keys as search_entities()'s detailed_entities"""
+        return {
+            "entity_name": self.entity_name,
+            "entity_set": self.entity_set,
+            "use_for_queries": self.use_for_queries,
+            "description": self.description,
+            "relevance": self.relevance
+        }
 
 
 class IMetadataRepository(ABC):
     """Interface for metadata storage repositories"""
     
+    # The in-flight get_or_refresh_raw_metadata() load shared by concurrent callers
+    _raw_metadata_refresh: Optional["asyncio.Task[bytes]"] = None
+    
     @abstractmethod
     async def initialize(self) -> None:
         """Initialize the repository (create tables, connections, etc.)"""
@@ -21,6 +47,17 @@ class IMetadataRepository(ABC):
         """Close repository connections and cleanup"""
         pass
     
+    @abstractmethod
+    async def maintenance(self, level: Literal["light", "full"] = "light") -> None:
+        """
+        Run storage maintenance for long-running servers.
+        
+        Args:
+            level: "light" refreshes planner statistics and trims the write-ahead
+                log; "full" also compacts the storage (may take a while)
+        """
+        pass
+    
     # Entity metadata operations
     @abstractmethod
     async def cache_entity_metadata(self, entity_name: str, metadata: Dict[str, Any]) -> None:
@@ -33,6 +70,16 @@ class IMetadataRepository(ABC):
         """
         pass
     
+    @abstractmethod
+    async def cache_entity_metadata_bulk(self, mapping: Mapping[str, Dict[str, Any]]) -> None:
+        """
+        Cache metadata for several entities in one transaction.
+        
+        Args:
+            mapping: Entity name -> complete entity metadata structure
+        """
+        pass
+    
     @abstractmethod
     async def get_cached_entity_metadata(self, entity_name: str) -> Optional[Dict[str, Any]]:
         """
@@ -46,6 +93,52 @@ class IMetadataRepository(ABC):
         """
         pass
     
+    @abstractmethod
+    async def get_cached_entity_metadata_many(
+        self, entity_names: List[str]
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Retrieve cached metadata for several entities at once.
+        
+        Args:
+            entity_names: Entity (type or set) names
+            
+        Returns:
+            Mapping of each requested name to its metadata, or None if not found
+        """
+        pass
+    
+    @abstractmethod
+    async def get_cached_entity_metadata_etag(self, entity_name: str) -> Optional[str]:
+        """
+        Get a version tag for an entity's cached metadata without loading it.
+        
+        Args:
+            entity_name: Entity (type or set) name
+            
+        Returns:
+            Opaque tag that changes whenever the metadata changes, or None if not found
+        """
+        pass
+    
+    @abstractmethod
+    async def get_cached_entity_metadata_if_changed(
+        self, entity_name: str, etag: Optional[str]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Retrieve cached metadata only when it differs from the caller's copy.
+        
+        Args:
+            entity_name: Entity (type or set) name
+            etag: Tag of the caller's copy, from a previous call or
+                get_cached_entity_metadata_etag()
+            
+        Returns:
+            Metadata with its current tag under "_etag", or None if the tag
+            still matches or the entity is not found
+        """
+        pass
+    
     @abstractmethod
     async def list_cached_entities(self) -> List[Dict[str, Any]]:
         """
@@ -56,6 +149,23 @@ class IMetadataRepository(ABC):
         """
         pass
     
+    @abstractmethod
+    async def list_cached_entities_page(
+        self, limit: int = 1000, after: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        List cached entities one page at a time (keyset pagination).
+        
+        Args:
+            limit: Maximum entities per page
+            after: Token returned with the previous page, None for the first
+            
+        Returns:
+            Entity summaries in list_cached_entities() order and the token for
+            the next page (None on the last page)
+        """
+        pass
+    
     @abstractmethod
     async def search_entities(self, pattern: str, limit: int = 20, skip: int = 0) -> Dict[str, Any]:
         """
@@ -71,9 +181,26 @@ class IMetadataRepository(ABC):
         """
         pass
     
+    @abstractmethod
+    def iter_search_entities(
+        self, pattern: str, limit: int = 20, skip: int = 0
+    ) -> AsyncIterator[EntitySummary]:
+        """
+        Stream entity search matches as they are read (async generator).
+        
+        Args:
+            pattern: Search pattern
+            limit: Maximum results
+            skip: Results to skip
+            
+        Yields:
+            Entity matches in relevance order
+        """
+        pass
+    
     # Raw metadata operations
     @abstractmethod
-    async def cache_raw_metadata(self, metadata_xml: str) -> None:
+    async def cache_raw_metadata(self, metadata_xml: bytes) -> None:
         """
         Cache raw OData metadata XML.
         
@@ -83,7 +210,7 @@ class IMetadataRepository(ABC):
         pass
     
     @abstractmethod
-    async def get_cached_raw_metadata(self) -> Optional[str]:
+    async def get_cached_raw_metadata(self) -> Optional[bytes]:
         """
         Retrieve cached raw metadata XML.
         
@@ -92,6 +219,43 @@ class IMetadataRepository(ABC):
         """
         pass
     
+    async def get_or_refresh_raw_metadata(
+        self, loader: Callable[[], Awaitable[bytes]], force: bool = False
+    ) -> bytes:
+        """
+        Return cached raw metadata XML, loading and caching it when missing.
+        
+        Concurrent callers share one in-flight refresh: the first runs
+        loader() and cache_raw_metadata(), the rest await its result.
+        
+        Args:
+            loader: Fetches fresh metadata XML (e.g. from D365)
+            force: Skip the cached copy (an in-flight refresh is still joined)
+            
+        Returns:
+            Metadata XML
+        """
+        if not force:
+            cached = await self.get_cached_raw_metadata()
+            if cached is not None:
+                return cached
+        
+        refresh = self._raw_metadata_refresh
+        if refresh is None:
+            refresh = asyncio.create_task(self._refresh_raw_metadata(loader))
+            self._raw_metadata_refresh = refresh
+        # Shielded so a cancelled caller does not cancel the shared refresh
+        return await asyncio.shield(refresh)
+    
+    async def _refresh_raw_metadata(self, loader: Callable[[], Awaitable[bytes]]) -> bytes:
+        """Run loader() and cache its result (the single in-flight refresh)"""
+        try:
+            metadata_xml = await loader()
+            await self.cache_raw_metadata(metadata_xml)
+            return metadata_xml
+        finally:
+            self._raw_metadata_refresh = None
+    
     @abstractmethod
     async def is_metadata_cache_valid(self) -> bool:
         """
@@ -144,6 +308,22 @@ class IMetadataRepository(ABC):
         """
         pass
     
+    @abstractmethod
+    async def get_entity_enum_fields_many(
+        self, entity_names: List[str]
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the enum fields of several entities at once.
+        
+        Args:
+            entity_names: Entity (type or set) names
+            
+        Returns:
+            Mapping of each requested name to its enum fields, as returned by
+            get_entity_enum_fields() (empty if not found)
+        """
+        pass
+    
     @abstractmethod
     async def clear_metadata_cache(self) -> None:
         """Clear all metadata cache"""
@@ -157,7 +337,8 @@ class IMetadataRepository(ABC):
         entity_name: Optional[str] = None,
         success: bool = True,
         execution_time_ms: Optional[int] = None,
-        metadata: Optional[Dict[str, Any]] = None
+        metadata: Optional[Dict[str, Any]] = None,
+        metadata_json: Optional[bytes] = None
     ) -> None:
         """
         Record usage statistics.
@@ -168,9 +349,31 @@ class IMetadataRepository(ABC):
             success: Whether operation succeeded
             execution_time_ms: Execution time in milliseconds
             metadata: Additional metadata
+            metadata_json: Additional metadata already serialized as UTF-8 JSON;
+                at most one of metadata and metadata_json may be set
         """
         pass
     
+    @abstractmethod
+    async def record_usage_stats_bulk(
+        self,
+        rows: List[Tuple[str, Optional[str], bool, Optional[int], Union[Dict[str, Any], bytes, None]]]
+    ) -> None:
+        """
+        Record several usage statistics in one transaction.
+        
+        Args:
+            rows: (operation, entity_name, success, execution_time_ms, metadata)
+                tuples, as for record_usage_stat; metadata is a dict or
+                pre-serialized JSON bytes
+        """
+        pass
+    
+    @abstractmethod
+    async def flush_usage_stats(self) -> None:
+        """Write any usage statistics buffered by record_usage_stat"""
+        pass
+    
     @abstractmethod
     async def get_usage_stats(
         self,
@@ -1,12 +1,17 @@
 """SQLite Repository Implementations"""
 
-from .database import Database, DatabaseError
-from .metadata_repository import SQLiteMetadataRepository
-from .instructions_repository import SQLiteInstructionsRepository
+from ..._lazy import lazy_getattr
+from .database import Database, DatabaseError, DatabasePool
 
 __all__ = [
     "Database",
     "DatabaseError", 
+    "DatabasePool",
     "SQLiteMetadataRepository",
     "SQLiteInstructionsRepository",
-]
\ No newline at end of file
+]
+
+__getattr__ = lazy_getattr(__name__, {
+    "SQLiteMetadataRepository": ".metadata_repository",
+    "SQLiteInstructionsRepository": ".instructions_repository",
+})
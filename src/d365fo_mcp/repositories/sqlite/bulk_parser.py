@@ -4,114 +4,272 @@ High-performance bulk XML parser for D365 metadata
 Optimized for parsing 46MB XML files and storing in SQLite with maximum efficiency.
 """
 
-import xml.etree.ElementTree as ET
+import asyncio
+import mmap
+import os
 import sqlite3
 import json
 import time
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Iterator, Optional, Set, Tuple, AsyncIterator, Union
 from datetime import datetime
+from pathlib import Path
 from contextlib import contextmanager
 import structlog
 
+try:
+    from lxml import etree
+    _LXML_AVAILABLE = True
+except ImportError:  # lxml is part of the optional "speedups" extra
+    import xml.etree.ElementTree as etree  # noqa: N813 - same name as lxml.etree, so either parser fits
+    _LXML_AVAILABLE = False
+
+try:
+    from orjson import dumps as _orjson_dumps
+
+    def _json_text(obj: Any) -> str:
+        return _orjson_dumps(obj).decode("utf-8")
+except ImportError:  # orjson is part of the optional "speedups" extra
+    _json_text = json.dumps
+
 logger = structlog.get_logger(__name__)
 
+EDM_NS = "{http://docs.oasis-open.org/odata/ns/edm}"
+_SCHEMA_TAG = EDM_NS + "Schema"
+_CONTAINER_TAG = EDM_NS + "EntityContainer"
+_ENTITY_TYPE_TAG = EDM_NS + "EntityType"
+_ENTITY_SET_TAG = EDM_NS + "EntitySet"
+_ENUM_TYPE_TAG = EDM_NS + "EnumType"
+
+# xsd:boolean spellings of true, matched without lowercasing each attribute
+_XML_TRUE = frozenset(("true", "True", "TRUE", "1"))
+
+# Child selectors, built once instead of on every element
+_KEY_PATH = "./" + EDM_NS + "Key"
+_KEY_REF_PATH = _KEY_PATH + "/" + EDM_NS + "PropertyRef"
+_PROPERTY_PATH = "./" + EDM_NS + "Property"
+_NAV_PROPERTY_PATH = "./" + EDM_NS + "NavigationProperty"
+_MEMBER_PATH = "./" + EDM_NS + "Member"
+_ANNOTATION_PATH = "./" + EDM_NS + "Annotation"  # direct children only
+
+_INSERT_ENTITY_TYPE_SQL = """
+    INSERT INTO entity_types (name, base_type, abstract, has_key, namespace, annotations)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+_INSERT_ENTITY_SET_SQL = """
+    INSERT INTO entity_sets (name, entity_type_id, annotations)
+    VALUES (?, ?, ?)
+"""
+_INSERT_PROPERTY_SQL = """
+    INSERT INTO entity_properties (
+        entity_type_id, name, type, nullable, max_length,
+        precision, scale, is_key, is_enum, enum_type,
+        annotations, ordinal_position
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+# Same insert fed one JSON array of rows, unpacked inside SQLite instead of
+# binding parameters row by row (->> needs SQLite 3.38+)
+_INSERT_PROPERTIES_JSON_SQL = """
+    INSERT INTO entity_properties (
+        entity_type_id, name, type, nullable, max_length,
+        precision, scale, is_key, is_enum, enum_type,
+        annotations, ordinal_position
+    )
+    SELECT value ->> 0, value ->> 1, value ->> 2, value ->> 3, value ->> 4, value ->> 5,
+           value ->> 6, value ->> 7, value ->> 8, value ->> 9, value ->> 10, value ->> 11
+    FROM json_each(?)
+"""
+_JSON_EACH_INSERT = sqlite3.sqlite_version_info >= (3, 38, 0)
+_INSERT_NAV_PROPERTY_SQL = """
+    INSERT INTO navigation_properties (
+        entity_type_id, name, target_entity_type, relationship_type,
+        is_collection, nullable, annotations
+    ) VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+_INSERT_ENUM_TYPE_SQL = """
+    INSERT INTO enum_types (name, underlying_type, is_flags, namespace, annotations)
+    VALUES (?, ?, ?, ?, ?)
+"""
+_INSERT_ENUM_MEMBER_SQL = """
+    INSERT INTO enum_members (
+        enum_type_id, name, value, annotations, ordinal_position
+    ) VALUES (?, ?, ?, ?, ?)
+"""
+
+# Slice size when feeding an in-memory document to the incremental parser
+FEED_CHUNK_BYTES = 1024 * 1024
+
+
+def _int_or_none(value: Optional[str]) -> Optional[int]:
+    """Integer facet value; None when absent or symbolic (MaxLength="max", Scale="variable")"""
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+def _key_fields(entity_type: etree.Element) -> Set[str]:
+    """Names of the key properties of an EntityType"""
+    return {key_ref.get("Name") for key_ref in entity_type.iterfind(_KEY_REF_PATH)}
+
+
+async def _iter_chunks(
+    data: Union[bytes, mmap.mmap], size: int = FEED_CHUNK_BYTES
+) -> AsyncIterator[bytes]:
+    """Yield an in-memory document in parser-sized slices, letting other tasks run between them"""
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+        await asyncio.sleep(0)
+
+
 class BulkMetadataParser:
     """High-performance parser for D365 OData metadata XML"""
     
     def __init__(self, db_connection: sqlite3.Connection):
+        # Connection pragmas (WAL, synchronous, cache) are owned by Database
         self.db = db_connection
-        self.db.execute("PRAGMA journal_mode = WAL")
-        self.db.execute("PRAGMA synchronous = NORMAL")
-        self.db.execute("PRAGMA cache_size = -64000")  # 64MB cache
-        self.db.execute("PRAGMA temp_store = MEMORY")
         
     async def parse_and_store_metadata(
         self, 
-        metadata_xml: str, 
+        metadata_xml: Union[bytes, str], 
         d365_instance: str,
         chunk_size: int = 1000
     ) -> Dict[str, Any]:
         """
         Parse full metadata XML and store in SQLite with maximum performance.
         
+        The document is fed through the same incremental parser as
+        parse_and_store_metadata_stream(), so no full tree is ever built.
+        
         Args:
-            metadata_xml: Full D365 OData metadata XML
+            metadata_xml: Full D365 OData metadata XML (bytes preferred; str is encoded)
             d365_instance: D365 instance identifier
             chunk_size: Batch size for database inserts
             
         Returns:
             Parsing statistics and performance metrics
         """
-        start_time = time.time()
+        if isinstance(metadata_xml, str):
+            metadata_xml = metadata_xml.encode("utf-8")
+        return await self.parse_and_store_metadata_stream(
+            _iter_chunks(metadata_xml), d365_instance, chunk_size
+        )
+    
+    async def parse_and_store_metadata_file(
+        self,
+        path: Union[str, Path],
+        d365_instance: str,
+        chunk_size: int = 1000
+    ) -> Dict[str, Any]:
+        """
+        Parse a metadata XML document saved on disk and store in SQLite.
         
-        logger.info("Starting bulk metadata parsing", 
-                   xml_size=len(metadata_xml), 
-                   d365_instance=d365_instance)
+        The file is memory-mapped and fed to the incremental parser one
+        slice at a time, so it is never read into memory as a whole.
         
-        try:
-            # Parse XML once
-            root = ET.fromstring(metadata_xml)
+        Args:
+            path: Path to a saved D365 OData $metadata document
+            d365_instance: D365 instance identifier
+            chunk_size: Batch size for database inserts
             
-            # Track parsing statistics
-            stats = {
-                "xml_size_bytes": len(metadata_xml),
-                "d365_instance": d365_instance,
-                "entity_types_parsed": 0,
-                "entity_sets_parsed": 0,  
-                "properties_parsed": 0,
-                "navigation_props_parsed": 0,
-                "enum_types_parsed": 0,
-                "enum_members_parsed": 0,
-                "parsing_start": datetime.now(),
-                "phases": {}
-            }
+        Returns:
+            Parsing statistics and performance metrics
+        """
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                raise ValueError("Empty metadata document")
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return await self.parse_and_store_metadata_stream(
+                    _iter_chunks(mapped), d365_instance, chunk_size
+                )
+    
+    async def parse_and_store_metadata_stream(
+        self,
+        xml_chunks: AsyncIterator[bytes],
+        d365_instance: str,
+        chunk_size: int = 1000
+    ) -> Dict[str, Any]:
+        """
+        Parse metadata XML from a byte stream and store in SQLite.
+        
+        Chunks are fed to an incremental parser as they arrive, so parsing
+        overlaps the download. Each EntityType, EnumType and EntitySet is
+        stored as soon as its end tag is seen and then dropped from the tree,
+        so peak memory is bounded by one element rather than the whole document.
+        
+        Args:
+            xml_chunks: Async iterator of raw XML bytes (e.g. D365Client.stream_metadata())
+            d365_instance: D365 instance identifier
+            chunk_size: Batch size for database inserts
             
+        Returns:
+            Parsing statistics and performance metrics
+        """
+        start_time = time.perf_counter()
+        
+        logger.info("Starting streaming bulk metadata parsing",
+                   d365_instance=d365_instance,
+                   parser="lxml" if _LXML_AVAILABLE else "etree")
+        
+        stats: Dict[str, Any] = {
+            "xml_size_bytes": 0,
+            "d365_instance": d365_instance,
+            "entity_types_parsed": 0,
+            "entity_sets_parsed": 0,
+            "properties_parsed": 0,
+            "navigation_props_parsed": 0,
+            "enum_types_parsed": 0,
+            "enum_members_parsed": 0,
+            "parsing_start": datetime.now(),
+            "phases": {}
+        }
+        entity_type_map: Dict[str, int] = {}
+        enum_type_map: Dict[str, int] = {}
+        entity_sets: List[Tuple[str, str, Optional[str]]] = []
+        batches: Dict[str, List[Tuple[Any, ...]]] = {"properties": [], "navigation": [], "enum_members": []}
+        
+        try:
             with self._transaction():
-                # Phase 1: Parse and store entity types
-                phase_start = time.time()
-                entity_type_map = await self._parse_entity_types(root, chunk_size)
-                stats["entity_types_parsed"] = len(entity_type_map)
-                stats["phases"]["entity_types"] = time.time() - phase_start
+                phase_start = time.perf_counter()
+                pull_parser = etree.XMLPullParser(events=("start", "end"))
+                stack: List[etree.Element] = []
                 
-                # Phase 2: Parse and store entity sets
-                phase_start = time.time()
-                entity_set_map = await self._parse_entity_sets(root, entity_type_map, chunk_size)
-                stats["entity_sets_parsed"] = len(entity_set_map)
-                stats["phases"]["entity_sets"] = time.time() - phase_start
-                
-                # Phase 3: Parse and store properties (bulk insert)
-                phase_start = time.time()
-                properties_count = await self._parse_entity_properties(root, entity_type_map, chunk_size)
-                stats["properties_parsed"] = properties_count
-                stats["phases"]["properties"] = time.time() - phase_start
-                
-                # Phase 4: Parse and store navigation properties
-                phase_start = time.time()
-                nav_props_count = await self._parse_navigation_properties(root, entity_type_map, chunk_size)
-                stats["navigation_props_parsed"] = nav_props_count
-                stats["phases"]["navigation_properties"] = time.time() - phase_start
+                async for chunk in xml_chunks:
+                    stats["xml_size_bytes"] += len(chunk)
+                    pull_parser.feed(chunk)
+                    self._consume_events(
+                        pull_parser, stack, stats, entity_type_map, enum_type_map,
+                        entity_sets, batches, chunk_size
+                    )
                 
-                # Phase 5: Parse and store enum types
-                phase_start = time.time()
-                enum_type_map = await self._parse_enum_types(root, chunk_size)
-                stats["enum_types_parsed"] = len(enum_type_map)
-                stats["phases"]["enum_types"] = time.time() - phase_start
+                pull_parser.close()
+                self._consume_events(
+                    pull_parser, stack, stats, entity_type_map, enum_type_map,
+                    entity_sets, batches, chunk_size
+                )
+                self._flush_stream_batches(batches, 0)
                 
-                # Phase 6: Parse and store enum members
-                phase_start = time.time()
-                enum_members_count = await self._parse_enum_members(root, enum_type_map, chunk_size)
-                stats["enum_members_parsed"] = enum_members_count
-                stats["phases"]["enum_members"] = time.time() - phase_start
+                if stats["xml_size_bytes"] == 0:
+                    raise ValueError("Empty metadata document")
+                stats["phases"]["types_and_members"] = time.perf_counter() - phase_start
                 
-                # Phase 7: Update FTS search index
-                phase_start = time.time()
-                await self._update_search_index(entity_set_map, enum_type_map)
-                stats["phases"]["search_index"] = time.time() - phase_start
+                # Entity sets reference entity types by name, so resolve them
+                # once every EntityType in the document has been stored
+                phase_start = time.perf_counter()
+                entity_set_map = self._store_entity_sets(entity_sets, entity_type_map, chunk_size)
+                stats["entity_sets_parsed"] = len(entity_set_map)
+                stats["phases"]["entity_sets"] = time.perf_counter() - phase_start
                 
-                # Record sync metadata
-                await self._record_sync_metadata(stats)
+                phase_start = time.perf_counter()
+                self._update_search_index()
+                stats["phases"]["search_index"] = time.perf_counter() - phase_start
                 
-            total_time = time.time() - start_time
+                # Duration so far, so metadata_sync doesn't record 0 ms
+                stats["total_duration_seconds"] = time.perf_counter() - start_time
+                self._record_sync_metadata(stats)
+            
+            total_time = time.perf_counter() - start_time
             stats["total_duration_seconds"] = total_time
             stats["records_per_second"] = (
                 stats["properties_parsed"] + stats["enum_members_parsed"]
@@ -130,9 +288,89 @@ class BulkMetadataParser:
             logger.error("Bulk parsing failed", error=str(e))
             raise
     
+    def _consume_events(
+        self,
+        pull_parser: Any,
+        stack: List[etree.Element],
+        stats: Dict[str, Any],
+        entity_type_map: Dict[str, int],
+        enum_type_map: Dict[str, int],
+        entity_sets: List[Tuple[str, str, Optional[str]]],
+        batches: Dict[str, List[Tuple[Any, ...]]],
+        chunk_size: int
+    ) -> None:
+        """Store completed top-level elements from the pull parser and drop them from the tree"""
+        for event, elem in pull_parser.read_events():
+            if event == "start":
+                stack.append(elem)
+                continue
+            
+            stack.pop()
+            tag = elem.tag
+            
+            if tag == _ENTITY_TYPE_TAG:
+                # Key fields feed both has_key and the property rows
+                key_fields = _key_fields(elem)
+                row = self._entity_type_row(elem, key_fields)
+                if row is not None:
+                    entity_type_id = self.db.execute(_INSERT_ENTITY_TYPE_SQL, row).lastrowid
+                    assert entity_type_id is not None
+                    entity_type_map[row[0]] = entity_type_id
+                    properties = self._property_rows(elem, entity_type_id, key_fields)
+                    nav_props = self._navigation_rows(elem, entity_type_id)
+                    batches["properties"].extend(properties)
+                    batches["navigation"].extend(nav_props)
+                    stats["entity_types_parsed"] += 1
+                    stats["properties_parsed"] += len(properties)
+                    stats["navigation_props_parsed"] += len(nav_props)
+                    self._flush_stream_batches(batches, chunk_size)
+            elif tag == _ENUM_TYPE_TAG:
+                row = self._enum_type_row(elem)
+                if row is not None:
+                    enum_type_id = self.db.execute(_INSERT_ENUM_TYPE_SQL, row).lastrowid
+                    assert enum_type_id is not None
+                    enum_type_map[row[0]] = enum_type_id
+                    members = self._enum_member_rows(elem, enum_type_id)
+                    batches["enum_members"].extend(members)
+                    stats["enum_types_parsed"] += 1
+                    stats["enum_members_parsed"] += len(members)
+                    self._flush_stream_batches(batches, chunk_size)
+            elif tag == _ENTITY_SET_TAG:
+                row = self._entity_set_row(elem)
+                if row is not None:
+                    entity_sets.append(row)
+            
+            # Drop every finished child of Schema/EntityContainer (including
+            # ComplexTypes, Actions and Annotations we don't store) so the
+            # in-memory tree never grows beyond the element being parsed
+            if stack and stack[-1].tag in (_SCHEMA_TAG, _CONTAINER_TAG):
+                elem.clear()
+                stack[-1].remove(elem)
+    
+    def _flush_stream_batches(self, batches: Dict[str, List[Tuple[Any, ...]]], chunk_size: int) -> None:
+        """Bulk insert buffered child rows once a batch reaches chunk_size"""
+        properties = batches["properties"]
+        if _JSON_EACH_INSERT and properties and len(properties) >= chunk_size:
+            self.db.execute(_INSERT_PROPERTIES_JSON_SQL, (_json_text(properties),))
+            properties.clear()
+        
+        for key, sql in (
+            ("properties", _INSERT_PROPERTY_SQL),
+            ("navigation", _INSERT_NAV_PROPERTY_SQL),
+            ("enum_members", _INSERT_ENUM_MEMBER_SQL),
+        ):
+            batch = batches[key]
+            if batch and len(batch) >= chunk_size:
+                self.db.executemany(sql, batch)
+                batch.clear()
+    
     @contextmanager
-    def _transaction(self):
+    def _transaction(self) -> Iterator[None]:
         """Context manager for database transactions with optimization"""
+        if self.db.in_transaction:
+            # Caller owns the transaction (e.g. sync clears and reloads atomically)
+            yield
+            return
         self.db.execute("BEGIN IMMEDIATE")
         try:
             yield
@@ -141,101 +379,18 @@ class BulkMetadataParser:
             self.db.rollback()
             raise
     
-    async def _parse_entity_types(
-        self, 
-        root: ET.Element, 
-        chunk_size: int
-    ) -> Dict[str, int]:
-        """Parse EntityType definitions with bulk insert"""
-        
-        entity_types_batch = []
-        entity_type_map = {}  # name -> id
-        
-        for entity_type in root.findall(".//{http://docs.oasis-open.org/odata/ns/edm}EntityType"):
-            name = entity_type.get("Name")
-            if not name:
-                continue
-                
-            # Parse entity type attributes
-            base_type = entity_type.get("BaseType")
-            abstract = entity_type.get("Abstract", "false").lower() == "true"
-            
-            # Check if has key
-            key_element = entity_type.find("./{http://docs.oasis-open.org/odata/ns/edm}Key")
-            has_key = key_element is not None
-            
-            # Extract namespace from qualified name
-            namespace = "Microsoft.Dynamics.DataEntities"  # Default for D365
-            
-            # Parse annotations
-            annotations = self._parse_annotations(entity_type)
-            
-            entity_types_batch.append((
-                name, base_type, abstract, has_key, namespace, 
-                json.dumps(annotations) if annotations else None
-            ))
-            
-            if len(entity_types_batch) >= chunk_size:
-                await self._flush_entity_types_batch(entity_types_batch, entity_type_map)
-                entity_types_batch = []
-        
-        # Flush remaining
-        if entity_types_batch:
-            await self._flush_entity_types_batch(entity_types_batch, entity_type_map)
-            
-        return entity_type_map
-    
-    async def _flush_entity_types_batch(
-        self, 
-        batch: List[Tuple], 
-        entity_type_map: Dict[str, int]
-    ):
-        """Bulk insert entity types and update mapping"""
-        cursor = self.db.executemany("""
-            INSERT INTO entity_types (name, base_type, abstract, has_key, namespace, annotations)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, batch)
-        
-        # Get IDs for mapping (SQLite doesn't support RETURNING with executemany)
-        last_rowid = cursor.lastrowid
-        if last_rowid is not None:
-            start_id = last_rowid - len(batch) + 1
-            for i, (name, *_) in enumerate(batch):
-                entity_type_map[name] = start_id + i
-        else:
-            # Fallback: query for the IDs
-            for name, *_ in batch:
-                cursor = self.db.execute("SELECT id FROM entity_types WHERE name = ?", (name,))
-                row = cursor.fetchone()
-                if row:
-                    entity_type_map[name] = row[0]
-    
-    async def _parse_entity_sets(
-        self, 
-        root: ET.Element, 
+    def _store_entity_sets(
+        self,
+        entity_sets: List[Tuple[str, str, Optional[str]]],
         entity_type_map: Dict[str, int],
         chunk_size: int
     ) -> Dict[str, Dict[str, Any]]:
-        """Parse EntitySet definitions"""
+        """Resolve entity set rows against known entity types and bulk insert them"""
         
         entity_sets_batch = []
         entity_set_map = {}
         
-        # Find EntityContainer
-        container = root.find(".//{http://docs.oasis-open.org/odata/ns/edm}EntityContainer")
-        if container is None:
-            logger.warning("EntityContainer not found in metadata")
-            return entity_set_map
-        
-        for entity_set in container.findall(".//{http://docs.oasis-open.org/odata/ns/edm}EntitySet"):
-            set_name = entity_set.get("Name")
-            entity_type_ref = entity_set.get("EntityType")
-            
-            if not set_name or not entity_type_ref:
-                continue
-                
-            # Extract entity type name (remove namespace)
-            entity_type_name = entity_type_ref.split(".")[-1]
+        for set_name, entity_type_name, annotations in entity_sets:
             entity_type_id = entity_type_map.get(entity_type_name)
             
             if not entity_type_id:
@@ -243,12 +398,7 @@ class BulkMetadataParser:
                               set_name=set_name, entity_type=entity_type_name)
                 continue
             
-            annotations = self._parse_annotations(entity_set)
-            
-            entity_sets_batch.append((
-                set_name, entity_type_id,
-                json.dumps(annotations) if annotations else None
-            ))
+            entity_sets_batch.append((set_name, entity_type_id, annotations))
             
             entity_set_map[set_name] = {
                 "entity_type_name": entity_type_name,
@@ -256,325 +406,181 @@ class BulkMetadataParser:
             }
             
             if len(entity_sets_batch) >= chunk_size:
-                self.db.executemany("""
-                    INSERT INTO entity_sets (name, entity_type_id, annotations)
-                    VALUES (?, ?, ?)
-                """, entity_sets_batch)
+                self.db.executemany(_INSERT_ENTITY_SET_SQL, entity_sets_batch)
                 entity_sets_batch = []
         
         # Flush remaining
         if entity_sets_batch:
-            self.db.executemany("""
-                INSERT INTO entity_sets (name, entity_type_id, annotations)
-                VALUES (?, ?, ?)
-            """, entity_sets_batch)
+            self.db.executemany(_INSERT_ENTITY_SET_SQL, entity_sets_batch)
             
         return entity_set_map
     
-    async def _parse_entity_properties(
-        self, 
-        root: ET.Element,
-        entity_type_map: Dict[str, int],
-        chunk_size: int
-    ) -> int:
-        """Parse all entity properties with high-performance bulk insert"""
+    def _entity_type_row(self, entity_type: etree.Element, key_fields: Set[str]) -> Optional[Tuple[Any, ...]]:
+        """Build the entity_types row for an EntityType element"""
+        name = entity_type.get("Name")
+        if not name:
+            return None
+            
+        # Parse entity type attributes
+        base_type = entity_type.get("BaseType")
+        abstract = entity_type.get("Abstract", "false") in _XML_TRUE
         
-        properties_batch = []
-        total_properties = 0
+        has_key = bool(key_fields)
         
-        for entity_type in root.findall(".//{http://docs.oasis-open.org/odata/ns/edm}EntityType"):
-            entity_type_name = entity_type.get("Name")
-            if not entity_type_name:
-                continue
-                
-            entity_type_id = entity_type_map.get(entity_type_name)
-            if not entity_type_id:
-                continue
-            
-            # Get key fields for this entity
-            key_fields = set()
-            key_element = entity_type.find("./{http://docs.oasis-open.org/odata/ns/edm}Key")
-            if key_element is not None:
-                for key_ref in key_element.findall("./{http://docs.oasis-open.org/odata/ns/edm}PropertyRef"):
-                    key_name = key_ref.get("Name")
-                    if key_name:
-                        key_fields.add(key_name)
-            
-            # Parse properties for this entity
-            ordinal = 0
-            for prop in entity_type.findall("./{http://docs.oasis-open.org/odata/ns/edm}Property"):
-                prop_name = prop.get("Name")
-                if not prop_name:
-                    continue
-                    
-                prop_type = prop.get("Type", "")
-                nullable = prop.get("Nullable", "true").lower() == "true"
-                max_length = prop.get("MaxLength")
-                precision = prop.get("Precision")
-                scale = prop.get("Scale")
-                is_key = prop_name in key_fields
-                
-                # Detect enum types
-                is_enum = "Microsoft.Dynamics" in prop_type and "Enum" in prop_type
-                enum_type = prop_type.split(".")[-1] if is_enum else None
-                
-                annotations = self._parse_annotations(prop)
-                
-                properties_batch.append((
-                    entity_type_id, prop_name, prop_type, nullable,
-                    int(max_length) if max_length and max_length.isdigit() else None,
-                    int(precision) if precision and precision.isdigit() else None,
-                    int(scale) if scale and scale.isdigit() else None,
-                    is_key, is_enum, enum_type,
-                    json.dumps(annotations) if annotations else None,
-                    ordinal
-                ))
-                
-                ordinal += 1
-                total_properties += 1
-                
-                if len(properties_batch) >= chunk_size:
-                    self.db.executemany("""
-                        INSERT INTO entity_properties (
-                            entity_type_id, name, type, nullable, max_length,
-                            precision, scale, is_key, is_enum, enum_type,
-                            annotations, ordinal_position
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, properties_batch)
-                    properties_batch = []
+        # Extract namespace from qualified name
+        namespace = "Microsoft.Dynamics.DataEntities"  # Default for D365
         
-        # Flush remaining
-        if properties_batch:
-            self.db.executemany("""
-                INSERT INTO entity_properties (
-                    entity_type_id, name, type, nullable, max_length,
-                    precision, scale, is_key, is_enum, enum_type,
-                    annotations, ordinal_position
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, properties_batch)
-            
-        return total_properties
+        # Parse annotations
+        annotations = self._annotations_json(entity_type)
+        
+        return (
+            name, base_type, abstract, has_key, namespace, 
+            annotations
+        )
     
-    async def _parse_navigation_properties(
-        self,
-        root: ET.Element,
-        entity_type_map: Dict[str, int],
-        chunk_size: int
-    ) -> int:
-        """Parse navigation properties for relationships"""
+    def _entity_set_row(self, entity_set: etree.Element) -> Optional[Tuple[str, str, Optional[str]]]:
+        """Build (set name, entity type name, annotations) for an EntitySet element"""
+        set_name = entity_set.get("Name")
+        entity_type_ref = entity_set.get("EntityType")
+        
+        if not set_name or not entity_type_ref:
+            return None
+            
+        # Extract entity type name (remove namespace)
+        entity_type_name = entity_type_ref.split(".")[-1]
         
-        nav_props_batch = []
-        total_nav_props = 0
+        annotations = self._annotations_json(entity_set)
         
-        for entity_type in root.findall(".//{http://docs.oasis-open.org/odata/ns/edm}EntityType"):
-            entity_type_name = entity_type.get("Name")
-            if not entity_type_name:
+        return set_name, entity_type_name, annotations
+    
+    def _property_rows(
+        self, entity_type: etree.Element, entity_type_id: int, key_fields: Set[str]
+    ) -> List[Tuple[Any, ...]]:
+        """Build entity_properties rows for the Property children of an EntityType"""
+        rows: List[Tuple[Any, ...]] = []
+        append = rows.append
+        annotations_json = self._annotations_json
+        for prop in entity_type.iterfind(_PROPERTY_PATH):
+            get = prop.get
+            prop_name = get("Name")
+            if not prop_name:
                 continue
                 
-            entity_type_id = entity_type_map.get(entity_type_name)
-            if not entity_type_id:
-                continue
+            prop_type = get("Type", "")
             
-            for nav_prop in entity_type.findall("./{http://docs.oasis-open.org/odata/ns/edm}NavigationProperty"):
-                prop_name = nav_prop.get("Name")
-                prop_type = nav_prop.get("Type", "")
-                
-                if not prop_name:
-                    continue
-                
-                # Determine relationship type
-                is_collection = prop_type.startswith("Collection(")
-                nullable = nav_prop.get("Nullable", "true").lower() == "true"
-                
-                # Extract target entity type
-                if is_collection:
-                    target_entity = prop_type.replace("Collection(", "").replace(")", "").split(".")[-1]
-                    relationship_type = "one_to_many"
-                else:
-                    target_entity = prop_type.split(".")[-1] if "." in prop_type else prop_type
-                    relationship_type = "many_to_one"
-                
-                annotations = self._parse_annotations(nav_prop)
-                
-                nav_props_batch.append((
-                    entity_type_id, prop_name, target_entity, relationship_type,
-                    is_collection, nullable,
-                    json.dumps(annotations) if annotations else None
-                ))
-                
-                total_nav_props += 1
-                
-                if len(nav_props_batch) >= chunk_size:
-                    self.db.executemany("""
-                        INSERT INTO navigation_properties (
-                            entity_type_id, name, target_entity_type, relationship_type,
-                            is_collection, nullable, annotations
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """, nav_props_batch)
-                    nav_props_batch = []
-        
-        # Flush remaining
-        if nav_props_batch:
-            self.db.executemany("""
-                INSERT INTO navigation_properties (
-                    entity_type_id, name, target_entity_type, relationship_type,
-                    is_collection, nullable, annotations
-                ) VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, nav_props_batch)
+            # Detect enum types
+            is_enum = "Microsoft.Dynamics" in prop_type and "Enum" in prop_type
             
-        return total_nav_props
+            append((
+                entity_type_id, prop_name, prop_type,
+                get("Nullable", "true") in _XML_TRUE,
+                _int_or_none(get("MaxLength")),
+                _int_or_none(get("Precision")),
+                _int_or_none(get("Scale")),
+                prop_name in key_fields,
+                is_enum,
+                prop_type.rpartition(".")[2] if is_enum else None,
+                annotations_json(prop),
+                len(rows)
+            ))
+            
+        return rows
     
-    async def _parse_enum_types(
-        self,
-        root: ET.Element, 
-        chunk_size: int
-    ) -> Dict[str, int]:
-        """Parse enum type definitions"""
-        
-        enum_types_batch = []
-        enum_type_map = {}
+    def _navigation_rows(self, entity_type: etree.Element, entity_type_id: int) -> List[Tuple[Any, ...]]:
+        """Build navigation_properties rows for an EntityType"""
+        rows: List[Tuple[Any, ...]] = []
         
-        for enum_type in root.findall(".//{http://docs.oasis-open.org/odata/ns/edm}EnumType"):
-            name = enum_type.get("Name")
-            if not name:
+        for nav_prop in entity_type.iterfind(_NAV_PROPERTY_PATH):
+            get = nav_prop.get
+            prop_name = get("Name")
+            prop_type = get("Type", "")
+            
+            if not prop_name:
                 continue
             
-            underlying_type = enum_type.get("UnderlyingType", "Edm.Int32")
-            is_flags = enum_type.get("IsFlags", "false").lower() == "true"
-            namespace = "Microsoft.Dynamics.DataEntities"
+            # Determine relationship type
+            is_collection = prop_type.startswith("Collection(")
+            nullable = get("Nullable", "true") in _XML_TRUE
             
-            annotations = self._parse_annotations(enum_type)
+            # Extract target entity type
+            if is_collection:
+                target_entity = prop_type.replace("Collection(", "").replace(")", "").split(".")[-1]
+                relationship_type = "one_to_many"
+            else:
+                target_entity = prop_type.split(".")[-1] if "." in prop_type else prop_type
+                relationship_type = "many_to_one"
             
-            enum_types_batch.append((
-                name, underlying_type, is_flags, namespace,
-                json.dumps(annotations) if annotations else None
-            ))
+            annotations = self._annotations_json(nav_prop)
             
-            if len(enum_types_batch) >= chunk_size:
-                await self._flush_enum_types_batch(enum_types_batch, enum_type_map)
-                enum_types_batch = []
-        
-        # Flush remaining
-        if enum_types_batch:
-            await self._flush_enum_types_batch(enum_types_batch, enum_type_map)
+            rows.append((
+                entity_type_id, prop_name, target_entity, relationship_type,
+                is_collection, nullable,
+                annotations
+            ))
             
-        return enum_type_map
+        return rows
     
-    async def _flush_enum_types_batch(
-        self,
-        batch: List[Tuple],
-        enum_type_map: Dict[str, int]
-    ):
-        """Bulk insert enum types and update mapping"""
-        cursor = self.db.executemany("""
-            INSERT INTO enum_types (name, underlying_type, is_flags, namespace, annotations)
-            VALUES (?, ?, ?, ?, ?)
-        """, batch)
+    def _enum_type_row(self, enum_type: etree.Element) -> Optional[Tuple[Any, ...]]:
+        """Build the enum_types row for an EnumType element"""
+        name = enum_type.get("Name")
+        if not name:
+            return None
         
-        # Get IDs for mapping
-        last_rowid = cursor.lastrowid
-        if last_rowid is not None:
-            start_id = last_rowid - len(batch) + 1
-            for i, (name, *_) in enumerate(batch):
-                enum_type_map[name] = start_id + i
-        else:
-            # Fallback: query for the IDs
-            for name, *_ in batch:
-                cursor = self.db.execute("SELECT id FROM enum_types WHERE name = ?", (name,))
-                row = cursor.fetchone()
-                if row:
-                    enum_type_map[name] = row[0]
-    
-    async def _parse_enum_members(
-        self,
-        root: ET.Element,
-        enum_type_map: Dict[str, int],
-        chunk_size: int
-    ) -> int:
-        """Parse enum member definitions"""
+        underlying_type = enum_type.get("UnderlyingType", "Edm.Int32")
+        is_flags = enum_type.get("IsFlags", "false") in _XML_TRUE
+        namespace = "Microsoft.Dynamics.DataEntities"
         
-        enum_members_batch = []
-        total_members = 0
+        annotations = self._annotations_json(enum_type)
         
-        for enum_type in root.findall(".//{http://docs.oasis-open.org/odata/ns/edm}EnumType"):
-            enum_name = enum_type.get("Name")
-            if not enum_name:
-                continue
-                
-            enum_type_id = enum_type_map.get(enum_name)
-            if not enum_type_id:
+        return (
+            name, underlying_type, is_flags, namespace,
+            annotations
+        )
+    
+    def _enum_member_rows(self, enum_type: etree.Element, enum_type_id: int) -> List[Tuple[Any, ...]]:
+        """Build enum_members rows for the Member children of an EnumType"""
+        rows: List[Tuple[Any, ...]] = []
+        
+        ordinal = 0
+        for member in enum_type.iterfind(_MEMBER_PATH):
+            get = member.get
+            member_name = get("Name")
+            member_value = get("Value", "0")
+            
+            if not member_name:
                 continue
             
-            ordinal = 0
-            for member in enum_type.findall("./{http://docs.oasis-open.org/odata/ns/edm}Member"):
-                member_name = member.get("Name")
-                member_value = member.get("Value", "0")
-                
-                if not member_name:
-                    continue
-                
-                annotations = self._parse_annotations(member)
-                
-                enum_members_batch.append((
-                    enum_type_id, member_name, member_value,
-                    json.dumps(annotations) if annotations else None,
-                    ordinal
-                ))
-                
-                ordinal += 1
-                total_members += 1
-                
-                if len(enum_members_batch) >= chunk_size:
-                    self.db.executemany("""
-                        INSERT INTO enum_members (
-                            enum_type_id, name, value, annotations, ordinal_position
-                        ) VALUES (?, ?, ?, ?, ?)
-                    """, enum_members_batch)
-                    enum_members_batch = []
-        
-        # Flush remaining
-        if enum_members_batch:
-            self.db.executemany("""
-                INSERT INTO enum_members (
-                    enum_type_id, name, value, annotations, ordinal_position
-                ) VALUES (?, ?, ?, ?, ?)
-            """, enum_members_batch)
+            annotations = self._annotations_json(member)
             
-        return total_members
+            rows.append((
+                enum_type_id, member_name, member_value,
+                annotations,
+                ordinal
+            ))
+            
+            ordinal += 1
+            
+        return rows
     
-    async def _update_search_index(
-        self,
-        entity_set_map: Dict[str, Dict[str, Any]],
-        enum_type_map: Dict[str, int]
-    ):
-        """Update FTS search index for fast text searching"""
+    def _update_search_index(self) -> None:
+        """Rebuild the entity_search FTS index from the stored entity sets and enums"""
         
         # Clear existing index
         self.db.execute("DELETE FROM entity_search")
         
-        # Add entities to search index
-        entity_search_batch = []
-        for set_name, info in entity_set_map.items():
-            entity_search_batch.append((
-                set_name,
-                "entity", 
-                f"D365 entity: {info['entity_type_name']}"
-            ))
-        
-        # Add enums to search index
-        for enum_name in enum_type_map.keys():
-            entity_search_batch.append((
-                enum_name,
-                "enum",
-                f"D365 enum: {enum_name}"
-            ))
-        
-        self.db.executemany("""
-            INSERT OR REPLACE INTO entity_search (name, type, description)
-            VALUES (?, ?, ?)
-        """, entity_search_batch)
+        self.db.execute("""
+            INSERT INTO entity_search (name, type, description)
+            SELECT es.name, 'entity', 'D365 entity: ' || et.name
+            FROM entity_sets es
+            JOIN entity_types et ON et.id = es.entity_type_id
+        """)
+        self.db.execute("""
+            INSERT INTO entity_search (name, type, description)
+            SELECT name, 'enum', 'D365 enum: ' || name
+            FROM enum_types
+        """)
     
-    async def _record_sync_metadata(self, stats: Dict[str, Any]):
+    def _record_sync_metadata(self, stats: Dict[str, Any]) -> None:
         """Record metadata sync statistics"""
         self.db.execute("""
             INSERT INTO metadata_sync (
@@ -591,17 +597,20 @@ class BulkMetadataParser:
             stats["d365_instance"]
         ))
     
-    def _parse_annotations(self, element: ET.Element) -> Dict[str, Any]:
-        """Parse OData annotations from an element"""
-        annotations = {}
+    def _annotations_json(self, element: etree.Element) -> Optional[str]:
+        """Serialized OData annotations of an element, or None when it has none"""
+        annotations = None
         
         # Look for annotation elements
-        for annotation in element.findall(".//{http://docs.oasis-open.org/odata/ns/edm}Annotation"):
-            term = annotation.get("Term")
+        for annotation in element.iterfind(_ANNOTATION_PATH):
+            get = annotation.get
+            term = get("Term")
             if term:
                 # Simple annotation value
-                value = annotation.get("String") or annotation.get("Bool") or annotation.get("Int")
+                value = get("String") or get("Bool") or get("Int")
                 if value:
+                    if annotations is None:
+                        annotations = {}
                     annotations[term] = value
         
-        return annotations
\ No newline at end of file
+        return _json_text(annotations) if annotations else None
\ No newline at end of file
@@ -4,13 +4,68 @@ SQLite Database Connection and Infrastructure
 Provides database connection management and migrations for SQLite repositories.
 """
 
+import asyncio
 import sqlite3
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Optional, Union, Any
+from typing import Optional, Union, Any, AsyncIterator, Iterator, List, Literal, Sequence
 import structlog
 
 logger = structlog.get_logger(__name__)
 
+# Page cache in KiB (passed as a negative cache_size); bulk loads use the larger one
+DEFAULT_CACHE_SIZE_KIB = 65536
+BULK_CACHE_SIZE_KIB = 262144
+
+# Applied to every connection: WAL with NORMAL sync only fsyncs at checkpoints
+CONNECTION_PRAGMAS = (
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    f"PRAGMA cache_size = -{DEFAULT_CACHE_SIZE_KIB}",  # 64MB page cache
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA mmap_size = 268435456",  # 256MB
+)
+
+# Applied to DatabasePool read connections (journal mode and sync are per-file
+# or writer-only settings)
+READ_CONNECTION_PRAGMAS = (
+    "PRAGMA query_only = 1",
+    f"PRAGMA cache_size = -{DEFAULT_CACHE_SIZE_KIB}",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA mmap_size = 268435456",
+)
+
+# Bound parameters per statement on older SQLite builds (SQLITE_MAX_VARIABLE_NUMBER)
+MAX_SQL_VARIABLES = 999
+
+# Prepared statements kept per connection. sqlite3 caches compiled statements
+# keyed by SQL text, so the repositories' constant queries are parsed once
+# per connection (the default of 128 is outgrown by the chunked IN queries)
+STATEMENT_CACHE_SIZE = 256
+
+# Rows fetched per batch when streaming query results
+SEARCH_FETCH_SIZE = 256
+
+# SQLite's default checkpoint threshold (pages)
+DEFAULT_WAL_AUTOCHECKPOINT = 1000
+BULK_WAL_AUTOCHECKPOINT = 10000
+
+# Commits between explicit PASSIVE checkpoints; while these run, the
+# auto-checkpoint threshold is raised to BULK_WAL_AUTOCHECKPOINT as a backstop
+DEFAULT_CHECKPOINT_EVERY = 500
+
+
+def batched(items: Sequence[Any], size: int) -> Iterator[Sequence[Any]]:
+    """Split items into consecutive slices of at most size elements"""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def placeholders(count: int) -> str:
+    """'?, ?, ...' for an IN clause with count parameters"""
+    return ", ".join("?" * count)
+
 
 class DatabaseError(Exception):
     """Database operation errors"""
@@ -20,7 +75,11 @@ class DatabaseError(Exception):
 class Database:
     """SQLite database connection manager"""
 
-    def __init__(self, db_path: Union[str, Path] = "./d365fo-mcp.db"):
+    def __init__(
+        self,
+        db_path: Union[str, Path] = "./d365fo-mcp.db",
+        checkpoint_every: int = DEFAULT_CHECKPOINT_EVERY,
+    ):
         self.db_path = Path(db_path)
         logger.info("Database init", db_path=str(self.db_path), parent=str(self.db_path.parent), cwd=str(Path.cwd()))
         try:
@@ -29,15 +88,33 @@ class Database:
             logger.error("Failed to create database directory", db_path=str(self.db_path), parent=str(self.db_path.parent), error=str(e))
             raise
         self._connection: Optional[sqlite3.Connection] = None
+        self._migrated = False
+        # 0 leaves checkpointing to SQLite's auto-checkpoint on commit
+        self.checkpoint_every = max(0, checkpoint_every)
+        self._wal_autocheckpoint = BULK_WAL_AUTOCHECKPOINT if self.checkpoint_every else DEFAULT_WAL_AUTOCHECKPOINT
+        self._commits = 0
+        # Serializes writers on the shared connection: a transaction stays
+        # open across awaits (e.g. a metadata sync streaming its download), and
+        # a commit from another writer would otherwise land it half-done
+        self._write_lock = asyncio.Lock()
+
+    @property
+    def is_writing(self) -> bool:
+        """True while a transaction() holds the write connection"""
+        return self._write_lock.locked()
 
     async def initialize(self) -> None:
-        """Initialize database and run migrations"""
+        """Initialize database and run migrations (once per open connection)"""
+        if self._migrated:
+            return
+
         from .migrations import run_migrations
 
         logger.info("Initializing SQLite database", db_path=str(self.db_path))
 
         connection = await self.get_connection()
         await run_migrations(connection)
+        self._migrated = True
 
         logger.info("SQLite database initialized successfully")
 
@@ -46,11 +123,15 @@ class Database:
         if self._connection is None:
             try:
                 self._connection = sqlite3.connect(
-                    self.db_path, check_same_thread=False, timeout=30.0
+                    self.db_path,
+                    check_same_thread=False,
+                    timeout=30.0,
+                    cached_statements=STATEMENT_CACHE_SIZE,
                 )
                 self._connection.row_factory = sqlite3.Row
-                self._connection.execute("PRAGMA foreign_keys = ON")
-                self._connection.execute("PRAGMA journal_mode = WAL")
+                for pragma in CONNECTION_PRAGMAS:
+                    self._connection.execute(pragma)
+                self._connection.execute(f"PRAGMA wal_autocheckpoint = {self._wal_autocheckpoint}")
 
                 logger.debug("SQLite connection established", db_path=str(self.db_path))
 
@@ -59,11 +140,127 @@ class Database:
 
         return self._connection
 
+    async def get_read_connection(self) -> sqlite3.Connection:
+        """Get a connection for SELECTs (the single shared connection here)"""
+        return await self.get_connection()
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[sqlite3.Connection]:
+        """
+        Run a block in one write transaction (BEGIN IMMEDIATE), rolling back on error.
+
+        Every write to the shared connection goes through here. Writers wait
+        for the write lock, so one writer's commit never ends another's
+        transaction. Not re-entrant: don't open a transaction inside another.
+        """
+        async with self._write_lock:
+            connection = await self.get_connection()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+                connection.commit()
+            except BaseException:
+                connection.rollback()
+                raise
+            self._count_commit()
+
+    def _count_commit(self) -> None:
+        """Schedule a PASSIVE checkpoint every checkpoint_every commits"""
+        if not self.checkpoint_every:
+            return
+        self._commits += 1
+        if self._commits >= self.checkpoint_every:
+            self._commits = 0
+            # After the current callback, so the committing request is not delayed
+            asyncio.get_running_loop().call_soon(self._checkpoint)
+
+    def _checkpoint(self) -> None:
+        """Copy committed WAL frames into the database without blocking writers"""
+        connection = self._connection
+        if connection is None or connection.in_transaction:
+            return
+        try:
+            busy, wal_pages, checkpointed = connection.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+            logger.debug("WAL checkpoint", busy=bool(busy), wal_pages=wal_pages, checkpointed=checkpointed)
+        except sqlite3.Error as e:
+            logger.warning("WAL checkpoint failed", error=str(e))
+
+    async def configure_for_bulk(self, enabled: bool = True) -> None:
+        """
+        Tune the connection for (or back from) a large bulk load.
+
+        While enabled the WAL is checkpointed every 10k pages instead of 1k
+        (or the checkpoint_every backstop), so a metadata sync is not
+        interrupted by frequent checkpoints, and the page cache grows to
+        256MB so index pages stay resident while rows are inserted.
+        """
+        connection = await self.get_connection()
+        pages = BULK_WAL_AUTOCHECKPOINT if enabled else self._wal_autocheckpoint
+        cache_kib = BULK_CACHE_SIZE_KIB if enabled else DEFAULT_CACHE_SIZE_KIB
+        connection.execute(f"PRAGMA wal_autocheckpoint = {pages}")
+        connection.execute(f"PRAGMA cache_size = -{cache_kib}")
+        logger.debug("Bulk load mode", enabled=enabled, wal_autocheckpoint=pages, cache_size_kib=cache_kib)
+
+    async def drop_indexes(self, tables: Sequence[str]) -> List[str]:
+        """
+        Drop the explicit indexes on the given tables ahead of a bulk load.
+
+        Indexes backing PRIMARY KEY/UNIQUE constraints are kept. Returns the
+        CREATE INDEX statements to pass to recreate_indexes() afterwards.
+        """
+        connection = await self.get_connection()
+        placeholders = ", ".join("?" for _ in tables)
+        rows = connection.execute(
+            f"SELECT name, sql FROM sqlite_master "
+            f"WHERE type = 'index' AND sql IS NOT NULL AND tbl_name IN ({placeholders})",
+            tuple(tables),
+        ).fetchall()
+
+        for name, _ in rows:
+            connection.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+        logger.debug("Dropped indexes for bulk load", count=len(rows))
+        return [sql for _, sql in rows]
+
+    async def recreate_indexes(self, ddl: Sequence[str]) -> None:
+        """Replay CREATE INDEX statements returned by drop_indexes()"""
+        connection = await self.get_connection()
+        for statement in ddl:
+            connection.execute(statement)
+        logger.debug("Recreated indexes after bulk load", count=len(ddl))
+
+    async def maintenance(self, level: Literal["light", "full"] = "light") -> None:
+        """
+        Keep a long-lived database file healthy.
+
+        "light" refreshes planner statistics (ANALYZE, PRAGMA optimize) and
+        truncates the WAL; "full" first rebuilds the file with VACUUM.
+        Skipped while a write transaction (e.g. a metadata sync) is open.
+        """
+        connection = await self.get_connection()
+        if self.is_writing or connection.in_transaction:
+            logger.debug("Database maintenance skipped, transaction open", level=level)
+            return
+
+        async with self._write_lock:
+            try:
+                if level == "full":
+                    connection.execute("VACUUM")
+                connection.execute("ANALYZE")
+                connection.execute("PRAGMA optimize")
+                # Last, so the WAL written by VACUUM/ANALYZE is checkpointed too
+                busy, _, _ = connection.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+            except sqlite3.Error as e:
+                raise DatabaseError(f"Database maintenance failed: {e}") from e
+
+        logger.info("Database maintenance completed", level=level, checkpoint_busy=bool(busy))
+
     async def close(self) -> None:
         """Close database connection"""
         if self._connection:
             self._connection.close()
             self._connection = None
+            self._migrated = False
             logger.debug("SQLite connection closed")
 
     async def __aenter__(self) -> 'Database':
@@ -71,4 +268,64 @@ class Database:
         return self
 
     async def __aexit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
-        await self.close()
\ No newline at end of file
+        await self.close()
+
+
+class DatabasePool(Database):
+    """
+    One read-write connection plus a small set of read-only connections.
+
+    SELECTs issued through get_read_connection() use the read-only connections,
+    so under WAL they read the last committed snapshot and are not affected by
+    a long write transaction (e.g. a metadata sync) open on the writer.
+    """
+
+    def __init__(
+        self,
+        db_path: Union[str, Path] = "./d365fo-mcp.db",
+        readers: int = 2,
+        checkpoint_every: int = DEFAULT_CHECKPOINT_EVERY,
+    ):
+        super().__init__(db_path, checkpoint_every=checkpoint_every)
+        self.readers = max(1, readers)
+        self._read_connections: List[sqlite3.Connection] = []
+        self._next_reader = 0
+
+    async def get_read_connection(self) -> sqlite3.Connection:
+        """Get a read-only connection, opening up to `readers` round-robin"""
+        if len(self._read_connections) < self.readers:
+            # The schema must exist before a read-only connection can use it
+            await self.initialize()
+            self._read_connections.append(self._open_reader())
+            return self._read_connections[-1]
+
+        connection = self._read_connections[self._next_reader]
+        self._next_reader = (self._next_reader + 1) % self.readers
+        return connection
+
+    def _open_reader(self) -> sqlite3.Connection:
+        try:
+            connection = sqlite3.connect(
+                f"{self.db_path.resolve().as_uri()}?mode=ro",
+                uri=True,
+                check_same_thread=False,
+                timeout=30.0,
+                cached_statements=STATEMENT_CACHE_SIZE,
+            )
+            connection.row_factory = sqlite3.Row
+            for pragma in READ_CONNECTION_PRAGMAS:
+                connection.execute(pragma)
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Failed to open read-only SQLite connection: {e}") from e
+
+        logger.debug("SQLite read connection established",
+                     db_path=str(self.db_path), readers=len(self._read_connections) + 1)
+        return connection
+
+    async def close(self) -> None:
+        """Close the read connections and the writer"""
+        for connection in self._read_connections:
+            connection.close()
+        self._read_connections.clear()
+        self._next_reader = 0
+        await super().close()
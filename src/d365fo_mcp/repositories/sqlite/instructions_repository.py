@@ -6,23 +6,217 @@ Stores entity instructions and usage analytics in SQLite database.
 
 import sqlite3
 import json
+import re
 import uuid
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Union
+from typing import Dict, Any, AsyncIterator, List, Literal, Optional, Sequence, Tuple, Union
 from datetime import datetime, timedelta
 import structlog
 
-from ..instructions.interface import IInstructionsRepository
-from .database import Database, DatabaseError
+from ..instructions.interface import INSTRUCTION_FIELDS, IInstructionsRepository
+from .database import Database, DatabaseError, MAX_SQL_VARIABLES, SEARCH_FETCH_SIZE, batched, placeholders
+
+try:
+    import orjson
+
+    def _json_text(obj: Any) -> str:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+
+    def _json_loads(text: str) -> Any:
+        return orjson.loads(text)
+except ImportError:  # orjson is part of the optional "speedups" extra
+    def _json_text(obj: Any) -> str:
+        return json.dumps(obj, default=str, separators=(",", ":"), ensure_ascii=False)
+
+    def _json_loads(text: str) -> Any:
+        return json.loads(text)
 
 logger = structlog.get_logger(__name__)
 
+_INSERT_INSTRUCTION_SQL = """
+    INSERT INTO entity_instructions 
+    (id, entity_name, operation_type, title, description, example_query, 
+     example_data, tags, success_count, failure_count, created_at, updated_at, created_by)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0, 0, ?, ?, ?)
+"""
+
+
+_SELECT_INSTRUCTION_SQL = """
+    SELECT id, entity_name, operation_type, title, description, example_query, 
+           example_data, tags, success_count, failure_count, 
+           created_at, updated_at, created_by
+    FROM entity_instructions 
+"""
+
+
+_INSERT_USAGE_SQL = """
+    INSERT INTO instruction_usage_stats 
+    (instruction_id, success, feedback_score, metadata, recorded_at)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+# Usage inside a time window: whole hours come from instruction_usage_rollup,
+# the partial first hour from the raw rows. Parameters: hour bucket, cutoff, next hour
+_USAGE_WINDOW_SQL = """
+    WITH usage AS (
+        SELECT instruction_id, uses, successes, feedback_sum, feedback_count
+        FROM instruction_usage_rollup
+        WHERE hour_bucket > ?
+        UNION ALL
+        SELECT instruction_id, 1, CASE WHEN success THEN 1 ELSE 0 END,
+               COALESCE(feedback_score, 0), feedback_score IS NOT NULL
+        FROM instruction_usage_stats
+        WHERE recorded_at > ? AND recorded_at < ?
+    )
+"""
+
+# Instruction search and the no-terms listing; {columns} are i.<field> names
+_SEARCH_INSTRUCTIONS_TEMPLATE = """
+    SELECT {columns}
+    FROM instructions_fts
+    JOIN entity_instructions i ON i.id = instructions_fts.id
+    WHERE instructions_fts MATCH ?
+    ORDER BY instructions_fts.rank
+    LIMIT ? OFFSET ?
+"""
+_LIST_INSTRUCTIONS_TEMPLATE = """
+    SELECT {columns}
+    FROM entity_instructions i
+    ORDER BY i.updated_at DESC
+    LIMIT ? OFFSET ?
+"""
+
+_SEARCH_TERM = re.compile(r"\w+")
+
+# Cached get_entity_instructions results, most recently used last
+ENTITY_INSTRUCTIONS_CACHE_SIZE = 256
+
+# Stored JSON for missing tags / usage metadata, without serializing anything
+_EMPTY_TAGS = "[]"
+_EMPTY_JSON_OBJECT = "{}"
+
+
+def _search_statement(
+    query: str, limit: int, skip: int, fields: Sequence[str] = INSTRUCTION_FIELDS
+) -> Tuple[str, Tuple[Any, ...]]:
+    """
+    SQL and parameters for an instruction search selecting `fields`.
+    
+    Each word of the query becomes a quoted prefix term so user input never
+    reaches FTS5 query syntax; a query without words lists all instructions.
+    """
+    columns = ", ".join(f"i.{field}" for field in fields)
+    terms = _SEARCH_TERM.findall(query)
+    if not terms:
+        return _LIST_INSTRUCTIONS_TEMPLATE.format(columns=columns), (limit, skip)
+    match = " ".join(f'"{term}"*' for term in terms)
+    return _SEARCH_INSTRUCTIONS_TEMPLATE.format(columns=columns), (match, limit, skip)
+
+
+def _instruction_fields(row: sqlite3.Row, fields: Sequence[str]) -> Dict[str, Any]:
+    """Partial instruction dict from a row selecting `fields`, decoded like _instruction_from_row"""
+    instruction = dict(zip(fields, row, strict=True))
+    if "tags" in instruction:
+        instruction["tags"] = _tags_from_json(instruction["tags"])
+    for counter in ("success_count", "failure_count"):
+        if counter in instruction:
+            instruction[counter] = instruction[counter] or 0
+    return instruction
+
+
+def _copy_instructions(instructions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Copies of cached instruction dicts that callers are free to mutate"""
+    return [{**instruction, "tags": list(instruction["tags"])} for instruction in instructions]
+
+
+def _tags_json(tags: Optional[List[str]]) -> str:
+    """Stored form of an instruction's tags"""
+    return _json_text(tags) if tags else _EMPTY_TAGS
+
+
+def _tags_from_json(text: Optional[str]) -> List[str]:
+    """Tags list from its stored form; untagged instructions skip the JSON parse"""
+    return _json_loads(text) if text and text != _EMPTY_TAGS else []
+
+
+def _usage_metadata_text(metadata: Union[Dict[str, Any], bytes, None]) -> str:
+    """Stored form of usage metadata given as a dict or pre-serialized JSON bytes"""
+    if isinstance(metadata, bytes):
+        return metadata.decode()
+    return _json_text(metadata) if metadata else _EMPTY_JSON_OBJECT
+
+
+def _usage_window(hours: int) -> Tuple[str, str, str]:
+    """_USAGE_WINDOW_SQL parameters for the last `hours` hours"""
+    cutoff = datetime.now() - timedelta(hours=hours)
+    next_hour = cutoff.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    cutoff_text = cutoff.isoformat()
+    return cutoff_text[:13], cutoff_text, next_hour.isoformat()
+
+
+def _instruction_from_row(row: sqlite3.Row) -> Dict[str, Any]:
+    """Instruction dict from a _SELECT_INSTRUCTION_SQL row"""
+    return {
+        "id": row[0],
+        "entity_name": row[1],
+        "operation_type": row[2],
+        "title": row[3],
+        "description": row[4],
+        "example_query": row[5],
+        "example_data": row[6],
+        "tags": _tags_from_json(row[7]),
+        "success_count": row[8] or 0,
+        "failure_count": row[9] or 0,
+        "created_at": row[10],
+        "updated_at": row[11],
+        "created_by": row[12]
+    }
+
+
+def _instruction_row(
+    entity_name: str,
+    operation_type: str,
+    instruction: Dict[str, Any]
+) -> Tuple[Any, ...]:
+    """Validate an instruction and build its INSERT row (id first)"""
+    # Validate required fields
+    if not instruction.get("title"):
+        raise DatabaseError("Instruction title is required")
+    if not instruction.get("description"):
+        raise DatabaseError("Instruction description is required")
+    
+    now = datetime.now().isoformat()
+    return (
+        str(uuid.uuid4()),
+        entity_name,
+        operation_type,
+        instruction["title"],
+        instruction["description"],
+        instruction.get("example_query"),
+        instruction.get("example_data"),
+        _tags_json(instruction.get("tags")),
+        now,
+        now,
+        instruction.get("created_by")
+    )
+
 
 class SQLiteInstructionsRepository(IInstructionsRepository):
     """SQLite implementation of instructions repository"""
     
-    def __init__(self, db_path: Union[str, Path] = "./d365fo-mcp.db"):
-        self.database = Database(db_path)
+    def __init__(self, database: Union[Database, str, Path] = "./d365fo-mcp.db"):
+        # A Database passed in is shared with other repositories and closed by
+        # its owner; a path gets a private Database that close() releases
+        self.database: Database
+        if isinstance(database, Database):
+            self._owns_database = False
+            self.database = database
+        else:
+            self._owns_database = True
+            self.database = Database(database)
+        # (entity_name, operation_type) -> ((MAX(updated_at), COUNT(*)), instructions)
+        self._entity_instructions_cache: OrderedDict[Tuple[str, Optional[str]], Tuple[Tuple[Any, ...], List[Dict[str, Any]]]] = OrderedDict()
     
     async def initialize(self) -> None:
         """Initialize the repository and database"""
@@ -31,7 +225,15 @@ class SQLiteInstructionsRepository(IInstructionsRepository):
     
     async def close(self) -> None:
         """Close repository connections"""
-        await self.database.close()
+        if self._owns_database:
+            await self.database.close()
+    
+    async def maintenance(self, level: Literal["light", "full"] = "light") -> None:
+        """Run database maintenance; "full" also merges the search index b-trees"""
+        if level == "full":
+            async with self.database.transaction() as connection:
+                connection.execute("INSERT INTO instructions_fts (instructions_fts) VALUES ('optimize')")
+        await self.database.maintenance(level)
     
     # Instruction operations
     async def save_instruction(
@@ -42,39 +244,12 @@ class SQLiteInstructionsRepository(IInstructionsRepository):
     ) -> str:
         """Save a new instruction"""
         try:
-            # Validate required fields
-            if not instruction.get("title"):
-                raise DatabaseError("Instruction title is required")
-            if not instruction.get("description"):
-                raise DatabaseError("Instruction description is required")
-                
-            connection = await self.database.get_connection()
-            
-            tags_json = json.dumps(instruction.get("tags", []), default=str)
-            
-            cursor = connection.execute("""
-                INSERT INTO entity_instructions 
-                (entity_name, operation_type, title, description, example_query, 
-                 example_data, tags, success_count, failure_count, created_at, updated_at, created_by)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                entity_name,
-                operation_type,
-                instruction["title"],
-                instruction["description"],
-                instruction.get("example_query"),
-                instruction.get("example_data"),
-                tags_json,
-                0,  # success_count
-                0,  # failure_count
-                datetime.now().isoformat(),
-                datetime.now().isoformat(),
-                instruction.get("created_by")
-            ))
-            
-            instruction_id = str(cursor.lastrowid)
-            
-            connection.commit()
+            row = _instruction_row(entity_name, operation_type, instruction)
+            
+            async with self.database.transaction() as connection:
+                connection.execute(_INSERT_INSTRUCTION_SQL, row)
+            instruction_id: str = row[0]
+            
             logger.info("Saved instruction", entity_name=entity_name, operation_type=operation_type, instruction_id=instruction_id)
             
             return instruction_id
@@ -83,6 +258,29 @@ class SQLiteInstructionsRepository(IInstructionsRepository):
             logger.error("Failed to save instruction", entity_name=entity_name, error=str(e))
             raise DatabaseError(f"Failed to save instruction: {e}")
     
+    async def save_instructions_bulk(
+        self,
+        items: List[Tuple[str, str, Dict[str, Any]]]
+    ) -> List[str]:
+        """Save several new instructions with one executemany in one transaction"""
+        if not items:
+            return []
+        try:
+            rows = [
+                _instruction_row(entity_name, operation_type, instruction)
+                for entity_name, operation_type, instruction in items
+            ]
+            
+            async with self.database.transaction() as connection:
+                connection.executemany(_INSERT_INSTRUCTION_SQL, rows)
+            
+            logger.info("Saved instructions", count=len(rows))
+            return [row[0] for row in rows]
+            
+        except Exception as e:
+            logger.error("Failed to save instructions", count=len(items), error=str(e))
+            raise DatabaseError(f"Failed to save instructions: {e}")
+    
     async def update_instruction(
         self,
         instruction_id: str,
@@ -90,29 +288,25 @@ class SQLiteInstructionsRepository(IInstructionsRepository):
     ) -> None:
         """Update an existing instruction"""
         try:
-            connection = await self.database.get_connection()
-            
-            tags_json = json.dumps(instruction.get("tags", []), default=str)
-            
-            cursor = connection.execute("""
-                UPDATE entity_instructions 
-                SET title = ?, description = ?, example_query = ?, example_data = ?, 
-                    tags = ?, updated_at = ?
-                WHERE id = ?
-            """, (
-                instruction.get("title", ""),
-                instruction.get("description", ""),
-                instruction.get("example_query"),
-                instruction.get("example_data"),
-                tags_json,
-                datetime.now().isoformat(),
-                instruction_id
-            ))
-            
-            if cursor.rowcount == 0:
-                raise DatabaseError(f"Instruction {instruction_id} not found")
-            
-            connection.commit()
+            async with self.database.transaction() as connection:
+                cursor = connection.execute("""
+                    UPDATE entity_instructions 
+                    SET title = ?, description = ?, example_query = ?, example_data = ?, 
+                        tags = ?, updated_at = ?
+                    WHERE id = ?
+                """, (
+                    instruction.get("title", ""),
+                    instruction.get("description", ""),
+                    instruction.get("example_query"),
+                    instruction.get("example_data"),
+                    _tags_json(instruction.get("tags")),
+                    datetime.now().isoformat(),
+                    instruction_id
+                ))
+                
+                if cursor.rowcount == 0:
+                    raise DatabaseError(f"Instruction {instruction_id} not found")
+            
             logger.info("Updated instruction", instruction_id=instruction_id)
             
         except Exception as e:
@@ -122,78 +316,80 @@ class SQLiteInstructionsRepository(IInstructionsRepository):
     async def get_instruction(self, instruction_id: str) -> Optional[Dict[str, Any]]:
         """Get instruction by ID"""
         try:
-            connection = await self.database.get_connection()
+            connection = await self.database.get_read_connection()
             
-            cursor = connection.execute("""
-                SELECT entity_name, operation_type, instruction, created_at, updated_at
-                FROM entity_instructions 
-                WHERE id = ?
-            """, (instruction_id,))
+            cursor = connection.execute(
+                _SELECT_INSTRUCTION_SQL + "WHERE id = ?", (instruction_id,)
+            )
             
             row = cursor.fetchone()
-            if row:
-                return {
-                    "id": instruction_id,
-                    "entity_name": row[0],
-                    "operation_type": row[1], 
-                    "instruction": json.loads(row[2]),
-                    "created_at": row[3],
-                    "updated_at": row[4]
-                }
-            
-            return None
+            return _instruction_from_row(row) if row else None
             
         except Exception as e:
             logger.error("Failed to get instruction", instruction_id=instruction_id, error=str(e))
             return None
     
+    async def get_instructions_many(
+        self, instruction_ids: List[str]
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Get several instructions with one IN query per 999 ids"""
+        found: Dict[str, Optional[Dict[str, Any]]] = dict.fromkeys(instruction_ids)
+        unique_ids = list(found)
+        try:
+            connection = await self.database.get_read_connection()
+            
+            for chunk in batched(unique_ids, MAX_SQL_VARIABLES):
+                cursor = connection.execute(
+                    _SELECT_INSTRUCTION_SQL + f"WHERE id IN ({placeholders(len(chunk))})",
+                    chunk
+                )
+                for row in cursor:
+                    found[row[0]] = _instruction_from_row(row)
+            
+            return found
+            
+        except Exception as e:
+            logger.error("Failed to get instructions", count=len(unique_ids), error=str(e))
+            raise DatabaseError(f"Failed to get instructions: {e}")
+    
     async def get_entity_instructions(
         self,
         entity_name: str,
         operation_type: Optional[str] = None
     ) -> List[Dict[str, Any]]:
-        """Get instructions for an entity and operation"""
+        """Get instructions for an entity and operation (LRU cached, validated per call)"""
         try:
-            connection = await self.database.get_connection()
+            connection = await self.database.get_read_connection()
             
             if operation_type:
-                cursor = connection.execute("""
-                    SELECT id, operation_type, title, description, example_query, 
-                           example_data, tags, success_count, failure_count, 
-                           created_at, updated_at, created_by
-                    FROM entity_instructions 
-                    WHERE entity_name = ? AND operation_type = ?
-                    ORDER BY updated_at DESC
-                """, (entity_name, operation_type))
+                where = "WHERE entity_name = ? AND operation_type = ?"
+                params: Tuple[str, ...] = (entity_name, operation_type)
             else:
-                cursor = connection.execute("""
-                    SELECT id, operation_type, title, description, example_query, 
-                           example_data, tags, success_count, failure_count, 
-                           created_at, updated_at, created_by
-                    FROM entity_instructions 
-                    WHERE entity_name = ?
-                    ORDER BY operation_type, updated_at DESC
-                """, (entity_name,))
-            
-            instructions = []
-            for row in cursor.fetchall():
-                instructions.append({
-                    "id": row[0],
-                    "entity_name": entity_name,
-                    "operation_type": row[1],
-                    "title": row[2],
-                    "description": row[3],
-                    "example_query": row[4],
-                    "example_data": row[5],
-                    "tags": json.loads(row[6]) if row[6] else [],
-                    "success_count": row[7] or 0,
-                    "failure_count": row[8] or 0,
-                    "created_at": row[9],
-                    "updated_at": row[10],
-                    "created_by": row[11]
-                })
-            
-            return instructions
+                where = "WHERE entity_name = ?"
+                params = (entity_name,)
+            
+            # Any insert, update, delete or usage count change moves this version
+            version = tuple(connection.execute(
+                "SELECT MAX(updated_at), COUNT(*) FROM entity_instructions " + where, params
+            ).fetchone())
+            
+            cache = self._entity_instructions_cache
+            key = (entity_name, operation_type)
+            cached = cache.get(key)
+            if cached is not None and cached[0] == version:
+                cache.move_to_end(key)
+                return _copy_instructions(cached[1])
+            
+            order = " ORDER BY updated_at DESC" if operation_type else " ORDER BY operation_type, updated_at DESC"
+            cursor = connection.execute(_SELECT_INSTRUCTION_SQL + where + order, params)
+            instructions = [_instruction_from_row(row) for row in cursor]
+            
+            cache[key] = (version, instructions)
+            cache.move_to_end(key)
+            if len(cache) > ENTITY_INSTRUCTIONS_CACHE_SIZE:
+                cache.popitem(last=False)
+            
+            return _copy_instructions(instructions)
             
         except Exception as e:
             logger.error("Failed to get entity instructions", entity_name=entity_name, error=str(e))
@@ -203,58 +399,86 @@ class SQLiteInstructionsRepository(IInstructionsRepository):
         self,
         query: str,
         limit: int = 20,
-        skip: int = 0
+        skip: int = 0,
+        fields: Optional[Sequence[str]] = None
     ) -> List[Dict[str, Any]]:
-        """Search instructions by content"""
+        """
+        Search instructions by content (FTS5 index, best match first).
+        
+        Unknown fields raise ValueError before the query runs, so unlike
+        database errors (logged, returning []) it reaches the caller.
+        """
+        if fields is not None:
+            fields = tuple(fields)
+            unknown = set(fields).difference(INSTRUCTION_FIELDS)
+            if unknown:
+                raise ValueError(f"Unknown instruction fields: {sorted(unknown)}")
         try:
-            connection = await self.database.get_connection()
-            
-            search_pattern = f"%{query}%"
-            
-            cursor = connection.execute("""
-                SELECT id, entity_name, operation_type, title, description, example_query, 
-                       example_data, tags, success_count, failure_count, 
-                       created_at, updated_at, created_by
-                FROM entity_instructions 
-                WHERE entity_name LIKE ? OR title LIKE ? OR description LIKE ?
-                ORDER BY updated_at DESC
-                LIMIT ? OFFSET ?
-            """, (search_pattern, search_pattern, search_pattern, limit, skip))
-            
-            instructions = []
-            for row in cursor.fetchall():
-                instructions.append({
-                    "id": row[0],
-                    "entity_name": row[1],
-                    "operation_type": row[2],
-                    "title": row[3],
-                    "description": row[4],
-                    "example_query": row[5],
-                    "example_data": row[6],
-                    "tags": json.loads(row[7]) if row[7] else [],
-                    "success_count": row[8] or 0,
-                    "failure_count": row[9] or 0,
-                    "created_at": row[10],
-                    "updated_at": row[11],
-                    "created_by": row[12]
-                })
-            
-            return instructions
+            connection = await self.database.get_read_connection()
+            
+            if fields is None:
+                cursor = connection.execute(*_search_statement(query, limit, skip))
+                return [_instruction_from_row(row) for row in cursor]
+            
+            # Only the requested columns are read and decoded
+            cursor = connection.execute(*_search_statement(query, limit, skip, fields))
+            return [_instruction_fields(row, fields) for row in cursor]
             
         except Exception as e:
             logger.error("Failed to search instructions", query=query, error=str(e))
             return []
     
-    async def delete_instruction(self, instruction_id: str) -> bool:
-        """Delete an instruction"""
+    async def iter_search_instructions(
+        self,
+        query: str,
+        limit: int = 20,
+        skip: int = 0
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream instructions matching a search in SEARCH_FETCH_SIZE batches"""
+        try:
+            connection = await self.database.get_read_connection()
+            cursor = connection.execute(*_search_statement(query, limit, skip))
+        except Exception as e:
+            logger.error("Failed to search instructions", query=query, error=str(e))
+            raise DatabaseError(f"Failed to search instructions: {e}")
+        
+        try:
+            while rows := cursor.fetchmany(SEARCH_FETCH_SIZE):
+                for row in rows:
+                    yield _instruction_from_row(row)
+        finally:
+            cursor.close()
+    
+    async def rebuild_search_index(self) -> None:
+        """Repopulate instructions_fts from entity_instructions and merge its b-trees"""
         try:
-            connection = await self.database.get_connection()
+            async with self.database.transaction() as connection:
+                connection.execute("DELETE FROM instructions_fts")
+                connection.execute("DELETE FROM instructions_fts_rowid")
+                connection.execute(
+                    "INSERT INTO instructions_fts_rowid (instruction_id) SELECT id FROM entity_instructions"
+                )
+                connection.execute("""
+                    INSERT INTO instructions_fts (rowid, id, entity_name, title, description)
+                    SELECT k.fts_rowid, i.id, i.entity_name, i.title, i.description
+                    FROM instructions_fts_rowid k
+                    JOIN entity_instructions i ON i.id = k.instruction_id
+                """)
+                connection.execute("INSERT INTO instructions_fts (instructions_fts) VALUES ('optimize')")
             
-            cursor = connection.execute("""
-                DELETE FROM entity_instructions WHERE id = ?
-            """, (instruction_id,))
+            logger.info("Rebuilt instructions search index")
             
-            connection.commit()
+        except Exception as e:
+            logger.error("Failed to rebuild instructions search index", error=str(e))
+            raise DatabaseError(f"Failed to rebuild search index: {e}")
+    
+    async def delete_instruction(self, instruction_id: str) -> bool:
+        """Delete an instruction"""
+        try:
+            async with self.database.transaction() as connection:
+                cursor = connection.execute("""
+                    DELETE FROM entity_instructions WHERE id = ?
+                """, (instruction_id,))
             
             deleted = cursor.rowcount > 0
             if deleted:
@@ -272,47 +496,64 @@ class SQLiteInstructionsRepository(IInstructionsRepository):
         instruction_id: str,
         success: bool = True,
         feedback_score: Optional[int] = None,
-        metadata: Optional[Dict[str, Any]] = None
+        metadata: Optional[Dict[str, Any]] = None,
+        metadata_json: Optional[bytes] = None
     ) -> None:
         """Record instruction usage statistics"""
+        if metadata and metadata_json is not None:
+            raise ValueError("Pass metadata or metadata_json, not both")
         try:
-            connection = await self.database.get_connection()
-            
-            metadata_json = json.dumps(metadata or {}, default=str)
-            
-            connection.execute("""
-                INSERT INTO instruction_usage_stats 
-                (instruction_id, success, feedback_score, metadata, recorded_at)
-                VALUES (?, ?, ?, ?, ?)
-            """, (
-                instruction_id,
-                success,
-                feedback_score,
-                metadata_json,
-                datetime.now().isoformat()
-            ))
-            
-            # Update success/failure counts in main table
-            if success:
-                connection.execute("""
-                    UPDATE entity_instructions 
-                    SET success_count = success_count + 1, updated_at = ?
-                    WHERE id = ?
-                """, (datetime.now().isoformat(), instruction_id))
-            else:
-                connection.execute("""
-                    UPDATE entity_instructions 
-                    SET failure_count = failure_count + 1, updated_at = ?
-                    WHERE id = ?
-                """, (datetime.now().isoformat(), instruction_id))
+            metadata_text = _usage_metadata_text(
+                metadata_json if metadata_json is not None else metadata
+            )
+            
+            # The instruction_usage_stats_counts trigger bumps the
+            # instruction's success/failure count in the same statement
+            async with self.database.transaction() as connection:
+                connection.execute(_INSERT_USAGE_SQL, (
+                    instruction_id,
+                    success,
+                    feedback_score,
+                    metadata_text,
+                    datetime.now().isoformat()
+                ))
             
-            connection.commit()
             logger.info("Recorded instruction usage", instruction_id=instruction_id, success=success)
             
         except Exception as e:
             logger.error("Failed to record instruction usage", instruction_id=instruction_id, error=str(e))
             raise DatabaseError(f"Failed to record instruction usage: {e}")
     
+    async def record_instruction_usage_bulk(
+        self,
+        rows: List[Tuple[str, bool, Optional[int], Union[Dict[str, Any], bytes, None]]]
+    ) -> None:
+        """Record several instruction usages with one executemany in one transaction"""
+        if not rows:
+            return
+        try:
+            recorded_at = datetime.now().isoformat()
+            params = [
+                (
+                    instruction_id,
+                    success,
+                    feedback_score,
+                    _usage_metadata_text(metadata),
+                    recorded_at
+                )
+                for instruction_id, success, feedback_score, metadata in rows
+            ]
+            
+            # Counters and hourly rollups follow from the usage insert trigger
+            async with self.database.transaction() as connection:
+                connection.executemany(_INSERT_USAGE_SQL, params)
+            
+            logger.info("Recorded instruction usage", count=len(params))
+            
+        except Exception as e:
+            logger.error("Failed to record instruction usage", count=len(rows), error=str(e))
+            raise DatabaseError(f"Failed to record instruction usage: {e}")
+    
     async def get_instruction_stats(
         self,
         instruction_id: Optional[str] = None,
@@ -321,49 +562,50 @@ class SQLiteInstructionsRepository(IInstructionsRepository):
     ) -> Dict[str, Any]:
         """Get instruction usage statistics"""
         try:
-            connection = await self.database.get_connection()
+            connection = await self.database.get_read_connection()
             
-            # Base time filter
-            time_filter = (datetime.now() - timedelta(hours=hours)).isoformat()
+            window = _usage_window(hours)
             
             if instruction_id:
                 # Stats for specific instruction
-                cursor = connection.execute("""
-                    SELECT COUNT(*) as total_uses,
-                           SUM(CASE WHEN success THEN 1 ELSE 0 END) as successful_uses,
-                           AVG(CASE WHEN feedback_score IS NOT NULL THEN feedback_score END) as avg_feedback
-                    FROM instruction_usage_stats 
-                    WHERE instruction_id = ? AND recorded_at > ?
-                """, (instruction_id, time_filter))
+                cursor = connection.execute(_USAGE_WINDOW_SQL + """
+                    SELECT SUM(uses) as total_uses,
+                           SUM(successes) as successful_uses,
+                           CAST(SUM(feedback_sum) AS REAL) / NULLIF(SUM(feedback_count), 0) as avg_feedback
+                    FROM usage
+                    WHERE instruction_id = ?
+                """, (*window, instruction_id))
                 
                 row = cursor.fetchone()
+                total_uses = row[0] or 0
                 
                 return {
                     "instruction_id": instruction_id,
-                    "total_uses": row[0] or 0,
+                    "total_uses": total_uses,
                     "successful_uses": row[1] or 0,
-                    "success_rate": (row[1] / row[0]) if row[0] > 0 else 0,
+                    "success_rate": (row[1] / total_uses) if total_uses > 0 else 0,
                     "average_feedback": row[2] or 0
                 }
                 
             elif entity_name:
                 # Stats for entity instructions
-                cursor = connection.execute("""
+                cursor = connection.execute(_USAGE_WINDOW_SQL + """
                     SELECT ei.operation_type,
-                           COUNT(ius.instruction_id) as total_uses,
-                           SUM(CASE WHEN ius.success THEN 1 ELSE 0 END) as successful_uses
+                           SUM(u.uses) as total_uses,
+                           SUM(u.successes) as successful_uses
                     FROM entity_instructions ei
-                    LEFT JOIN instruction_usage_stats ius ON ei.id = ius.instruction_id AND ius.recorded_at > ?
+                    LEFT JOIN usage u ON ei.id = u.instruction_id
                     WHERE ei.entity_name = ?
                     GROUP BY ei.operation_type
-                """, (time_filter, entity_name))
+                """, (*window, entity_name))
                 
                 operations = {}
-                for row in cursor.fetchall():
+                for row in cursor:
+                    total_uses = row[1] or 0
                     operations[row[0]] = {
-                        "total_uses": row[1] or 0,
+                        "total_uses": total_uses,
                         "successful_uses": row[2] or 0,
-                        "success_rate": (row[2] / row[1]) if row[1] > 0 else 0
+                        "success_rate": (row[2] / total_uses) if total_uses > 0 else 0
                     }
                 
                 return {
@@ -373,20 +615,20 @@ class SQLiteInstructionsRepository(IInstructionsRepository):
             
             else:
                 # Overall stats
-                cursor = connection.execute("""
-                    SELECT COUNT(*) as total_uses,
-                           SUM(CASE WHEN success THEN 1 ELSE 0 END) as successful_uses,
+                cursor = connection.execute(_USAGE_WINDOW_SQL + """
+                    SELECT SUM(uses) as total_uses,
+                           SUM(successes) as successful_uses,
                            COUNT(DISTINCT instruction_id) as instructions_used
-                    FROM instruction_usage_stats 
-                    WHERE recorded_at > ?
-                """, (time_filter,))
+                    FROM usage
+                """, window)
                 
                 row = cursor.fetchone()
+                total_uses = row[0] or 0
                 
                 return {
-                    "total_uses": row[0] or 0,
+                    "total_uses": total_uses,
                     "successful_uses": row[1] or 0,
-                    "success_rate": (row[1] / row[0]) if row[0] > 0 else 0,
+                    "success_rate": (row[1] / total_uses) if total_uses > 0 else 0,
                     "instructions_used": row[2] or 0
                 }
             
@@ -397,17 +639,16 @@ class SQLiteInstructionsRepository(IInstructionsRepository):
     async def get_repository_info(self) -> Dict[str, Any]:
         """Get repository implementation information"""
         try:
-            connection = await self.database.get_connection()
+            connection = await self.database.get_read_connection()
             
             # Get basic stats
             cursor = connection.execute("SELECT COUNT(*) FROM entity_instructions")
             total_instructions = cursor.fetchone()[0]
             
-            cursor = connection.execute("""
-                SELECT COUNT(*) FROM instruction_usage_stats 
-                WHERE recorded_at > ?
-            """, ((datetime.now() - timedelta(days=1)).isoformat(),))
-            daily_usage = cursor.fetchone()[0]
+            cursor = connection.execute(
+                _USAGE_WINDOW_SQL + "SELECT SUM(uses) FROM usage", _usage_window(24)
+            )
+            daily_usage = cursor.fetchone()[0] or 0
             
             return {
                 "type": "sqlite_instructions_repository",
@@ -4,19 +4,37 @@ SQLite Metadata Repository Implementation
 Provides high-performance metadata operations using optimized SQLite queries.
 """
 
+import asyncio
+import base64
+import hashlib
 import sqlite3
 import json
 import time
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Union
+from collections import defaultdict
+from typing import Dict, Any, AsyncIterator, List, Literal, Mapping, Optional, Sequence, Tuple, Union
 from datetime import datetime, timedelta
 import structlog
 
-from ..metadata.interface import IMetadataRepository
-from .database import Database, DatabaseError
+from ..metadata.interface import EntitySummary, IMetadataRepository
+from .database import Database, DatabaseError, MAX_SQL_VARIABLES, SEARCH_FETCH_SIZE, batched, placeholders
 
 logger = structlog.get_logger(__name__)
 
+# Usage stats are telemetry: buffer them and write in batches, either every
+# USAGE_FLUSH_INTERVAL_SECONDS or as soon as USAGE_FLUSH_MAX_ROWS accumulate
+USAGE_FLUSH_INTERVAL_SECONDS = 0.2
+USAGE_FLUSH_MAX_ROWS = 1000
+# Flushes are skipped while another writer holds the database (e.g. a metadata
+# sync); past this many buffered rows new stats are dropped instead
+USAGE_BUFFER_MAX_ROWS = 10 * USAGE_FLUSH_MAX_ROWS
+
+# (recorded_at, operation, entity_name, success, execution_time_ms, metadata)
+_UsageRow = Tuple[str, str, Optional[str], bool, Optional[int], Union[Dict[str, Any], bytes, None]]
+
+# Light database maintenance (ANALYZE, optimize, WAL truncate) for long-running servers
+MAINTENANCE_INTERVAL_SECONDS = 6 * 60 * 60
+
 # Optimized queries for high-performance metadata operations
 OPTIMIZED_QUERIES = {
     "search_entities": """
@@ -67,6 +85,15 @@ OPTIMIZED_QUERIES = {
         GROUP BY et.id, es.id
     """,
     
+    "get_entity_etag": """
+        SELECT et.id as entity_type_id, es.id as entity_set_id,
+               (SELECT MAX(id) FROM metadata_sync) as sync_id
+        FROM entity_types et
+        JOIN entity_sets es ON es.entity_type_id = et.id
+        WHERE et.name = ? OR es.name = ?
+        LIMIT 1
+    """,
+    
     "get_entity_properties": """
         SELECT 
             name, type, nullable, max_length, precision, scale,
@@ -94,23 +121,205 @@ OPTIMIZED_QUERIES = {
         )
         ORDER BY name ASC
     """,
+    
+    # Multi-key variants; {marks} is a "?, ?, ..." placeholder list
+    "get_entities_many": """
+        SELECT 
+            et.id as entity_type_id,
+            et.name as entity_type_name,
+            es.name as entity_set_name,
+            es.name as use_for_queries
+        FROM entity_types et
+        JOIN entity_sets es ON es.entity_type_id = et.id
+        WHERE et.name IN ({marks}) OR es.name IN ({marks})
+    """,
+    
+    "get_entity_properties_many": """
+        SELECT 
+            entity_type_id, name, type, nullable, max_length, precision, scale,
+            is_key, is_enum, enum_type, annotations, ordinal_position
+        FROM entity_properties
+        WHERE entity_type_id IN ({marks})
+        ORDER BY entity_type_id, ordinal_position ASC, name ASC
+    """,
+    
+    "get_entity_enum_fields_many": """
+        SELECT 
+            et.name as entity_type_name,
+            es.name as entity_set_name,
+            ep.name as field_name,
+            ep.enum_type,
+            'Microsoft.Dynamics.DataEntities.' || ep.enum_type as odata_syntax
+        FROM entity_properties ep
+        JOIN entity_types et ON ep.entity_type_id = et.id
+        LEFT JOIN entity_sets es ON es.entity_type_id = et.id
+        WHERE ep.is_enum = 1 AND (et.name IN ({marks}) OR es.name IN ({marks}))
+        ORDER BY ep.name ASC
+    """,
+    
+    "get_navigation_properties_many": """
+        SELECT 
+            entity_type_id, name, target_entity_type, relationship_type, 
+            is_collection, nullable, annotations
+        FROM navigation_properties
+        WHERE entity_type_id IN ({marks})
+        ORDER BY entity_type_id, name ASC
+    """,
 }
 
 
+def _search_match(row: sqlite3.Row) -> Dict[str, Any]:
+    """Entity match dict from a search_entities row"""
+    return {
+        "entity_name": row["entity_type_name"],
+        "entity_set": row["entity_set_name"],
+        "use_for_queries": row["use_for_queries"],
+        "description": row["description"],
+        "relevance": row["relevance"]
+    }
+
+
+def _usage_metadata(metadata: Union[Dict[str, Any], bytes, None]) -> Optional[str]:
+    """usage_stats.metadata column value; pre-serialized JSON skips json.dumps"""
+    if isinstance(metadata, bytes):
+        return metadata.decode()
+    return json.dumps(metadata, default=str) if metadata else None
+
+
+def _encode_page_token(entity_set_name: str) -> str:
+    """Opaque page token for the last entity set name of a page"""
+    return base64.urlsafe_b64encode(entity_set_name.encode()).decode()
+
+
+def _decode_page_token(token: str) -> str:
+    """Entity set name a page token continues after"""
+    return base64.urlsafe_b64decode(token.encode()).decode()
+
+
+def _entity_etag(row: sqlite3.Row) -> str:
+    """Version tag for an entity: its row ids plus the metadata sync that wrote them"""
+    key = f"{row['entity_type_id']}:{row['entity_set_id']}:{row['sync_id']}"
+    return hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+
+
+def _entity_metadata(
+    entity_info: sqlite3.Row,
+    property_rows: Sequence[sqlite3.Row],
+    navigation_rows: Sequence[sqlite3.Row],
+    query_time_ms: float
+) -> Dict[str, Any]:
+    """Assemble the get_cached_entity_metadata() result from query rows"""
+    fields = []
+    key_fields = []
+    
+    for prop in property_rows:
+        field = {
+            "name": prop["name"],
+            "type": prop["type"],
+            "nullable": bool(prop["nullable"]),
+            "max_length": prop["max_length"],
+            "precision": prop["precision"], 
+            "scale": prop["scale"],
+            "is_enum": bool(prop["is_enum"])
+        }
+        
+        if prop["is_enum"] and prop["enum_type"]:
+            field["enum_name"] = prop["enum_type"]
+            field["odata_syntax"] = f"Microsoft.Dynamics.DataEntities.{prop['enum_type']}"
+        
+        fields.append(field)
+        
+        if prop["is_key"]:
+            key_fields.append(prop["name"])
+    
+    navigation_properties = {}
+    for nav in navigation_rows:
+        navigation_properties[nav["name"]] = {
+            "target_entity": nav["target_entity_type"],
+            "relationship_type": nav["relationship_type"],
+            "is_collection": bool(nav["is_collection"]),
+            "nullable": bool(nav["nullable"])
+        }
+    
+    return {
+        "entity_name": entity_info["entity_type_name"],
+        "entity_set_name": entity_info["entity_set_name"],
+        "use_for_queries": entity_info["use_for_queries"],
+        "fields": fields,
+        "key_fields": key_fields,
+        "field_count": len(fields),
+        "navigation_properties": navigation_properties,
+        "relationship_count": len(navigation_properties),
+        "query_example": f'get_odata_entity("{entity_info["use_for_queries"]}", "?$top=10")',
+        "_performance": {
+            "query_time_ms": query_time_ms,
+            "source": "high_performance_sqlite"
+        }
+    }
+
+
 class SQLiteMetadataRepository(IMetadataRepository):
     """SQLite implementation of metadata repository with performance optimizations"""
     
-    def __init__(self, db_path: Union[str, Path] = "./d365fo-mcp.db"):
-        self.database = Database(db_path)
+    def __init__(self, database: Union[Database, str, Path] = "./d365fo-mcp.db"):
+        # A Database passed in is shared with other repositories and closed by
+        # its owner; a path gets a private Database that close() releases
+        self.database: Database
+        if isinstance(database, Database):
+            self._owns_database = False
+            self.database = database
+        else:
+            self._owns_database = True
+            self.database = Database(database)
+        self._usage_buffer: List[_UsageRow] = []
+        self._usage_dropped = 0
+        self._usage_flush_task: Optional[asyncio.Task[None]] = None
+        self._maintenance_task: Optional[asyncio.Task[None]] = None
     
     async def initialize(self) -> None:
         """Initialize the repository and database"""
         await self.database.initialize()
+        if self._usage_flush_task is None:
+            self._usage_flush_task = asyncio.create_task(self._usage_flush_loop())
+        if self._maintenance_task is None:
+            self._maintenance_task = asyncio.create_task(self._maintenance_loop())
         logger.info("SQLite metadata repository initialized")
     
     async def close(self) -> None:
         """Close repository connections"""
-        await self.database.close()
+        for task in (self._usage_flush_task, self._maintenance_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._usage_flush_task = self._maintenance_task = None
+        # Wait for any other writer rather than skip the final flush
+        await self._write_usage_buffer()
+        if self._owns_database:
+            await self.database.close()
+    
+    async def _usage_flush_loop(self) -> None:
+        """Periodically write buffered usage stats"""
+        while True:
+            await asyncio.sleep(USAGE_FLUSH_INTERVAL_SECONDS)
+            if self._usage_buffer:
+                await self.flush_usage_stats()
+    
+    async def _maintenance_loop(self) -> None:
+        """Periodically run light database maintenance"""
+        while True:
+            await asyncio.sleep(MAINTENANCE_INTERVAL_SECONDS)
+            try:
+                await self.maintenance("light")
+            except DatabaseError as e:
+                logger.warning("Scheduled database maintenance failed", error=str(e))
+    
+    async def maintenance(self, level: Literal["light", "full"] = "light") -> None:
+        """Flush buffered usage stats, then run database maintenance"""
+        await self.flush_usage_stats()
+        await self.database.maintenance(level)
     
     async def search_entities(self, pattern: str, limit: int = 20, skip: int = 0) -> Dict[str, Any]:
         """
@@ -121,7 +330,7 @@ class SQLiteMetadataRepository(IMetadataRepository):
         start_time = time.time()
         
         try:
-            connection = await self.database.get_connection()
+            connection = await self.database.get_read_connection()
             
             # Get matching entities with relevance scoring
             cursor = connection.execute(
@@ -129,16 +338,7 @@ class SQLiteMetadataRepository(IMetadataRepository):
                 (pattern, pattern, pattern, pattern, pattern, pattern, limit, skip)
             )
             
-            matches = []
-            for row in cursor.fetchall():
-                row_dict = dict(row)
-                matches.append({
-                    "entity_name": row_dict["entity_type_name"],
-                    "entity_set": row_dict["entity_set_name"],
-                    "use_for_queries": row_dict["use_for_queries"],
-                    "description": row_dict["description"],
-                    "relevance": row_dict["relevance"]
-                })
+            matches = [_search_match(row) for row in cursor.fetchall()]
             
             # Get total count for pagination
             cursor = connection.execute(
@@ -179,6 +379,33 @@ class SQLiteMetadataRepository(IMetadataRepository):
             logger.error("Failed to search entities", pattern=pattern, error=str(e))
             raise DatabaseError(f"Failed to search entities for pattern '{pattern}': {e}")
     
+    async def iter_search_entities(
+        self, pattern: str, limit: int = 20, skip: int = 0
+    ) -> AsyncIterator[EntitySummary]:
+        """
+        Stream entity search matches in SEARCH_FETCH_SIZE batches.
+        
+        Same query as search_entities() without the total count; the first
+        match is available before the rest are read. Rows become slotted
+        EntitySummary objects rather than dicts.
+        """
+        try:
+            connection = await self.database.get_read_connection()
+            cursor = connection.execute(
+                OPTIMIZED_QUERIES["search_entities"],
+                (pattern, pattern, pattern, pattern, pattern, pattern, limit, skip)
+            )
+        except Exception as e:
+            logger.error("Failed to search entities", pattern=pattern, error=str(e))
+            raise DatabaseError(f"Failed to search entities for pattern '{pattern}': {e}")
+        
+        try:
+            while rows := cursor.fetchmany(SEARCH_FETCH_SIZE):
+                for row in rows:
+                    yield EntitySummary(*row)
+        finally:
+            cursor.close()
+    
     async def get_cached_entity_metadata(self, entity_name: str) -> Optional[Dict[str, Any]]:
         """
         Get comprehensive entity metadata from populated database.
@@ -186,7 +413,7 @@ class SQLiteMetadataRepository(IMetadataRepository):
         start_time = time.time()
         
         try:
-            connection = await self.database.get_connection()
+            connection = await self.database.get_read_connection()
             
             # Get basic entity info
             cursor = connection.execute(
@@ -199,76 +426,22 @@ class SQLiteMetadataRepository(IMetadataRepository):
                 logger.debug("Entity not found", entity_name=entity_name)
                 return None
             
-            entity_info = dict(entity_row)
-            
-            # Get properties
-            cursor = connection.execute(
+            property_rows = connection.execute(
                 OPTIMIZED_QUERIES["get_entity_properties"],
                 (entity_name, entity_name)
-            )
+            ).fetchall()
             
-            fields = []
-            key_fields = []
-            
-            for prop_row in cursor.fetchall():
-                prop = dict(prop_row)
-                
-                field = {
-                    "name": prop["name"],
-                    "type": prop["type"],
-                    "nullable": bool(prop["nullable"]),
-                    "max_length": prop["max_length"],
-                    "precision": prop["precision"], 
-                    "scale": prop["scale"],
-                    "is_enum": bool(prop["is_enum"])
-                }
-                
-                if prop["is_enum"] and prop["enum_type"]:
-                    field["enum_name"] = prop["enum_type"]
-                    field["odata_syntax"] = f"Microsoft.Dynamics.DataEntities.{prop['enum_type']}"
-                
-                fields.append(field)
-                
-                if prop["is_key"]:
-                    key_fields.append(prop["name"])
-            
-            # Get navigation properties
-            cursor = connection.execute(
+            navigation_rows = connection.execute(
                 OPTIMIZED_QUERIES["get_navigation_properties"],
                 (entity_name, entity_name)
-            )
-            
-            navigation_properties = {}
-            for nav_row in cursor.fetchall():
-                nav = dict(nav_row)
-                navigation_properties[nav["name"]] = {
-                    "target_entity": nav["target_entity_type"],
-                    "relationship_type": nav["relationship_type"],
-                    "is_collection": bool(nav["is_collection"]),
-                    "nullable": bool(nav["nullable"])
-                }
+            ).fetchall()
             
             query_time_ms = (time.time() - start_time) * 1000
-            
-            result = {
-                "entity_name": entity_info["entity_type_name"],
-                "entity_set_name": entity_info["entity_set_name"],
-                "use_for_queries": entity_info["use_for_queries"],
-                "fields": fields,
-                "key_fields": key_fields,
-                "field_count": len(fields),
-                "navigation_properties": navigation_properties,
-                "relationship_count": len(navigation_properties),
-                "query_example": f'get_odata_entity("{entity_info["use_for_queries"]}", "?$top=10")',
-                "_performance": {
-                    "query_time_ms": query_time_ms,
-                    "source": "high_performance_sqlite"
-                }
-            }
+            result = _entity_metadata(entity_row, property_rows, navigation_rows, query_time_ms)
             
             logger.debug("Entity metadata retrieved",
                         entity_name=entity_name,
-                        field_count=len(fields),
+                        field_count=result["field_count"],
                         query_time_ms=query_time_ms)
             
             return result
@@ -277,26 +450,132 @@ class SQLiteMetadataRepository(IMetadataRepository):
             logger.error("Failed to get entity metadata", entity_name=entity_name, error=str(e))
             raise DatabaseError(f"Failed to get metadata for entity '{entity_name}': {e}")
     
+    async def get_cached_entity_metadata_etag(self, entity_name: str) -> Optional[str]:
+        """
+        Get the entity's version tag from a single indexed lookup.
+        
+        The normalized metadata tables only change on a metadata sync, so the
+        tag is derived from the entity's row ids and the latest sync id.
+        """
+        try:
+            connection = await self.database.get_read_connection()
+            row = connection.execute(
+                OPTIMIZED_QUERIES["get_entity_etag"],
+                (entity_name, entity_name)
+            ).fetchone()
+            return _entity_etag(row) if row else None
+            
+        except Exception as e:
+            logger.error("Failed to get entity etag", entity_name=entity_name, error=str(e))
+            raise DatabaseError(f"Failed to get etag for entity '{entity_name}': {e}")
+    
+    async def get_cached_entity_metadata_if_changed(
+        self, entity_name: str, etag: Optional[str]
+    ) -> Optional[Dict[str, Any]]:
+        """Get entity metadata, skipping the property queries when the etag matches"""
+        current = await self.get_cached_entity_metadata_etag(entity_name)
+        if current is None or current == etag:
+            return None
+        
+        result = await self.get_cached_entity_metadata(entity_name)
+        if result is not None:
+            result["_etag"] = current
+        return result
+    
+    async def get_cached_entity_metadata_many(
+        self, entity_names: List[str]
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Get metadata for several entities with set-based queries.
+        
+        Three queries per chunk of names (entities, properties, navigation
+        properties) instead of three per entity.
+        """
+        start_time = time.time()
+        found: Dict[str, Optional[Dict[str, Any]]] = dict.fromkeys(entity_names)
+        requested = list(found)
+        
+        try:
+            connection = await self.database.get_read_connection()
+            
+            # Requested name (type or set name) -> matching entity row
+            entities: Dict[str, sqlite3.Row] = {}
+            # Each name is bound twice (type name and set name)
+            for chunk in batched(requested, MAX_SQL_VARIABLES // 2):
+                query = OPTIMIZED_QUERIES["get_entities_many"].format(marks=placeholders(len(chunk)))
+                for row in connection.execute(query, (*chunk, *chunk)).fetchall():
+                    for name in (row["entity_type_name"], row["entity_set_name"]):
+                        if name in found and name not in entities:
+                            entities[name] = row
+            
+            type_ids = list({row["entity_type_id"] for row in entities.values()})
+            property_rows: Dict[int, List[sqlite3.Row]] = defaultdict(list)
+            navigation_rows: Dict[int, List[sqlite3.Row]] = defaultdict(list)
+            for chunk in batched(type_ids, MAX_SQL_VARIABLES):
+                marks = placeholders(len(chunk))
+                query = OPTIMIZED_QUERIES["get_entity_properties_many"].format(marks=marks)
+                for row in connection.execute(query, chunk).fetchall():
+                    property_rows[row["entity_type_id"]].append(row)
+                query = OPTIMIZED_QUERIES["get_navigation_properties_many"].format(marks=marks)
+                for row in connection.execute(query, chunk).fetchall():
+                    navigation_rows[row["entity_type_id"]].append(row)
+            
+            query_time_ms = (time.time() - start_time) * 1000
+            for name, row in entities.items():
+                type_id = row["entity_type_id"]
+                found[name] = _entity_metadata(
+                    row, property_rows[type_id], navigation_rows[type_id], query_time_ms
+                )
+            
+            logger.debug("Entity metadata retrieved",
+                        requested=len(requested),
+                        found=len(entities),
+                        query_time_ms=query_time_ms)
+            
+            return found
+            
+        except Exception as e:
+            logger.error("Failed to get entity metadata", count=len(requested), error=str(e))
+            raise DatabaseError(f"Failed to get metadata for {len(requested)} entities: {e}")
+    
     # Implement other required interface methods with basic implementations
     async def cache_entity_metadata(self, entity_name: str, metadata: Dict[str, Any]) -> None:
         """Cache entity metadata (not needed for pre-populated database)"""
         logger.debug("Cache entity metadata called (no-op for pre-populated DB)", entity_name=entity_name)
         pass
     
+    async def cache_entity_metadata_bulk(self, mapping: Mapping[str, Dict[str, Any]]) -> None:
+        """Cache metadata for several entities (not needed for pre-populated database)"""
+        logger.debug("Cache entity metadata bulk called (no-op for pre-populated DB)", count=len(mapping))
+    
     async def list_cached_entities(self) -> List[Dict[str, Any]]:
-        """List all cached entities with basic metadata"""
+        """List all cached entities with basic metadata (first 1000)"""
+        entities, _ = await self.list_cached_entities_page()
+        return entities
+    
+    async def list_cached_entities_page(
+        self, limit: int = 1000, after: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        List cached entities after a page token.
+        
+        Pages seek on the unique entity set name index (es.name > ?) instead
+        of scanning and discarding an OFFSET, so every page costs O(limit).
+        """
         try:
-            connection = await self.database.get_connection()
+            connection = await self.database.get_read_connection()
             
+            after_name = _decode_page_token(after) if after else ""
             cursor = connection.execute("""
                 SELECT es.name as entity_set_name, et.name as entity_type_name,
                        es.name as use_for_queries,
                        'D365 entity: ' || et.name as description
                 FROM entity_sets es
                 JOIN entity_types et ON es.entity_type_id = et.id
+                WHERE es.name > ?
                 ORDER BY es.name
-                LIMIT 1000
-            """)
+                LIMIT ?
+            """, (after_name, limit))
             
             entities = []
             for row in cursor.fetchall():
@@ -308,32 +587,33 @@ class SQLiteMetadataRepository(IMetadataRepository):
                     "description": row_dict["description"]
                 })
             
-            return entities
+            next_token = _encode_page_token(entities[-1]["entity_set"]) if len(entities) == limit else None
+            return entities, next_token
             
         except Exception as e:
             logger.error("Failed to list cached entities", error=str(e))
             raise DatabaseError(f"Failed to list entities: {e}")
     
-    async def cache_raw_metadata(self, metadata_xml: str) -> None:
+    async def cache_raw_metadata(self, metadata_xml: bytes) -> None:
         """Cache raw metadata XML (not needed for pre-populated database)"""
         logger.debug("Cache raw metadata called (no-op for pre-populated DB)")
         pass
     
-    async def get_cached_raw_metadata(self) -> Optional[str]:
+    async def get_cached_raw_metadata(self) -> Optional[bytes]:
         """Get cached raw metadata XML (not applicable)"""
         return None
     
     async def is_metadata_cache_valid(self) -> bool:
         """Check if metadata cache is valid (always true for pre-populated DB)"""
-        connection = await self.database.get_connection()
+        connection = await self.database.get_read_connection()
         cursor = connection.execute("SELECT COUNT(*) as count FROM entity_types")
         row = cursor.fetchone()
-        return row and row["count"] > 0
+        return bool(row and row["count"] > 0)
     
     async def search_enums(self, pattern: str, limit: int = 20, skip: int = 0) -> List[Dict[str, Any]]:
         """Search for enums by name pattern"""
         try:
-            connection = await self.database.get_connection()
+            connection = await self.database.get_read_connection()
             
             cursor = connection.execute("""
                 SELECT name,
@@ -359,7 +639,7 @@ class SQLiteMetadataRepository(IMetadataRepository):
     async def get_enum_metadata(self, enum_name: str) -> Optional[Dict[str, Any]]:
         """Get enum metadata with all values"""
         try:
-            connection = await self.database.get_connection()
+            connection = await self.database.get_read_connection()
             
             cursor = connection.execute("""
                 SELECT 
@@ -405,7 +685,7 @@ class SQLiteMetadataRepository(IMetadataRepository):
     async def get_entity_enum_fields(self, entity_name: str) -> Dict[str, Any]:
         """Get all enum fields for an entity"""
         try:
-            connection = await self.database.get_connection()
+            connection = await self.database.get_read_connection()
             
             cursor = connection.execute("""
                 SELECT 
@@ -433,6 +713,34 @@ class SQLiteMetadataRepository(IMetadataRepository):
             logger.error("Failed to get entity enum fields", entity_name=entity_name, error=str(e))
             raise DatabaseError(f"Failed to get enum fields for entity '{entity_name}': {e}")
     
+    async def get_entity_enum_fields_many(
+        self, entity_names: List[str]
+    ) -> Dict[str, Dict[str, Any]]:
+        """Get enum fields for several entities with one query per chunk of names"""
+        enum_fields: Dict[str, Dict[str, Any]] = {name: {} for name in entity_names}
+        requested = list(enum_fields)
+        
+        try:
+            connection = await self.database.get_read_connection()
+            
+            # Each name is bound twice (type name and set name)
+            for chunk in batched(requested, MAX_SQL_VARIABLES // 2):
+                query = OPTIMIZED_QUERIES["get_entity_enum_fields_many"].format(marks=placeholders(len(chunk)))
+                for row in connection.execute(query, (*chunk, *chunk)).fetchall():
+                    field = {
+                        "enum_name": row["enum_type"],
+                        "odata_syntax": row["odata_syntax"]
+                    }
+                    for name in {row["entity_type_name"], row["entity_set_name"]}:
+                        if name in enum_fields:
+                            enum_fields[name][row["field_name"]] = field
+            
+            return enum_fields
+            
+        except Exception as e:
+            logger.error("Failed to get entity enum fields", entity_count=len(requested), error=str(e))
+            raise DatabaseError(f"Failed to get enum fields for {len(requested)} entities: {e}")
+    
     async def clear_metadata_cache(self) -> None:
         """Clear all metadata cache"""
         logger.warning("Clear metadata cache called on pre-populated database - this will remove all data!")
@@ -445,12 +753,89 @@ class SQLiteMetadataRepository(IMetadataRepository):
         entity_name: Optional[str] = None,
         success: bool = True,
         execution_time_ms: Optional[int] = None,
-        metadata: Optional[Dict[str, Any]] = None
+        metadata: Optional[Dict[str, Any]] = None,
+        metadata_json: Optional[bytes] = None
     ) -> None:
-        """Record usage statistics (optional for performance reasons)"""
-        logger.debug("Usage stat recorded", operation=operation, entity_name=entity_name, success=success)
-        # Could implement if usage tracking is needed
-        pass
+        """Buffer a usage statistic, timestamped now; it is written by the next flush"""
+        if metadata and metadata_json is not None:
+            raise ValueError("Pass metadata or metadata_json, not both")
+        if len(self._usage_buffer) >= USAGE_BUFFER_MAX_ROWS:
+            # Telemetry only: drop rather than grow without bound while flushes wait
+            if not self._usage_dropped:
+                logger.warning("Usage stats buffer full; dropping new stats", max_rows=USAGE_BUFFER_MAX_ROWS)
+            self._usage_dropped += 1
+            return
+        self._usage_buffer.append((
+            datetime.now().isoformat(),
+            operation,
+            entity_name,
+            success,
+            execution_time_ms,
+            metadata_json if metadata_json is not None else metadata
+        ))
+        if len(self._usage_buffer) >= USAGE_FLUSH_MAX_ROWS:
+            await self.flush_usage_stats()
+    
+    async def flush_usage_stats(self) -> None:
+        """Write buffered usage stats in one batch (skipped while another writer is active)"""
+        if not self._usage_buffer:
+            return
+        if self.database.is_writing:
+            # A metadata sync holds the write connection; retry on the next tick
+            return
+        await self._write_usage_buffer()
+    
+    async def _write_usage_buffer(self) -> None:
+        """Write buffered usage stats, waiting for the write lock if needed"""
+        if self._usage_dropped:
+            logger.warning("Dropped usage stats while the buffer was full", count=self._usage_dropped)
+            self._usage_dropped = 0
+        if not self._usage_buffer:
+            return
+        rows, self._usage_buffer = self._usage_buffer, []
+        try:
+            await self._insert_usage_rows(rows)
+        except DatabaseError as e:
+            # Telemetry only: drop the batch rather than fail the caller
+            logger.warning("Dropped buffered usage stats", count=len(rows), error=str(e))
+    
+    async def record_usage_stats_bulk(
+        self,
+        rows: List[Tuple[str, Optional[str], bool, Optional[int], Union[Dict[str, Any], bytes, None]]]
+    ) -> None:
+        """Record several usage statistics with one executemany in one transaction"""
+        recorded_at = datetime.now().isoformat()
+        await self._insert_usage_rows([(recorded_at, *row) for row in rows])
+    
+    async def _insert_usage_rows(self, rows: List[_UsageRow]) -> None:
+        """INSERT timestamped usage rows with one executemany in one transaction"""
+        if not rows:
+            return
+        try:
+            params = [
+                (
+                    operation,
+                    entity_name,
+                    success,
+                    execution_time_ms,
+                    _usage_metadata(metadata),
+                    recorded_at
+                )
+                for recorded_at, operation, entity_name, success, execution_time_ms, metadata in rows
+            ]
+            
+            async with self.database.transaction() as connection:
+                connection.executemany("""
+                    INSERT INTO usage_stats 
+                    (operation, entity_name, success, execution_time_ms, metadata, recorded_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, params)
+            
+            logger.debug("Usage stats recorded", count=len(params))
+            
+        except Exception as e:
+            logger.error("Failed to record usage stats", count=len(rows), error=str(e))
+            raise DatabaseError(f"Failed to record usage stats: {e}")
     
     async def get_usage_stats(
         self,
@@ -463,7 +848,7 @@ class SQLiteMetadataRepository(IMetadataRepository):
     
     async def get_repository_info(self) -> Dict[str, Any]:
         """Get repository implementation information"""
-        connection = await self.database.get_connection()
+        connection = await self.database.get_read_connection()
         
         # Get counts
         cursor = connection.execute("SELECT COUNT(*) as count FROM entity_types")
@@ -5,7 +5,7 @@ Handles schema versioning and migration for SQLite repositories.
 """
 
 import sqlite3
-from typing import Dict, Any
+from typing import Dict, Any, List
 import structlog
 
 from .schemas import SQLITE_MIGRATIONS
@@ -35,6 +35,22 @@ async def get_current_schema_version(connection: sqlite3.Connection) -> int:
         return 0
 
 
+def split_statements(sql: str) -> List[str]:
+    """Split a migration script into statements, keeping trigger bodies whole"""
+    statements = []
+    pending = ""
+    for part in sql.split(";"):
+        pending += part + ";"
+        if sqlite3.complete_statement(pending):
+            statement = pending.strip().rstrip(";").strip()
+            if statement:
+                statements.append(statement)
+            pending = ""
+    if pending.strip(" \n\t;"):
+        statements.append(pending.strip().rstrip(";").strip())
+    return statements
+
+
 async def apply_migration(connection: sqlite3.Connection, migration: Dict[str, Any]) -> None:
     """Apply a single SQLite migration"""
     version = migration["version"]
@@ -44,10 +60,7 @@ async def apply_migration(connection: sqlite3.Connection, migration: Dict[str, A
     logger.info(f"Applying SQLite migration {version}: {description}")
 
     try:
-        # Split SQL statements and execute each one
-        statements = [stmt.strip() for stmt in sql.split(";") if stmt.strip()]
-
-        for statement in statements:
+        for statement in split_statements(sql):
             connection.execute(statement)
 
         # Record migration in tracking table
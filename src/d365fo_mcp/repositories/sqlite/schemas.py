@@ -58,6 +58,208 @@ METADATA_STORAGE_MIGRATION = {
     """
 }
 
+# Full-text index over instruction content, kept in sync by triggers
+INSTRUCTIONS_SEARCH_MIGRATION = {
+    "version": 5,
+    "description": "FTS5 search index for entity instructions",
+    "sql": """
+        CREATE VIRTUAL TABLE IF NOT EXISTS instructions_fts USING fts5(
+            id UNINDEXED,
+            entity_name,
+            title,
+            description,
+            tokenize='porter unicode61'
+        );
+        
+        CREATE TRIGGER IF NOT EXISTS entity_instructions_fts_insert
+        AFTER INSERT ON entity_instructions BEGIN
+            INSERT INTO instructions_fts (id, entity_name, title, description)
+            VALUES (new.id, new.entity_name, new.title, new.description);
+        END;
+        
+        CREATE TRIGGER IF NOT EXISTS entity_instructions_fts_delete
+        AFTER DELETE ON entity_instructions BEGIN
+            DELETE FROM instructions_fts WHERE id = old.id;
+        END;
+        
+        CREATE TRIGGER IF NOT EXISTS entity_instructions_fts_update
+        AFTER UPDATE OF id, entity_name, title, description ON entity_instructions BEGIN
+            DELETE FROM instructions_fts WHERE id = old.id;
+            INSERT INTO instructions_fts (id, entity_name, title, description)
+            VALUES (new.id, new.entity_name, new.title, new.description);
+        END;
+        
+        -- Index instructions stored before this migration
+        DELETE FROM instructions_fts;
+        INSERT INTO instructions_fts (id, entity_name, title, description)
+        SELECT id, entity_name, title, description FROM entity_instructions;
+    """
+}
+
+# Entity/enum name search as an FTS5 table, filled by the bulk parser
+ENTITY_SEARCH_FTS_MIGRATION = {
+    "version": 6,
+    "description": "FTS5 entity_search index",
+    "sql": """
+        DROP TABLE IF EXISTS entity_search;
+        
+        CREATE VIRTUAL TABLE entity_search USING fts5(
+            name,
+            type UNINDEXED,
+            description,
+            tokenize='unicode61'
+        );
+        
+        INSERT INTO entity_search (name, type, description)
+        SELECT es.name, 'entity', 'D365 entity: ' || et.name
+        FROM entity_sets es
+        JOIN entity_types et ON et.id = es.entity_type_id;
+        
+        INSERT INTO entity_search (name, type, description)
+        SELECT name, 'enum', 'D365 enum: ' || name
+        FROM enum_types;
+    """
+}
+
+# Usage rows bump their instruction's counters, so recording usage is one INSERT
+INSTRUCTION_USAGE_COUNTS_MIGRATION = {
+    "version": 7,
+    "description": "Maintain instruction success/failure counts from usage rows",
+    "sql": """
+        CREATE TRIGGER IF NOT EXISTS instruction_usage_stats_counts
+        AFTER INSERT ON instruction_usage_stats BEGIN
+            UPDATE entity_instructions
+            SET success_count = success_count + (CASE WHEN new.success THEN 1 ELSE 0 END),
+                failure_count = failure_count + (CASE WHEN new.success THEN 0 ELSE 1 END),
+                updated_at = new.recorded_at
+            WHERE id = new.instruction_id;
+        END;
+    """
+}
+
+# Hourly usage totals per instruction, so stats scale with the window, not history
+INSTRUCTION_USAGE_ROLLUP_MIGRATION = {
+    "version": 8,
+    "description": "Hourly instruction usage rollup",
+    "sql": """
+        CREATE TABLE IF NOT EXISTS instruction_usage_rollup (
+            instruction_id TEXT NOT NULL,
+            hour_bucket TEXT NOT NULL,  -- recorded_at truncated to the hour (YYYY-MM-DDTHH)
+            uses INTEGER NOT NULL DEFAULT 0,
+            successes INTEGER NOT NULL DEFAULT 0,
+            feedback_sum INTEGER NOT NULL DEFAULT 0,
+            feedback_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (instruction_id, hour_bucket)
+        ) WITHOUT ROWID;
+        
+        CREATE INDEX IF NOT EXISTS idx_instruction_usage_rollup_hour
+            ON instruction_usage_rollup(hour_bucket);
+        
+        -- Partial hours at the start of a window are read from the raw rows
+        CREATE INDEX IF NOT EXISTS idx_instruction_usage_recorded
+            ON instruction_usage_stats(recorded_at);
+        
+        DROP TRIGGER IF EXISTS instruction_usage_stats_counts;
+        
+        CREATE TRIGGER instruction_usage_stats_counts
+        AFTER INSERT ON instruction_usage_stats BEGIN
+            UPDATE entity_instructions
+            SET success_count = success_count + (CASE WHEN new.success THEN 1 ELSE 0 END),
+                failure_count = failure_count + (CASE WHEN new.success THEN 0 ELSE 1 END),
+                updated_at = new.recorded_at
+            WHERE id = new.instruction_id;
+            
+            INSERT INTO instruction_usage_rollup (
+                instruction_id, hour_bucket, uses, successes, feedback_sum, feedback_count
+            ) VALUES (
+                new.instruction_id, substr(new.recorded_at, 1, 13), 1,
+                CASE WHEN new.success THEN 1 ELSE 0 END,
+                COALESCE(new.feedback_score, 0),
+                new.feedback_score IS NOT NULL
+            )
+            ON CONFLICT (instruction_id, hour_bucket) DO UPDATE SET
+                uses = uses + 1,
+                successes = successes + excluded.successes,
+                feedback_sum = feedback_sum + excluded.feedback_sum,
+                feedback_count = feedback_count + excluded.feedback_count;
+        END;
+        
+        -- Roll up usage recorded before this migration
+        DELETE FROM instruction_usage_rollup;
+        INSERT INTO instruction_usage_rollup (
+            instruction_id, hour_bucket, uses, successes, feedback_sum, feedback_count
+        )
+        SELECT instruction_id, substr(recorded_at, 1, 13), COUNT(*),
+               SUM(CASE WHEN success THEN 1 ELSE 0 END),
+               COALESCE(SUM(feedback_score), 0), COUNT(feedback_score)
+        FROM instruction_usage_stats
+        GROUP BY instruction_id, substr(recorded_at, 1, 13);
+    """
+}
+
+# Index the "latest instructions" listing; nothing orders by created_at
+INSTRUCTIONS_UPDATED_AT_INDEX_MIGRATION = {
+    "version": 9,
+    "description": "Index entity instructions by updated_at",
+    "sql": """
+        CREATE INDEX IF NOT EXISTS idx_instructions_updated_at
+            ON entity_instructions(updated_at DESC);
+        
+        DROP INDEX IF EXISTS idx_instructions_created_at;
+    """
+}
+
+# Key instructions_fts rows by a stable integer so triggers delete by rowid
+# instead of scanning the UNINDEXED id column
+INSTRUCTIONS_FTS_ROWID_MIGRATION = {
+    "version": 10,
+    "description": "Key instructions_fts rows by a stable integer rowid",
+    "sql": """
+        CREATE TABLE IF NOT EXISTS instructions_fts_rowid (
+            fts_rowid INTEGER PRIMARY KEY,
+            instruction_id TEXT NOT NULL UNIQUE
+        );
+        
+        DROP TRIGGER IF EXISTS entity_instructions_fts_insert;
+        DROP TRIGGER IF EXISTS entity_instructions_fts_delete;
+        DROP TRIGGER IF EXISTS entity_instructions_fts_update;
+        
+        CREATE TRIGGER entity_instructions_fts_insert
+        AFTER INSERT ON entity_instructions BEGIN
+            INSERT INTO instructions_fts_rowid (instruction_id) VALUES (new.id);
+            INSERT INTO instructions_fts (rowid, id, entity_name, title, description)
+            VALUES (
+                (SELECT fts_rowid FROM instructions_fts_rowid WHERE instruction_id = new.id),
+                new.id, new.entity_name, new.title, new.description
+            );
+        END;
+        
+        CREATE TRIGGER entity_instructions_fts_delete
+        AFTER DELETE ON entity_instructions BEGIN
+            DELETE FROM instructions_fts WHERE rowid =
+                (SELECT fts_rowid FROM instructions_fts_rowid WHERE instruction_id = old.id);
+            DELETE FROM instructions_fts_rowid WHERE instruction_id = old.id;
+        END;
+        
+        CREATE TRIGGER entity_instructions_fts_update
+        AFTER UPDATE OF id, entity_name, title, description ON entity_instructions BEGIN
+            UPDATE instructions_fts_rowid SET instruction_id = new.id WHERE instruction_id = old.id;
+            UPDATE instructions_fts
+            SET id = new.id, entity_name = new.entity_name, title = new.title, description = new.description
+            WHERE rowid = (SELECT fts_rowid FROM instructions_fts_rowid WHERE instruction_id = new.id);
+        END;
+        
+        -- Re-key instructions indexed before this migration
+        DELETE FROM instructions_fts;
+        DELETE FROM instructions_fts_rowid;
+        INSERT INTO instructions_fts_rowid (instruction_id) SELECT id FROM entity_instructions;
+        INSERT INTO instructions_fts (rowid, id, entity_name, title, description)
+        SELECT k.fts_rowid, i.id, i.entity_name, i.title, i.description
+        FROM instructions_fts_rowid k
+        JOIN entity_instructions i ON i.id = k.instruction_id;
+    """
+}
+
 # Migration definitions for SQLite
 SQLITE_MIGRATIONS = [
     {
@@ -241,6 +443,12 @@ SQLITE_MIGRATIONS = [
         """,
     },
     METADATA_STORAGE_MIGRATION,
+    INSTRUCTIONS_SEARCH_MIGRATION,
+    ENTITY_SEARCH_FTS_MIGRATION,
+    INSTRUCTION_USAGE_COUNTS_MIGRATION,
+    INSTRUCTION_USAGE_ROLLUP_MIGRATION,
+    INSTRUCTIONS_UPDATED_AT_INDEX_MIGRATION,
+    INSTRUCTIONS_FTS_ROWID_MIGRATION,
 ]
 
 # Performance-optimized queries for common operations
@@ -58,9 +58,10 @@ class ServerFactory:
             # 2. Create D365 client
             d365_client = await ClientFactory.create(settings, auth_provider)
             
-            # 3. Create repositories
-            metadata_repository = RepositoryFactory.create_metadata_repository(settings)
-            instructions_repository = RepositoryFactory.create_instructions_repository(settings)
+            # 3. Create repositories (sharing one SQLite connection)
+            shared_database = RepositoryFactory.create_database(settings)
+            metadata_repository = RepositoryFactory.create_metadata_repository(settings, shared_database)
+            instructions_repository = RepositoryFactory.create_instructions_repository(settings, shared_database)
             
             # 4. Create services using factory (inject repository dependencies)
             # Enable background sync for SQLite repositories to automatically sync metadata
@@ -163,6 +164,8 @@ class ServerValidator:
                 print(f"   - Client Type: {client_info.get('type')}")
                 print(f"   - Capabilities: {', '.join(client_info.get('capabilities', []))}")
                 
+                await client.close()
+                
             except Exception as e:
                 print(f"❌ D365 client failed: {e}")
                 return
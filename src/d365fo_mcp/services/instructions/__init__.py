@@ -1,9 +1,11 @@
 """Instructions service implementations"""
 
+from ..._lazy import lazy_getattr
 from .interface import IInstructionsService
-from .service import InstructionsService
 
 __all__ = [
     "IInstructionsService", 
     "InstructionsService"
-]
\ No newline at end of file
+]
+
+__getattr__ = lazy_getattr(__name__, {"InstructionsService": ".service"})
@@ -1,11 +1,15 @@
 """Metadata service implementations"""
 
+from ..._lazy import lazy_getattr
 from .interface import IMetadataService
-from .service import MetadataService
-from .background_sync import BackgroundMetadataSync
 
 __all__ = [
     "IMetadataService",
     "MetadataService",
     "BackgroundMetadataSync"
-]
\ No newline at end of file
+]
+
+__getattr__ = lazy_getattr(__name__, {
+    "MetadataService": ".service",
+    "BackgroundMetadataSync": ".background_sync",
+})
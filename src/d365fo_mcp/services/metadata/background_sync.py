@@ -5,24 +5,44 @@ Handles async refresh of D365 metadata with intelligent scheduling and error han
 """
 
 import asyncio
+import sqlite3
+import tempfile
 import time
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, Callable
+from pathlib import Path
+from typing import Optional, Dict, Any, Callable, TYPE_CHECKING
 import structlog
 
 from ...repositories.sqlite.database import Database
-from ...client.d365_client import D365Client
 from ...repositories.sqlite.bulk_parser import BulkMetadataParser
 
+if TYPE_CHECKING:
+    from ...client.interface import ID365Client
+
 logger = structlog.get_logger(__name__)
 
+# Metadata tables in dependency order (children first)
+METADATA_TABLES = [
+    "entity_search",
+    "enum_members", 
+    "navigation_properties",
+    "entity_properties",
+    "entity_sets",
+    "enum_types",
+    "entity_types"
+]
+
+# Above this many property rows, dropping and rebuilding secondary indexes
+# is cheaper than maintaining them row by row during the load
+BULK_INDEX_THRESHOLD = 5000
+
 class BackgroundMetadataSync:
     """Background service for metadata synchronization"""
     
     def __init__(
         self,
         db: Database,
-        d365_client: D365Client,
+        d365_client: "ID365Client",
         sync_interval_hours: int = 12,
         retry_interval_minutes: int = 30,
         max_retries: int = 3
@@ -207,25 +227,16 @@ class BackgroundMetadataSync:
             logger.info("Starting metadata synchronization")
             sync_start = time.time()
             
-            # Clear existing metadata
-            await self._clear_existing_metadata()
-            
-            # Fetch fresh metadata XML
-            metadata_xml = await self.client.list_odata_entities()
-            logger.info("Metadata XML fetched", size_bytes=len(metadata_xml))
-            
-            # Parse and store in SQLite
-            connection = await self.db.get_connection()
-            parser = BulkMetadataParser(connection)
-            
             # Get D365 instance from client or config
             d365_instance = getattr(self.client, 'instance_url', 'unknown')
             
-            stats = await parser.parse_and_store_metadata(
-                metadata_xml, 
-                d365_instance,
-                chunk_size=1000
-            )
+            with tempfile.TemporaryDirectory(prefix="d365fo-metadata-") as download_dir:
+                # Download before taking the write lock, so instruction and
+                # usage writes never wait on the network
+                metadata_path = Path(download_dir) / "metadata.xml"
+                xml_size = await self._download_metadata(metadata_path)
+                logger.info("Metadata XML fetched", size_bytes=xml_size)
+                stats = await self._load_metadata_file(metadata_path, d365_instance)
             
             sync_duration = time.time() - sync_start
             stats["total_sync_duration_seconds"] = sync_duration
@@ -254,23 +265,22 @@ class BackgroundMetadataSync:
                         max_retries=self.max_retries)
             
             # Record failed sync
-            connection = await self.db.get_connection()
-            connection.execute("""
-                INSERT INTO metadata_sync (
-                    last_sync_at, last_sync_duration_ms, xml_size_bytes,
-                    entity_count, enum_count, sync_status, error_message, d365_instance
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                datetime.now().isoformat(),
-                0,  # duration
-                0,  # size
-                0,  # entity count  
-                0,  # enum count
-                "failed",
-                str(e),
-                getattr(self.client, 'instance_url', 'unknown')
-            ))
-            connection.commit()
+            async with self.db.transaction() as connection:
+                connection.execute("""
+                    INSERT INTO metadata_sync (
+                        last_sync_at, last_sync_duration_ms, xml_size_bytes,
+                        entity_count, enum_count, sync_status, error_message, d365_instance
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    datetime.now().isoformat(),
+                    0,  # duration
+                    0,  # size
+                    0,  # entity count  
+                    0,  # enum count
+                    "failed",
+                    str(e),
+                    getattr(self.client, 'instance_url', 'unknown')
+                ))
             
             # Notify callbacks of failure
             await self._notify_sync_callbacks({
@@ -284,25 +294,51 @@ class BackgroundMetadataSync:
         finally:
             self._is_syncing = False
     
-    async def _clear_existing_metadata(self):
-        """Clear existing metadata tables for fresh sync"""
-        connection = await self.db.get_connection()
+    async def _download_metadata(self, path: Path) -> int:
+        """Write the $metadata document to path; returns its size in bytes"""
+        size = 0
+        with open(path, "wb") as f:
+            async for chunk in self.client.stream_metadata():
+                f.write(chunk)
+                size += len(chunk)
+        return size
+    
+    async def _load_metadata_file(self, path: Path, d365_instance: str) -> Dict[str, Any]:
+        """
+        Replace the stored metadata with a downloaded document.
         
+        Clear and reload run in one transaction: a single commit for the
+        whole load, and readers keep the old metadata until it lands.
+        """
+        await self.db.configure_for_bulk()
+        try:
+            async with self.db.transaction() as connection:
+                # Every sync is a full reload; a first sync loads the whole catalogue
+                previous_rows = connection.execute(
+                    "SELECT COUNT(*) FROM entity_properties"
+                ).fetchone()[0]
+                await self._clear_existing_metadata(connection)
+                
+                dropped_indexes = []
+                if previous_rows == 0 or previous_rows > BULK_INDEX_THRESHOLD:
+                    dropped_indexes = await self.db.drop_indexes(METADATA_TABLES)
+                
+                # The memory-mapped file is fed to the incremental parser
+                parser = BulkMetadataParser(connection)
+                stats = await parser.parse_and_store_metadata_file(path, d365_instance, chunk_size=5000)
+                
+                if dropped_indexes:
+                    await self.db.recreate_indexes(dropped_indexes)
+        finally:
+            await self.db.configure_for_bulk(False)
+        return stats
+    
+    async def _clear_existing_metadata(self, connection: sqlite3.Connection):
+        """Clear existing metadata tables for fresh sync (within the caller's transaction)"""
         # Clear in dependency order
-        tables = [
-            "entity_search",
-            "enum_members", 
-            "navigation_properties",
-            "entity_properties",
-            "entity_sets",
-            "enum_types",
-            "entity_types"
-        ]
-        
-        for table in tables:
+        for table in METADATA_TABLES:
             connection.execute(f"DELETE FROM {table}")
         
-        connection.commit()
         logger.debug("Existing metadata cleared")
     
     async def _notify_sync_callbacks(self, sync_result: Dict[str, Any]):
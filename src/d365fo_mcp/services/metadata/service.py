@@ -138,11 +138,10 @@ class MetadataService(IMetadataService):
             return {"status": "cache_valid", "refreshed": False}
         
         try:
-            # Fetch fresh metadata from D365
-            raw_metadata = await self.client.list_odata_entities()
-            
-            # Cache the raw metadata
-            await self.repository.cache_raw_metadata(raw_metadata)
+            # Fetch and cache fresh metadata from D365, joining any refresh in flight
+            raw_metadata = await self.repository.get_or_refresh_raw_metadata(
+                self.client.list_odata_entities, force=True
+            )
             
             # TODO: Parse and cache individual entity metadata
             # This would involve parsing the XML and extracting entity definitions
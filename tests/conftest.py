@@ -57,7 +57,7 @@ def mock_d365_client():
         "@odata.count": 1,
     }
     client.create_odata_entity.return_value = {"Id": "123", "Name": "Test"}
-    client.list_odata_entities.return_value = "<xml>mock metadata</xml>"
+    client.list_odata_entities.return_value = b"<xml>mock metadata</xml>"
     return client
 
 
@@ -80,3 +80,29 @@ def sample_instruction():
         "example_data": '{"Name": "Test", "Value": "123"}',
         "tags": ["test", "example"],
     }
+
+
+@pytest.fixture
+def sample_metadata_xml():
+    """Minimal D365 $metadata document (one entity, one enum) as bytes"""
+    return b"""<?xml version="1.0" encoding="utf-8"?>
+<edmx:Edmx Version="4.0" xmlns:edmx="http://docs.oasis-open.org/odata/ns/edmx">
+  <edmx:DataServices>
+    <Schema Namespace="Microsoft.Dynamics.DataEntities" xmlns="http://docs.oasis-open.org/odata/ns/edm">
+      <EntityType Name="CustomerV3">
+        <Key><PropertyRef Name="dataAreaId"/><PropertyRef Name="CustomerAccount"/></Key>
+        <Property Name="dataAreaId" Type="Edm.String" Nullable="false" MaxLength="4"/>
+        <Property Name="CustomerAccount" Type="Edm.String" Nullable="false" MaxLength="20"/>
+        <Property Name="CustomerGroupId" Type="Edm.String" MaxLength="10"/>
+      </EntityType>
+      <EnumType Name="NoYes">
+        <Member Name="No" Value="0"/>
+        <Member Name="Yes" Value="1"/>
+      </EnumType>
+      <EntityContainer Name="Resources">
+        <EntitySet Name="CustomersV3" EntityType="Microsoft.Dynamics.DataEntities.CustomerV3"/>
+      </EntityContainer>
+    </Schema>
+  </edmx:DataServices>
+</edmx:Edmx>
+"""
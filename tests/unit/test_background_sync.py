@@ -0,0 +1,109 @@
+"""
+Unit tests for BackgroundMetadataSync
+"""
+
+import asyncio
+
+import pytest
+
+from d365fo_mcp.repositories.sqlite.bulk_parser import etree
+from d365fo_mcp.repositories.sqlite.instructions_repository import SQLiteInstructionsRepository
+from d365fo_mcp.services.metadata.background_sync import BackgroundMetadataSync
+
+
+class _StreamingClient:
+    """Minimal client that serves a fixed $metadata document"""
+
+    instance_url = "https://test-instance.operations.dynamics.com"
+
+    def __init__(self, payload: bytes):
+        self.payload = payload
+
+    async def stream_metadata(self, chunk_size: int = 65536):
+        for i in range(0, len(self.payload), chunk_size):
+            yield self.payload[i:i + chunk_size]
+
+
+class _StallingClient(_StreamingClient):
+    """Serves part of the document, waits for a signal, then drops the connection"""
+
+    def __init__(self, payload: bytes, resume: asyncio.Event):
+        super().__init__(payload)
+        self.streaming = asyncio.Event()
+        self.resume = resume
+
+    async def stream_metadata(self, chunk_size: int = 65536):
+        yield self.payload[:200]
+        self.streaming.set()
+        await self.resume.wait()
+        raise ConnectionError("metadata download interrupted")
+
+
+class TestBackgroundMetadataSync:
+    """Test cases for BackgroundMetadataSync"""
+
+    @pytest.mark.asyncio
+    async def test_resync_replaces_metadata(self, test_database, sample_metadata_xml):
+        """A second sync clears and reloads inside one transaction"""
+        sync = BackgroundMetadataSync(test_database, _StreamingClient(sample_metadata_xml))
+
+        await sync.force_sync_now()
+        stats = await sync.force_sync_now()
+
+        connection = await test_database.get_connection()
+        assert stats["entity_types_parsed"] == 1
+        assert connection.execute("SELECT COUNT(*) FROM entity_types").fetchone()[0] == 1
+        assert not connection.in_transaction
+
+    @pytest.mark.asyncio
+    async def test_failed_sync_keeps_previous_metadata(self, test_database, sample_metadata_xml):
+        """A download that breaks mid-stream rolls back to the last good metadata"""
+        await BackgroundMetadataSync(test_database, _StreamingClient(sample_metadata_xml)).force_sync_now()
+
+        broken = BackgroundMetadataSync(test_database, _StreamingClient(sample_metadata_xml[:200]))
+        # ParseError of whichever parser is in use (lxml or ElementTree)
+        with pytest.raises(etree.ParseError):
+            await broken.force_sync_now()
+
+        connection = await test_database.get_connection()
+        assert connection.execute("SELECT COUNT(*) FROM entity_types").fetchone()[0] == 1
+
+    @pytest.mark.asyncio
+    async def test_instruction_write_does_not_wait_for_download(self, test_database, sample_metadata_xml):
+        """Writes go through while $metadata downloads, and survive the sync failing"""
+        await BackgroundMetadataSync(test_database, _StreamingClient(sample_metadata_xml)).force_sync_now()
+
+        resume = asyncio.Event()
+        client = _StallingClient(sample_metadata_xml, resume)
+        sync_task = asyncio.create_task(BackgroundMetadataSync(test_database, client).force_sync_now())
+        await client.streaming.wait()
+
+        # The download holds no transaction, so the save commits right away
+        repository = SQLiteInstructionsRepository(test_database)
+        instruction_id = await asyncio.wait_for(
+            repository.save_instruction(
+                "Customers", "read", {"title": "Filter by account", "description": "Use the CustomerAccount key"}
+            ),
+            timeout=1,
+        )
+        assert not test_database.is_writing
+
+        resume.set()
+        with pytest.raises(ConnectionError):
+            await sync_task
+
+        connection = await test_database.get_connection()
+        assert connection.execute("SELECT COUNT(*) FROM entity_types").fetchone()[0] == 1
+        assert (await repository.get_instruction(instruction_id))["title"] == "Filter by account"
+
+    @pytest.mark.asyncio
+    async def test_bulk_load_restores_indexes(self, test_database, sample_metadata_xml):
+        """Indexes dropped for the initial bulk load are recreated before commit"""
+        connection = await test_database.get_connection()
+        index_query = "SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL ORDER BY name"
+        before = [row[0] for row in connection.execute(index_query)]
+
+        await BackgroundMetadataSync(test_database, _StreamingClient(sample_metadata_xml)).force_sync_now()
+
+        assert [row[0] for row in connection.execute(index_query)] == before
+        assert "idx_entity_properties_entity" in before
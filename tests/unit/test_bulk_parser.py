@@ -0,0 +1,137 @@
+"""
+Unit tests for BulkMetadataParser
+"""
+
+import json
+
+import pytest
+
+from d365fo_mcp.repositories.sqlite import bulk_parser
+from d365fo_mcp.repositories.sqlite.bulk_parser import BulkMetadataParser
+
+
+async def _chunks(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+class TestBulkMetadataParser:
+    """Test cases for BulkMetadataParser"""
+
+    @pytest.mark.asyncio
+    async def test_parse_from_byte_stream(self, test_database, sample_metadata_xml):
+        """Metadata fed in small byte chunks is parsed and counted"""
+        connection = await test_database.get_connection()
+        parser = BulkMetadataParser(connection)
+
+        stats = await parser.parse_and_store_metadata_stream(
+            _chunks(sample_metadata_xml, 64), "test-instance"
+        )
+
+        assert stats["xml_size_bytes"] == len(sample_metadata_xml)
+        assert stats["entity_types_parsed"] == 1
+        assert stats["entity_sets_parsed"] == 1
+        assert stats["properties_parsed"] == 3
+        assert stats["enum_members_parsed"] == 2
+
+    @pytest.mark.asyncio
+    async def test_parse_from_file(self, test_database, sample_metadata_xml, tmp_path):
+        """A saved document is memory-mapped and parsed like a downloaded one"""
+        connection = await test_database.get_connection()
+        parser = BulkMetadataParser(connection)
+        metadata_file = tmp_path / "metadata.xml"
+        metadata_file.write_bytes(sample_metadata_xml)
+
+        stats = await parser.parse_and_store_metadata_file(metadata_file, "test-instance")
+
+        assert stats["xml_size_bytes"] == len(sample_metadata_xml)
+        assert stats["properties_parsed"] == 3
+
+        (tmp_path / "empty.xml").write_bytes(b"")
+        with pytest.raises(ValueError):
+            await parser.parse_and_store_metadata_file(tmp_path / "empty.xml", "test-instance")
+
+    @pytest.mark.asyncio
+    async def test_stream_and_buffered_store_same_rows(self, test_database, sample_metadata_xml):
+        """Element-by-element streaming stores the same rows as the full-tree parse"""
+        connection = await test_database.get_connection()
+        parser = BulkMetadataParser(connection)
+        tables = ("entity_properties", "entity_sets", "enum_members", "entity_types", "enum_types")
+
+        await parser.parse_and_store_metadata(sample_metadata_xml.decode("utf-8"), "test-instance")
+        buffered = {t: connection.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0] for t in tables}
+
+        for table in tables:
+            connection.execute(f"DELETE FROM {table}")
+        connection.commit()
+        await parser.parse_and_store_metadata_stream(_chunks(sample_metadata_xml, 17), "test-instance")
+        streamed = {t: connection.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0] for t in tables}
+
+        assert streamed == buffered
+        assert streamed["entity_properties"] == 3
+
+    @pytest.mark.asyncio
+    async def test_json_each_properties_match_executemany(self, test_database, sample_metadata_xml, monkeypatch):
+        """Properties unpacked from one JSON parameter are stored exactly as bound rows"""
+        connection = await test_database.get_connection()
+        parser = BulkMetadataParser(connection)
+        query = """
+            SELECT name, type, nullable, max_length, precision, scale,
+                   is_key, is_enum, enum_type, annotations, ordinal_position
+            FROM entity_properties ORDER BY ordinal_position
+        """
+
+        monkeypatch.setattr(bulk_parser, "_JSON_EACH_INSERT", False)
+        await parser.parse_and_store_metadata(sample_metadata_xml, "test-instance")
+        bound = [tuple(row) for row in connection.execute(query)]
+
+        for table in ("entity_properties", "entity_sets", "enum_members", "entity_types", "enum_types"):
+            connection.execute(f"DELETE FROM {table}")
+        connection.commit()
+        monkeypatch.setattr(bulk_parser, "_JSON_EACH_INSERT", True)
+        await parser.parse_and_store_metadata_stream(_chunks(sample_metadata_xml, 64), "test-instance")
+        unpacked = [tuple(row) for row in connection.execute(query)]
+
+        assert len(bound) == 3
+        assert unpacked == bound
+
+    @pytest.mark.asyncio
+    async def test_search_index_is_full_text(self, test_database, sample_metadata_xml):
+        """entity_search is rebuilt from the stored sets and enums and queried with MATCH"""
+        connection = await test_database.get_connection()
+        parser = BulkMetadataParser(connection)
+
+        await parser.parse_and_store_metadata(sample_metadata_xml, "test-instance")
+        parser._update_search_index()
+
+        rows = connection.execute(
+            "SELECT name, type FROM entity_search WHERE entity_search MATCH ? ORDER BY rank", ("Customers*",)
+        ).fetchall()
+        assert [tuple(row) for row in rows] == [("CustomersV3", "entity")]
+        assert connection.execute("SELECT COUNT(*) FROM entity_search").fetchone()[0] == 2
+
+    @pytest.mark.asyncio
+    async def test_annotations_are_read_from_direct_children(self, test_database):
+        """A property's annotation belongs to the property, not its entity type"""
+        connection = await test_database.get_connection()
+        xml = b"""<?xml version="1.0" encoding="utf-8"?>
+<edmx:Edmx Version="4.0" xmlns:edmx="http://docs.oasis-open.org/odata/ns/edmx">
+  <edmx:DataServices>
+    <Schema Namespace="Microsoft.Dynamics.DataEntities" xmlns="http://docs.oasis-open.org/odata/ns/edm">
+      <EntityType Name="CustomerV3">
+        <Property Name="Name" Type="Edm.String">
+          <Annotation Term="Core.Description" String="Customer name"/>
+        </Property>
+        <Annotation Term="Core.Description" String="Customers"/>
+      </EntityType>
+    </Schema>
+  </edmx:DataServices>
+</edmx:Edmx>
+"""
+
+        await BulkMetadataParser(connection).parse_and_store_metadata(xml, "test-instance")
+
+        entity = connection.execute("SELECT annotations FROM entity_types").fetchone()[0]
+        prop = connection.execute("SELECT annotations FROM entity_properties").fetchone()[0]
+        assert json.loads(entity) == {"Core.Description": "Customers"}
+        assert json.loads(prop) == {"Core.Description": "Customer name"}
@@ -0,0 +1,23 @@
+"""
+Unit tests for Settings
+"""
+
+from pathlib import Path
+
+
+class TestSettings:
+    """Test cases for Settings"""
+
+    def test_model_copy_recomputes_derived_values(self, mock_settings, tmp_path):
+        """Cached derived values follow the copy's fields, not the original's"""
+        assert mock_settings.d365_resource_url == "https://test-instance.operations.dynamics.com"
+        assert mock_settings.database_path_resolved == Path(":memory:").resolve()
+
+        copied = mock_settings.model_copy(update={
+            "d365_base_url": "https://other-instance.operations.dynamics.com/",
+            "database_path": str(tmp_path / "other.db"),
+        })
+
+        assert copied.d365_resource_url == "https://other-instance.operations.dynamics.com"
+        assert copied.database_path_resolved == (tmp_path / "other.db").resolve()
+        assert mock_settings.d365_resource_url == "https://test-instance.operations.dynamics.com"
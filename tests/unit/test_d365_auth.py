@@ -0,0 +1,57 @@
+"""
+Unit tests for D365AuthManager token caching
+"""
+
+import stat
+
+import pytest
+
+from d365fo_mcp.auth import d365_auth
+from d365fo_mcp.auth.d365_auth import D365AuthManager
+
+
+class _FakeApp:
+    """Stands in for msal.ConfidentialClientApplication"""
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.client_calls = 0
+
+    def acquire_token_silent(self, scopes, account=None):
+        return None
+
+    def acquire_token_for_client(self, scopes):
+        self.client_calls += 1
+        self.cache.has_state_changed = True
+        return {"access_token": "fresh-token", "expires_in": 3600}
+
+
+class TestD365AuthManager:
+    """Test cases for D365AuthManager"""
+
+    @pytest.fixture
+    def auth_manager(self, mock_settings, tmp_path, monkeypatch):
+        settings = mock_settings.model_copy(
+            update={"token_cache_path": str(tmp_path / "cache" / "token_cache.json")}
+        )
+        monkeypatch.setattr(d365_auth, "get_settings", lambda: settings)
+        manager = D365AuthManager()
+        manager._app = _FakeApp(manager.msal_cache)
+        return manager
+
+    @pytest.mark.asyncio
+    async def test_token_cache_persisted_with_owner_only_permissions(self, auth_manager):
+        """Acquiring a token writes the MSAL cache to disk readable only by the owner"""
+        token = await auth_manager.get_d365_token({})
+
+        assert token == "fresh-token"
+        assert auth_manager.cache_path.exists()
+        assert stat.S_IMODE(auth_manager.cache_path.stat().st_mode) == 0o600
+
+    @pytest.mark.asyncio
+    async def test_in_memory_cache_skips_msal(self, auth_manager):
+        """A still-valid token is served without calling MSAL again"""
+        await auth_manager.get_d365_token({})
+        await auth_manager.get_d365_token({})
+
+        assert auth_manager._app.client_calls == 1
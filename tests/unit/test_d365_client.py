@@ -0,0 +1,194 @@
+"""
+Tests for D365Client OData helpers
+"""
+
+import asyncio
+from unittest.mock import AsyncMock
+
+import httpx
+import pytest
+from d365fo_mcp.client.d365_client import (
+    D365Client, MAX_BACKOFF_RETRIES, _build_batch_body, _parse_batch_response
+)
+
+
+@pytest.fixture
+async def d365_client(mock_settings, monkeypatch):
+    """D365Client bound to test settings (no network access)"""
+    monkeypatch.setattr("d365fo_mcp.client.d365_client.get_settings", lambda: mock_settings)
+    client = D365Client("test-token")
+    yield client
+    await client.close()
+
+
+@pytest.mark.unit
+class TestBuildQueryUrl:
+    BASE = "https://test-instance.operations.dynamics.com/data/CustomersV3"
+
+    def test_default_company_strips_dataareaid_filter(self, d365_client):
+        """Default company drops the dataAreaId clause but keeps other filters"""
+        url = d365_client.build_query_url(
+            "CustomersV3", "$filter=dataAreaId eq 'test' and Name eq 'A+B'&$top=5", "test", "default"
+        )
+
+        assert url == f"{self.BASE}?$filter=Name eq 'A+B'&$top=5"
+
+    def test_default_company_keeps_and_inside_literals(self, d365_client):
+        """Only the dataAreaId clause is cut; literals and grouped clauses are untouched"""
+        url = d365_client.build_query_url(
+            "CustomersV3",
+            "$filter=Name eq 'Tom  AND Jerry' AND dataAreaId eq 'test' and (A eq 1 and B eq 'x and y')",
+            "test",
+            "default",
+        )
+        unchanged = d365_client.build_query_url(
+            "CustomersV3", "$filter=Name eq 'Tom  AND Jerry'", "test", "default"
+        )
+
+        assert url == f"{self.BASE}?$filter=Name eq 'Tom  AND Jerry' and (A eq 1 and B eq 'x and y')"
+        assert unchanged == f"{self.BASE}?$filter=Name eq 'Tom  AND Jerry'"
+
+    def test_default_company_drops_empty_filter(self, d365_client):
+        """A filter that only selected the company disappears entirely"""
+        url = d365_client.build_query_url("CustomersV3", "?$filter=dataAreaId eq 'test'", "test", "default")
+
+        assert url == self.BASE
+
+    def test_specific_company_keeps_filter_and_adds_cross_company(self, d365_client):
+        """Non-default companies need both the filter and cross-company=true"""
+        url = d365_client.build_query_url("CustomersV3", "$filter=dataAreaId eq 'usmf'", "test", "specific")
+
+        assert url == f"{self.BASE}?$filter=dataAreaId eq 'usmf'&cross-company=true"
+
+    def test_all_companies_adds_cross_company_once(self, d365_client):
+        """All-company queries get exactly one cross-company parameter"""
+        assert d365_client.build_query_url("CustomersV3", "", "test", "all") == (
+            f"{self.BASE}?cross-company=true"
+        )
+        assert d365_client.build_query_url("CustomersV3", "$top=1&cross-company=true", "test", "all") == (
+            f"{self.BASE}?$top=1&cross-company=true"
+        )
+
+    def test_empty_query(self, d365_client):
+        """Plain enumeration only gains cross-company=true outside the default company"""
+        assert d365_client.build_query_url("CustomersV3", "", "test", "default") == self.BASE
+        assert d365_client.build_query_url("CustomersV3", "", "test", "all") == f"{self.BASE}?cross-company=true"
+
+    def test_unknown_company_mode(self, d365_client):
+        """Unknown modes are rejected"""
+        with pytest.raises(ValueError, match="Unknown company mode"):
+            d365_client.build_query_url("CustomersV3", "", "test", "bogus")
+
+
+@pytest.mark.unit
+class TestBatchHelpers:
+    def test_build_batch_body(self):
+        """Each URL becomes one application/http GET part"""
+        body = _build_batch_body("batch_1", ["https://x/data/A", "https://x/data/B?$top=1"])
+
+        assert body.count("--batch_1\r\n") == 2
+        assert "GET https://x/data/A HTTP/1.1\r\n" in body
+        assert "GET https://x/data/B?$top=1 HTTP/1.1\r\n" in body
+        assert body.endswith("--batch_1--\r\n")
+
+    def test_parse_batch_response(self):
+        """Embedded JSON bodies are returned in request order"""
+        body = (
+            "--batchresponse_abc\r\n"
+            "Content-Type: application/http\r\n"
+            "Content-Transfer-Encoding: binary\r\n"
+            "\r\n"
+            "HTTP/1.1 200 OK\r\n"
+            "Content-Type: application/json\r\n"
+            "\r\n"
+            '{"value": [{"Name": "A"}]}\r\n'
+            "--batchresponse_abc\r\n"
+            "Content-Type: application/http\r\n"
+            "Content-Transfer-Encoding: binary\r\n"
+            "\r\n"
+            "HTTP/1.1 404 Not Found\r\n"
+            "Content-Type: application/json\r\n"
+            "\r\n"
+            '{"error": {"code": "", "message": "Not found"}}\r\n'
+            "--batchresponse_abc--\r\n"
+        )
+
+        results = _parse_batch_response("multipart/mixed; boundary=batchresponse_abc", body)
+
+        assert results == [
+            {"value": [{"Name": "A"}]},
+            {"error": {"code": "", "message": "Not found"}},
+        ]
+
+
+@pytest.mark.unit
+class TestRequestRetries:
+    URL = "https://test-instance.operations.dynamics.com/data/CustomersV3"
+
+    @pytest.fixture
+    def sleeps(self, monkeypatch):
+        delays = []
+
+        async def fake_sleep(delay):
+            delays.append(delay)
+
+        monkeypatch.setattr("d365fo_mcp.client.d365_client.asyncio.sleep", fake_sleep)
+        return delays
+
+    def _respond_with(self, d365_client, responses):
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return responses[len(calls) - 1]
+
+        d365_client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return calls
+
+    async def test_throttled_request_honours_retry_after(self, d365_client, sleeps):
+        """A 429 with Retry-After waits the advertised time, then succeeds"""
+        calls = self._respond_with(d365_client, [
+            httpx.Response(429, headers={"Retry-After": "7"}),
+            httpx.Response(200, json={"value": []}),
+        ])
+
+        response = await d365_client.make_authenticated_request("GET", self.URL)
+
+        assert response.status_code == 200
+        assert len(calls) == 2
+        assert sleeps == [7.0]
+
+    async def test_post_not_retried_on_gateway_error(self, d365_client, sleeps):
+        """Non-idempotent requests are not replayed after a 502"""
+        calls = self._respond_with(d365_client, [httpx.Response(502)])
+
+        with pytest.raises(httpx.HTTPStatusError):
+            await d365_client.make_authenticated_request("POST", self.URL, content=b"{}")
+
+        assert len(calls) == 1
+        assert sleeps == []
+
+    async def test_gives_up_after_max_backoff_retries(self, d365_client, sleeps):
+        """Persistent 503s are retried a bounded number of times"""
+        calls = self._respond_with(d365_client, [httpx.Response(503)] * (MAX_BACKOFF_RETRIES + 1))
+
+        with pytest.raises(httpx.HTTPStatusError):
+            await d365_client.make_authenticated_request("GET", self.URL)
+
+        assert len(calls) == MAX_BACKOFF_RETRIES + 1
+        assert len(sleeps) == MAX_BACKOFF_RETRIES
+
+    async def test_token_fetched_lazily_once(self, d365_client):
+        """Without an initial token, concurrent first requests share one fetch"""
+        auth_provider = AsyncMock()
+        auth_provider.get_token.return_value = "lazy-token"
+        d365_client.auth_provider = auth_provider
+        d365_client._set_token(None)
+        calls = self._respond_with(d365_client, [httpx.Response(200)] * 3)
+
+        await asyncio.gather(*(
+            d365_client.make_authenticated_request("GET", self.URL) for _ in range(3)
+        ))
+
+        auth_provider.get_token.assert_awaited_once()
+        assert [c.headers["Authorization"] for c in calls] == ["Bearer lazy-token"] * 3
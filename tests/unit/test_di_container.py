@@ -0,0 +1,70 @@
+"""
+Unit tests for DIContainer lifecycle management
+"""
+
+import pytest
+
+from d365fo_mcp.di_container import DIContainer
+
+
+class _Closable:
+    def __init__(self, name, closed, fail=False):
+        self.name = name
+        self.closed = closed
+        self.fail = fail
+
+    async def close(self):
+        self.closed.append(self.name)
+        if self.fail:
+            raise RuntimeError(f"{self.name} failed to close")
+
+
+class TestDIContainerClose:
+    """Test cases for closing registered dependencies"""
+
+    @pytest.mark.asyncio
+    async def test_close_is_lifo_and_continues_after_errors(self, mock_settings):
+        """Dependencies close newest first and one failure does not stop the rest"""
+        container = DIContainer(mock_settings)
+        closed = []
+        for name, fail in (("database", False), ("repository", True), ("service", False)):
+            container._register(_Closable(name, closed, fail))
+        container._register(object())  # no close() -> not tracked
+
+        await container.close()
+
+        assert closed == ["service", "repository", "database"]
+        assert container._closers == []
+
+    async def test_repositories_share_the_container_database(self, mock_settings, tmp_path):
+        """Both SQLite repositories use one Database, closed once by the container"""
+        settings = mock_settings.model_copy(update={"database_path": str(tmp_path / "test.db")})
+        container = DIContainer(settings)
+        await container.initialize(warm=False)
+
+        database = container.get_database()
+        metadata_repository = await container.get_metadata_repository()
+        instructions_repository = await container.get_instructions_repository()
+        assert metadata_repository.database is database
+        assert instructions_repository.database is database
+
+        await metadata_repository.close()
+        assert database._connection is not None
+
+        await container.close()
+        assert database._connection is None
+
+    async def test_initialize_warms_client(self, mock_settings, tmp_path):
+        """warm=True also builds the auth provider and D365 client"""
+        settings = mock_settings.model_copy(update={
+            "database_path": str(tmp_path / "test.db"),
+            "auth_provider": "mock",
+            "d365_client": "mock",
+        })
+        container = DIContainer(settings)
+
+        await container.initialize()
+
+        assert container._cache.d365_client is not None
+        assert container._cache.auth_provider is not None
+        await container.close()
@@ -0,0 +1,38 @@
+"""
+Unit tests for command line parsing in main.py
+"""
+
+import pytest
+
+from d365fo_mcp.main import CliArgs, parse_args
+
+
+class TestParseArgs:
+    """Test cases for the manual argument parser"""
+
+    def test_defaults(self):
+        """No arguments yields the documented defaults"""
+        assert parse_args([]) == CliArgs()
+
+    def test_flags_and_values(self):
+        """Both --opt value and --opt=value forms are accepted"""
+        args = parse_args(["--log-level=debug", "--transport", "stdio", "--init-db"])
+
+        assert args.log_level == "debug"
+        assert args.transport == "stdio"
+        assert args.init_db is True
+        assert args.validate_config is False
+
+    @pytest.mark.parametrize("argv", [
+        ["--log-level", "verbose"],
+        ["--transport", "http"],
+        ["--log-level"],
+        ["--unknown"],
+    ])
+    def test_invalid_arguments_exit(self, argv, capsys):
+        """Invalid input exits with status 2 like argparse"""
+        with pytest.raises(SystemExit) as exc_info:
+            parse_args(argv)
+
+        assert exc_info.value.code == 2
+        assert "error:" in capsys.readouterr().err
@@ -0,0 +1,487 @@
+"""
+Tests for the SQLite repositories and connection handling
+"""
+
+import asyncio
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+from d365fo_mcp.repositories.instructions import INSTRUCTION_SUMMARY_FIELDS
+from d365fo_mcp.repositories.sqlite import SQLiteInstructionsRepository, SQLiteMetadataRepository
+from d365fo_mcp.repositories.sqlite.bulk_parser import BulkMetadataParser
+from d365fo_mcp.repositories.sqlite.database import DatabaseError, DatabasePool
+from d365fo_mcp.repositories.sqlite.instructions_repository import _search_statement
+
+
+@pytest.mark.unit
+class TestBulkWrites:
+    async def test_save_instructions_bulk(self, test_database, sample_instruction):
+        """Bulk save returns ids parallel to the input, all persisted"""
+        repository = SQLiteInstructionsRepository(test_database)
+        items = [
+            ("CustomersV3", "read", sample_instruction),
+            ("CustomersV3", "create", sample_instruction),
+            ("VendorsV2", "read", sample_instruction),
+        ]
+
+        ids = await repository.save_instructions_bulk(items)
+
+        connection = await test_database.get_connection()
+        rows = connection.execute(
+            "SELECT id, entity_name, operation_type FROM entity_instructions"
+        ).fetchall()
+        stored = {row["id"]: (row["entity_name"], row["operation_type"]) for row in rows}
+        assert len(set(ids)) == 3
+        assert [stored[i] for i in ids] == [item[:2] for item in items]
+
+    async def test_save_instructions_bulk_is_atomic(self, test_database, sample_instruction):
+        """A duplicate entity+operation rolls back the whole batch"""
+        repository = SQLiteInstructionsRepository(test_database)
+
+        with pytest.raises(DatabaseError):
+            await repository.save_instructions_bulk([
+                ("CustomersV3", "read", sample_instruction),
+                ("CustomersV3", "read", sample_instruction),
+            ])
+
+        connection = await test_database.get_connection()
+        assert connection.execute("SELECT COUNT(*) FROM entity_instructions").fetchone()[0] == 0
+
+    async def test_record_instruction_usage_counts(self, test_database, sample_instruction):
+        """Successes and failures bump their own counters and log one usage row each"""
+        repository = SQLiteInstructionsRepository(test_database)
+        [instruction_id] = await repository.save_instructions_bulk([("CustomersV3", "read", sample_instruction)])
+
+        await repository.record_instruction_usage(instruction_id, success=True)
+        await repository.record_instruction_usage(instruction_id, success=True)
+        await repository.record_instruction_usage(instruction_id, success=False, metadata={"error": "timeout"})
+
+        instruction = await repository.get_instruction(instruction_id)
+        connection = await test_database.get_connection()
+        assert (instruction["success_count"], instruction["failure_count"]) == (2, 1)
+        assert connection.execute("SELECT COUNT(*) FROM instruction_usage_stats").fetchone()[0] == 3
+
+    async def test_record_instruction_usage_bulk(self, test_database, sample_instruction):
+        """A batch of usages lands in one transaction and updates counters through the trigger"""
+        repository = SQLiteInstructionsRepository(test_database)
+        read_id, create_id = await repository.save_instructions_bulk([
+            ("CustomersV3", "read", sample_instruction),
+            ("CustomersV3", "create", sample_instruction),
+        ])
+
+        await repository.record_instruction_usage_bulk([
+            (read_id, True, 5, {"rows": 2}),
+            (read_id, False, None, None),
+            (create_id, True, None, b'{"rows":1}'),
+        ])
+
+        connection = await test_database.get_connection()
+        metadata = [row[0] for row in connection.execute("SELECT metadata FROM instruction_usage_stats ORDER BY id")]
+        read = await repository.get_instruction(read_id)
+        create = await repository.get_instruction(create_id)
+        assert metadata == ['{"rows":2}', "{}", '{"rows":1}']
+        assert (read["success_count"], read["failure_count"]) == (1, 1)
+        assert (create["success_count"], create["failure_count"]) == (1, 0)
+        assert (await repository.get_instruction_stats())["total_uses"] == 3
+
+    async def test_instruction_stats_from_rollup(self, test_database, sample_instruction):
+        """Windowed stats combine hourly rollups with the raw rows of the partial first hour"""
+        repository = SQLiteInstructionsRepository(test_database)
+        [instruction_id] = await repository.save_instructions_bulk([("CustomersV3", "read", sample_instruction)])
+        now = datetime.now()
+        connection = await test_database.get_connection()
+        connection.executemany(
+            "INSERT INTO instruction_usage_stats (instruction_id, success, feedback_score, recorded_at) "
+            "VALUES (?, ?, ?, ?)",
+            [
+                (instruction_id, True, 4, (now - timedelta(hours=30)).isoformat()),
+                (instruction_id, True, None, (now - timedelta(hours=24, minutes=-1)).isoformat()),
+                (instruction_id, False, 2, (now - timedelta(hours=3)).isoformat()),
+                (instruction_id, True, 5, (now - timedelta(minutes=5)).isoformat()),
+            ]
+        )
+        connection.commit()
+
+        stats = await repository.get_instruction_stats(instruction_id=instruction_id)
+        overall = await repository.get_instruction_stats()
+        by_entity = await repository.get_instruction_stats(entity_name="CustomersV3")
+
+        assert (stats["total_uses"], stats["successful_uses"], stats["average_feedback"]) == (3, 2, 3.5)
+        assert (overall["total_uses"], overall["instructions_used"]) == (3, 1)
+        assert by_entity["operations"]["read"]["total_uses"] == 3
+        assert (await repository.get_repository_info())["daily_usage"] == 3
+        assert (await repository.get_instruction(instruction_id))["success_count"] == 3
+
+    async def test_record_usage_stats_bulk(self, test_database):
+        """Usage stats are written in one batch; bytes metadata is stored as-is"""
+        repository = SQLiteMetadataRepository(test_database)
+
+        await repository.record_usage_stats_bulk([
+            ("search", "CustomersV3", True, 12, {"hits": 3}),
+            ("get_metadata", None, False, None, None),
+            ("query", "VendorsV2", True, 5, b'{"rows":1}'),
+        ])
+
+        connection = await test_database.get_connection()
+        rows = connection.execute(
+            "SELECT operation, entity_name, success, metadata FROM usage_stats ORDER BY id"
+        ).fetchall()
+        assert [tuple(row) for row in rows] == [
+            ("search", "CustomersV3", 1, '{"hits": 3}'),
+            ("get_metadata", None, 0, None),
+            ("query", "VendorsV2", 1, '{"rows":1}'),
+        ]
+
+
+
+@pytest.mark.unit
+class TestMultiKeyReads:
+    async def test_get_cached_entity_metadata_many(self, test_database, sample_metadata_xml):
+        """Bulk lookup matches the single-entity result and reports misses as None"""
+        connection = await test_database.get_connection()
+        await BulkMetadataParser(connection).parse_and_store_metadata(sample_metadata_xml, "test")
+        repository = SQLiteMetadataRepository(test_database)
+
+        result = await repository.get_cached_entity_metadata_many(["CustomersV3", "Missing"])
+        single = await repository.get_cached_entity_metadata("CustomersV3")
+
+        assert result["Missing"] is None
+        many = result["CustomersV3"]
+        many.pop("_performance"), single.pop("_performance")
+        assert many == single
+        assert many["key_fields"] == ["dataAreaId", "CustomerAccount"]
+
+    async def test_list_cached_entities_page(self, test_database, sample_metadata_xml):
+        """Page tokens continue after the previous page's last entity set"""
+        connection = await test_database.get_connection()
+        await BulkMetadataParser(connection).parse_and_store_metadata(sample_metadata_xml, "test")
+        type_id = connection.execute("SELECT id FROM entity_types").fetchone()[0]
+        connection.executemany(
+            "INSERT INTO entity_sets (name, entity_type_id) VALUES (?, ?)",
+            [("AaCustomers", type_id), ("ZzCustomers", type_id)]
+        )
+        connection.commit()
+        repository = SQLiteMetadataRepository(test_database)
+
+        names, after = [], None
+        while True:
+            page, after = await repository.list_cached_entities_page(limit=2, after=after)
+            names += [entity["entity_set"] for entity in page]
+            if after is None:
+                break
+
+        assert names == ["AaCustomers", "CustomersV3", "ZzCustomers"]
+        assert [e["entity_set"] for e in await repository.list_cached_entities()] == names
+
+    async def test_get_entity_enum_fields_many(self, test_database, sample_metadata_xml):
+        """Bulk enum lookup matches per-entity lookups by type or set name"""
+        connection = await test_database.get_connection()
+        await BulkMetadataParser(connection).parse_and_store_metadata(sample_metadata_xml, "test")
+        connection.execute(
+            "UPDATE entity_properties SET is_enum = 1, enum_type = 'NoYes' WHERE name = 'CustomerGroupId'"
+        )
+        connection.commit()
+        repository = SQLiteMetadataRepository(test_database)
+
+        result = await repository.get_entity_enum_fields_many(["CustomersV3", "CustomerV3", "Missing"])
+
+        assert result["Missing"] == {}
+        assert result["CustomerV3"] == result["CustomersV3"]
+        assert result["CustomersV3"] == await repository.get_entity_enum_fields("CustomersV3")
+        assert result["CustomersV3"]["CustomerGroupId"]["enum_name"] == "NoYes"
+
+    async def test_get_cached_entity_metadata_if_changed(self, test_database, sample_metadata_xml):
+        """Matching etag skips the load; a new metadata sync changes the etag"""
+        connection = await test_database.get_connection()
+        await BulkMetadataParser(connection).parse_and_store_metadata(sample_metadata_xml, "test")
+        repository = SQLiteMetadataRepository(test_database)
+
+        etag = await repository.get_cached_entity_metadata_etag("CustomersV3")
+        fresh = await repository.get_cached_entity_metadata_if_changed("CustomersV3", None)
+
+        assert fresh["_etag"] == etag
+        assert await repository.get_cached_entity_metadata_if_changed("CustomersV3", etag) is None
+        assert await repository.get_cached_entity_metadata_etag("Missing") is None
+
+        connection.execute("INSERT INTO metadata_sync (sync_status) VALUES ('completed')")
+        assert await repository.get_cached_entity_metadata_etag("CustomersV3") != etag
+
+    async def test_get_instructions_many(self, test_database, sample_instruction):
+        """Bulk lookup returns every requested id, None for unknown ones"""
+        repository = SQLiteInstructionsRepository(test_database)
+        ids = await repository.save_instructions_bulk([
+            ("CustomersV3", "read", sample_instruction),
+            ("VendorsV2", "read", sample_instruction),
+        ])
+
+        result = await repository.get_instructions_many([ids[1], "unknown", ids[0]])
+
+        assert list(result) == [ids[1], "unknown", ids[0]]
+        assert result["unknown"] is None
+        assert result[ids[0]] == await repository.get_instruction(ids[0])
+        assert result[ids[1]]["entity_name"] == "VendorsV2"
+
+    async def test_iter_search_entities(self, test_database, sample_metadata_xml):
+        """Streamed EntitySummary rows serialize like the list search results"""
+        connection = await test_database.get_connection()
+        await BulkMetadataParser(connection).parse_and_store_metadata(sample_metadata_xml, "test")
+        repository = SQLiteMetadataRepository(test_database)
+
+        streamed = [match async for match in repository.iter_search_entities("Customers")]
+        listed = await repository.search_entities("Customers")
+
+        assert streamed
+        assert [match.to_dict() for match in streamed] == listed["detailed_entities"]
+
+    async def test_iter_search_instructions(self, test_database, sample_instruction):
+        """Streaming search yields the same rows as the list search"""
+        repository = SQLiteInstructionsRepository(test_database)
+        await repository.save_instructions_bulk([
+            ("CustomersV3", "read", sample_instruction),
+            ("CustomersV3", "create", sample_instruction),
+            ("VendorsV2", "read", sample_instruction),
+        ])
+
+        streamed = [item async for item in repository.iter_search_instructions("Customers")]
+
+        assert len(streamed) == 2
+        assert streamed == await repository.search_instructions("Customers")
+
+    async def test_search_instructions_uses_fts_index(self, test_database, sample_instruction):
+        """Search follows inserts, updates and deletes and survives a rebuild"""
+        repository = SQLiteInstructionsRepository(test_database)
+        keep, drop = await repository.save_instructions_bulk([
+            ("CustomersV3", "read", sample_instruction),
+            ("CustomersV3", "create", sample_instruction),
+        ])
+        await repository.update_instruction(keep, {"title": "Read customer balances"})
+        await repository.delete_instruction(drop)
+
+        assert [i["id"] for i in await repository.search_instructions("balance")] == [keep]
+        assert await repository.search_instructions('customers" (') != []
+
+        await repository.rebuild_search_index()
+        assert [i["id"] for i in await repository.search_instructions("customers")] == [keep]
+
+        # FTS rows are keyed by the integer rowid the triggers delete by
+        connection = await test_database.get_connection()
+        indexed = connection.execute("SELECT rowid, id FROM instructions_fts").fetchall()
+        keys = connection.execute("SELECT fts_rowid, instruction_id FROM instructions_fts_rowid").fetchall()
+        assert [tuple(row) for row in indexed] == [tuple(row) for row in keys]
+        assert [row[1] for row in keys] == [keep]
+
+    async def test_entity_instructions_cache_follows_writes(self, test_database, sample_instruction):
+        """Cached entity instructions are reused until a write changes the entity's rows"""
+        repository = SQLiteInstructionsRepository(test_database)
+        read_id, create_id = await repository.save_instructions_bulk([
+            ("CustomersV3", "read", sample_instruction),
+            ("CustomersV3", "create", sample_instruction),
+        ])
+
+        first = await repository.get_entity_instructions("CustomersV3")
+        first[0]["tags"].append("mutated")
+        assert await repository.get_entity_instructions("CustomersV3") == [
+            {**first[0], "tags": sample_instruction["tags"]}, first[1]
+        ]
+        assert len(repository._entity_instructions_cache) == 1
+
+        await repository.record_instruction_usage(read_id, success=True)
+        [read] = await repository.get_entity_instructions("CustomersV3", "read")
+        assert read["success_count"] == 1
+
+        await repository.delete_instruction(create_id)
+        assert [i["id"] for i in await repository.get_entity_instructions("CustomersV3")] == [read_id]
+
+    async def test_search_instructions_summary_fields(self, test_database, sample_instruction):
+        """A field projection returns only those fields, decoded as in full results"""
+        repository = SQLiteInstructionsRepository(test_database)
+        await repository.save_instructions_bulk([("CustomersV3", "read", sample_instruction)])
+
+        full = await repository.search_instructions("customers")
+        summary = await repository.search_instructions("customers", fields=INSTRUCTION_SUMMARY_FIELDS)
+        listed = await repository.search_instructions("", fields=("id", "tags", "success_count"))
+
+        assert summary == [{field: full[0][field] for field in INSTRUCTION_SUMMARY_FIELDS}]
+        assert listed == [{"id": full[0]["id"], "tags": full[0]["tags"], "success_count": 0}]
+        with pytest.raises(ValueError):
+            await repository.search_instructions("customers", fields=("id", "1; DROP TABLE x"))
+
+    async def test_search_instructions_plan_is_driven_by_match(self, test_database):
+        """The FTS MATCH drives the query and instructions are fetched by primary key"""
+        connection = await test_database.get_connection()
+        sql, params = _search_statement("customer balance", 10, 0)
+
+        plan = [row[3] for row in connection.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+        assert plan[0].startswith("SCAN instructions_fts VIRTUAL TABLE INDEX")
+        assert ":M" in plan[0]
+        assert plan[1].startswith("SEARCH i USING")
+
+
+@pytest.mark.unit
+class TestRawMetadataRefresh:
+    async def test_concurrent_refreshes_share_one_load(self, test_database):
+        """Concurrent callers await a single loader call"""
+        repository = SQLiteMetadataRepository(test_database)
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return b"<edmx/>"
+
+        results = await asyncio.gather(*(
+            repository.get_or_refresh_raw_metadata(loader) for _ in range(5)
+        ))
+
+        assert results == [b"<edmx/>"] * 5
+        assert calls == 1
+        assert await repository.get_or_refresh_raw_metadata(loader) == b"<edmx/>"
+        assert calls == 2
+
+
+@pytest.mark.unit
+class TestBufferedUsageStats:
+    async def _count(self, database):
+        connection = await database.get_connection()
+        return connection.execute("SELECT COUNT(*) FROM usage_stats").fetchone()[0]
+
+    async def test_buffered_until_flush(self, test_database):
+        """record_usage_stat does not write until flushed"""
+        repository = SQLiteMetadataRepository(test_database)
+
+        await repository.record_usage_stat("search", "CustomersV3")
+        assert await self._count(test_database) == 0
+
+        await repository.flush_usage_stats()
+        assert await self._count(test_database) == 1
+
+    async def test_flush_when_buffer_full(self, test_database, monkeypatch):
+        """Reaching the row threshold flushes immediately"""
+        monkeypatch.setattr(
+            "d365fo_mcp.repositories.sqlite.metadata_repository.USAGE_FLUSH_MAX_ROWS", 2
+        )
+        repository = SQLiteMetadataRepository(test_database)
+
+        await repository.record_usage_stat("search")
+        await repository.record_usage_stat("search")
+
+        assert await self._count(test_database) == 2
+
+    async def test_close_flushes(self, test_database):
+        """close() writes whatever is still buffered"""
+        repository = SQLiteMetadataRepository(test_database)
+        await repository.initialize()
+
+        await repository.record_usage_stat("search")
+        await repository.close()
+
+        assert await self._count(test_database) == 1
+
+    async def test_recorded_at_is_taken_when_recorded(self, test_database):
+        """Buffered rows keep the time they were recorded, not the flush time"""
+        repository = SQLiteMetadataRepository(test_database)
+
+        await repository.record_usage_stat("search")
+        recorded_by = datetime.now().isoformat()
+        await asyncio.sleep(0.01)
+        await repository.flush_usage_stats()
+
+        connection = await test_database.get_connection()
+        assert connection.execute("SELECT recorded_at FROM usage_stats").fetchone()[0] <= recorded_by
+
+    async def test_buffer_is_capped_while_writes_wait(self, test_database, monkeypatch):
+        """Stats past the cap are dropped while another writer blocks flushes"""
+        monkeypatch.setattr(
+            "d365fo_mcp.repositories.sqlite.metadata_repository.USAGE_BUFFER_MAX_ROWS", 2
+        )
+        repository = SQLiteMetadataRepository(test_database)
+
+        async with test_database.transaction():
+            for _ in range(3):
+                await repository.record_usage_stat("search")
+            await repository.flush_usage_stats()
+        await repository.flush_usage_stats()
+
+        assert await self._count(test_database) == 2
+
+    async def test_close_waits_for_other_writers(self, test_database):
+        """close() waits for the write lock instead of skipping the final flush"""
+        repository = SQLiteMetadataRepository(test_database)
+        await repository.record_usage_stat("search")
+
+        release = asyncio.Event()
+
+        async def hold_write_lock():
+            async with test_database.transaction():
+                await release.wait()
+
+        writer = asyncio.create_task(hold_write_lock())
+        await asyncio.sleep(0)
+        closing = asyncio.create_task(repository.close())
+        await asyncio.sleep(0)
+        assert not closing.done()
+
+        release.set()
+        await asyncio.gather(writer, closing)
+        assert await self._count(test_database) == 1
+
+
+@pytest.mark.unit
+class TestDatabasePool:
+    @pytest.fixture
+    async def pool(self, tmp_path):
+        pool = DatabasePool(tmp_path / "pool.db", readers=2)
+        await pool.initialize()
+        yield pool
+        await pool.close()
+
+    async def test_readers_see_committed_snapshot(self, pool):
+        """Reads are not affected by an open write transaction"""
+        reader = await pool.get_read_connection()
+
+        async with pool.transaction() as writer:
+            writer.execute("INSERT INTO usage_stats (operation, success) VALUES ('search', 1)")
+            assert reader.execute("SELECT COUNT(*) FROM usage_stats").fetchone()[0] == 0
+
+        assert reader.execute("SELECT COUNT(*) FROM usage_stats").fetchone()[0] == 1
+
+    async def test_readers_are_read_only_and_round_robin(self, pool):
+        """Read connections reject writes and are reused once all are open"""
+        first, second, third = [await pool.get_read_connection() for _ in range(3)]
+
+        assert first is not second
+        assert third is first
+        with pytest.raises(sqlite3.OperationalError):
+            first.execute("INSERT INTO usage_stats (operation, success) VALUES ('search', 1)")
+
+    async def test_maintenance(self, pool, sample_instruction):
+        """Full maintenance vacuums and truncates the WAL; skipped mid-transaction"""
+        repository = SQLiteInstructionsRepository(pool)
+        await repository.save_instruction("CustomersV3", "read", sample_instruction)
+
+        await repository.maintenance("full")
+
+        assert (pool.db_path.parent / "pool.db-wal").stat().st_size == 0
+        assert [i["entity_name"] for i in await repository.search_instructions("customers")] == ["CustomersV3"]
+        async with pool.transaction():
+            await pool.maintenance("light")
+
+    async def test_checkpoint_every(self, tmp_path):
+        """A PASSIVE checkpoint is scheduled after checkpoint_every commits"""
+        database = DatabasePool(tmp_path / "checkpoint.db", checkpoint_every=2)
+        await database.initialize()
+        checkpoints = []
+        database._checkpoint = lambda: checkpoints.append(True)
+        connection = await database.get_connection()
+
+        for _ in range(5):
+            async with database.transaction() as writer:
+                writer.execute("INSERT INTO usage_stats (operation, success) VALUES ('search', 1)")
+            await asyncio.sleep(0)
+
+        assert len(checkpoints) == 2
+        assert connection.execute("PRAGMA wal_autocheckpoint").fetchone()[0] == 10000
+        await database.close()